@@ -8,23 +8,27 @@ st.set_page_config(
     layout="wide"
 )
 
-import matplotlib.pyplot as plt
 import os
 from dotenv import load_dotenv
 from visitor_analytics import display_visitor_counter
 
 # Import modules
-from config import ROAD_WIDTH_FSI_RULES, TDR_CONFIG, REGION_CONFIG
+from config import ROAD_WIDTH_FSI_RULES, TDR_CONFIG, REGION_CONFIG, REGION_RULES
 from utils import (
     get_ready_reckoner_rate, get_fsi_based_on_road_width,
     format_currency, format_area,
     get_land_area_input, get_fungible_input, get_ancillary_input
 )
 from calculator import calculate_profit
+from rate_store import get_store
+from result_cache import cached_calculate_profit, result_cache
+from dataflow import IncrementalCalculator
 from ui_components import (
     display_basic_results, display_land_details, display_premium_calculation,
     display_tdr_analysis, display_cost_analysis, display_revenue,
-    display_profit_distribution, display_visualization, create_download_report
+    display_profit_distribution, display_break_even, display_visualization, create_download_report,
+    display_sensitivity, display_cash_flow, display_risk_analysis, display_scenario_comparison,
+    display_optimizer
 )
 
 # Import AI Assistant - Add this line
@@ -160,11 +164,6 @@ if 'params' not in st.session_state:
 def get_cached_ready_reckoner_rate(region, year):
     return get_ready_reckoner_rate(region, year)
 
-# Cache the calculator function to improve performance
-@st.cache_data(ttl=60)  # Cache for 1 minute
-def cached_calculate_profit(**kwargs):
-    return calculate_profit(**kwargs)
-
 # Track a GA event (can be used for button clicks, etc.)
 def track_event(event_category, event_action, event_label=None):
     js_code = f"""
@@ -177,6 +176,418 @@ def track_event(event_category, event_action, event_label=None):
     """
     st.markdown(js_code, unsafe_allow_html=True)
 
+# The single project inputs and results run as fragments: changing an input reruns only
+# this panel, not the visitor counter, analytics, footer or the other tabs
+@st.fragment
+def single_project_panel():
+    # Create two columns - one for inputs, one for results
+    col1, col2 = st.columns([1, 2])
+    
+    # Input form in the first column
+    with col1:
+        st.header("Enter Project Details")
+    
+        # Location Parameters
+        st.subheader("Location")
+        region = st.selectbox(
+            "Region", 
+            list(REGION_CONFIG.keys()),
+            key="region"
+        )
+        if region != st.session_state.params['region']:
+            track_event("Input", "Region Change", region)
+        st.session_state.params['region'] = region
+    
+        ready_reckoner_year = st.selectbox(
+            "Ready Reckoner Year", 
+            [2022, 2023, 2024],
+            key="ready_reckoner_year"
+        )
+        st.session_state.params['ready_reckoner_year'] = ready_reckoner_year
+    
+        # Zone-level ready reckoner rates are offered only when a rate store has been built
+        ready_reckoner_zone = None
+        if get_store() is not None:
+            ready_reckoner_zone = st.text_input(
+                "Ready Reckoner Zone (optional)",
+                value=st.session_state.params.get('ready_reckoner_zone') or "",
+                key="ready_reckoner_zone",
+                help="Village/CTS zone code; leave empty to use the city-level rate"
+            ) or None
+            st.session_state.params['ready_reckoner_zone'] = ready_reckoner_zone
+    
+        project_type = st.selectbox(
+            "Project Type", 
+            ["residential", "commercial"],
+            key="project_type"
+        )
+        st.session_state.params['project_type'] = project_type
+    
+        is_self_redevelopment = st.radio(
+            "Redevelopment Type", 
+            ["Self-Redevelopment", "Builder Redevelopment"],
+            key="redevelopment_type"
+        ) == "Self-Redevelopment"
+        st.session_state.params['is_self_redevelopment'] = is_self_redevelopment
+    
+        # Land Parameters
+        st.subheader("Land Parameters")
+        land_area = get_land_area_input(region)
+        st.session_state.params['land_area'] = land_area
+    
+        # Show road width input only for Mumbai
+        road_width = None
+        if region == "Mumbai":
+            road_width = st.number_input(
+                "Road Width Abutting Property (meters)", 
+                min_value=6.0, 
+                max_value=30.0, 
+                value=12.0,
+                key="road_width",
+                help="FSI varies based on road width in Mumbai"
+            )
+            st.session_state.params['road_width'] = road_width
+    
+        total_members = st.number_input(
+            "Number of Members/Flats", 
+            value=40, 
+            min_value=1, 
+            step=1,
+            key="total_members"
+        )
+        st.session_state.params['total_members'] = total_members
+    
+        carpet_area = st.number_input(
+            "Current Carpet Area per Member (sqft)", 
+            value=500.0, 
+            min_value=100.0,
+            key="carpet_area"
+        )
+        st.session_state.params['carpet_area'] = carpet_area
+    
+        extra_percentage = st.number_input(
+            "Extra Carpet Percentage", 
+            value=30.0, 
+            min_value=0.0,
+            key="extra_percentage"
+        )
+        st.session_state.params['extra_percentage'] = extra_percentage
+    
+        # Construction Parameters
+        st.subheader("Construction Parameters")
+    
+        # Base FSI - dynamic based on road width for Mumbai
+        if region == "Mumbai" and road_width is not None:
+            default_fsi = get_fsi_based_on_road_width(region, project_type, road_width)
+            fsi_text = f"Base FSI Value (Road width based: {default_fsi})"
+        else:
+            default_fsi = REGION_CONFIG[region]["fsi_rules"][project_type]
+            fsi_text = "Base FSI Value"
+    
+        fsi = st.number_input(
+            fsi_text, 
+            value=float(default_fsi), 
+            min_value=0.1,
+            key="fsi"
+        )
+        st.session_state.params['fsi'] = fsi
+    
+        # TDR Input
+        tdr_percentage = st.number_input(
+            "TDR Percentage (0-100%)", 
+            min_value=0.0, 
+            max_value=100.0, 
+            value=st.session_state.params.get('tdr_percentage', 0.0),
+            key="tdr_percentage",
+            help="Percentage of Transfer of Development Rights to apply"
+        )
+        st.session_state.params['tdr_percentage'] = tdr_percentage
+    
+        tdr_type = None
+        tdr_market_rate = None
+        if tdr_percentage > 0:
+            if region == "Mumbai":
+                tdr_type = st.selectbox(
+                    "TDR Type",
+                    options=REGION_CONFIG[region]["tdr_types_available"],
+                    format_func=lambda x: f"{x} ({TDR_CONFIG['Mumbai']['types'][x]['description']})",
+                    key="tdr_type",
+                    help="Select the type of TDR being utilized"
+                )
+                st.session_state.params['tdr_type'] = tdr_type
+    
+                tdr_market_rate = st.slider(
+                    "Current TDR Market Rate (₹/sqft)",
+                    min_value=TDR_CONFIG["Mumbai"]["min_rate"],
+                    max_value=TDR_CONFIG["Mumbai"]["max_rate"],
+                    value=TDR_CONFIG["Mumbai"]["market_rate"],
+                    key="tdr_market_rate",
+                    help="Adjust based on current market conditions"
+                )
+                st.session_state.params['tdr_market_rate'] = tdr_market_rate
+            else:
+                tdr_type = "Standard TDR"
+                st.session_state.params['tdr_type'] = tdr_type
+                st.info(f"Using standard TDR with region-specific multiplier of {REGION_CONFIG[region]['fsi_rules']['tdr_multiplier']}x for {region}")
+    
+        # Conditional inputs for fungible vs ancillary FSI
+        fungible_fsi = get_fungible_input(region)
+        st.session_state.params['fungible_fsi'] = fungible_fsi
+    
+        ancillary_fsi = get_ancillary_input(region)
+        st.session_state.params['ancillary_fsi'] = ancillary_fsi
+    
+        # Cost parameters
+        default_construction = REGION_RULES[region].default_construction_cost
+        construction_cost = st.number_input(
+            "Construction Cost per sqft (₹)", 
+            value=float(default_construction),
+            min_value=1000.0,
+            key="construction_cost"
+        )
+        st.session_state.params['construction_cost'] = construction_cost
+    
+        market_rate = st.number_input(
+            "Market Rate per sqft (₹)", 
+            value=17500.0, 
+            min_value=5000.0,
+            key="market_rate"
+        )
+        st.session_state.params['market_rate'] = market_rate
+    
+        avg_flat_size = st.number_input(
+            "Average Size of New Salable Flats (sqft)", 
+            value=750.0, 
+            min_value=200.0,
+            key="avg_flat_size"
+        )
+        st.session_state.params['avg_flat_size'] = avg_flat_size
+    
+        # Financial Parameters
+        st.subheader("Financial Parameters")
+        rent = st.number_input(
+            "Monthly Rent per Flat (₹)", 
+            value=15000.0, 
+            min_value=0.0,
+            key="rent"
+        )
+        st.session_state.params['rent'] = rent
+    
+        rent_months = st.number_input(
+            "Rent Duration (months)", 
+            value=36, 
+            min_value=0, 
+            step=1,
+            key="rent_months"
+        )
+        st.session_state.params['rent_months'] = rent_months
+    
+        relocation = st.number_input(
+            "Relocation Cost per Member (₹)", 
+            value=20000.0, 
+            min_value=0.0,
+            key="relocation"
+        )
+        st.session_state.params['relocation'] = relocation
+    
+        bank_interest = st.number_input(
+            "Bank Interest (₹)", 
+            value=50000000.0, 
+            min_value=0.0,
+            key="bank_interest"
+        )
+        st.session_state.params['bank_interest'] = bank_interest
+    
+        # Monthly schedule for the cash flow analysis (NPV/IRR)
+        with st.expander("Cash Flow Schedule"):
+            construction_months = st.number_input(
+                "Construction Period (months)",
+                value=int(rent_months) if rent_months > 0 else 36,
+                min_value=1,
+                step=1,
+                key="construction_months"
+            )
+            sales_start_month = st.number_input(
+                "Sales Start (month)",
+                value=6,
+                min_value=0,
+                step=1,
+                key="sales_start_month"
+            )
+            sales_end_month = st.number_input(
+                "Sales End (month)",
+                value=int(construction_months) + 6,
+                min_value=0,
+                step=1,
+                key="sales_end_month"
+            )
+            loan_to_cost = st.slider(
+                "Loan Funding (% of costs)",
+                min_value=0,
+                max_value=100,
+                value=50,
+                key="loan_to_cost"
+            )
+            annual_loan_rate = st.number_input(
+                "Loan Interest Rate (% p.a.)",
+                value=11.0,
+                min_value=0.0,
+                step=0.5,
+                key="annual_loan_rate"
+            )
+            annual_discount_rate = st.number_input(
+                "Discount Rate (% p.a.)",
+                value=12.0,
+                min_value=0.0,
+                step=0.5,
+                key="annual_discount_rate"
+            )
+        cash_flow_schedule = dict(
+            construction_months=construction_months,
+            sales_start_month=sales_start_month,
+            sales_end_month=sales_end_month,
+            loan_to_cost=loan_to_cost / 100,
+            annual_loan_rate=annual_loan_rate / 100,
+            annual_discount_rate=annual_discount_rate / 100
+        )
+    
+        # Profit Sharing (if builder redevelopment)
+        profit_sharing = 100  # Default to 100% for builder as requested
+        if not is_self_redevelopment:
+            st.info("For builder redevelopment, the builder typically takes 100% of the profit/loss.")
+            profit_sharing = 100  # Fixed at 100% for builder redevelopment
+    
+        # Add save button for current parameters
+        if st.button("Save Parameters"):
+            st.session_state.saved_params = st.session_state.params.copy()
+            st.success("Parameters saved successfully!")
+            track_event("User Action", "Save Parameters")
+    
+        # Calculate button
+        calculate_button = st.button(
+            "Calculate Result", 
+            type="primary"
+        )
+        # Tracked here rather than in a callback, which cannot draw inside a fragment
+        if calculate_button:
+            track_event("User Action", "Calculate", f"Region:{region}")
+    
+        # Live mode recalculates on every input change, rerunning only the affected calculation stages
+        live_update = st.toggle(
+            "Live recalculation",
+            key="live_update",
+            help="Update the key results on every input change without pressing Calculate Result"
+        )
+    
+    # Inputs of the calculation, shared by the calculator, break-even solver and risk analysis
+    calc_inputs = dict(
+        region=region,
+        ready_reckoner_year=ready_reckoner_year,
+        land_area=land_area,
+        current_carpet_area_per_member=carpet_area,
+        total_members=total_members,
+        extra_carpet_percentage=extra_percentage,
+        fsi=fsi,
+        fungible_fsi=fungible_fsi,
+        construction_cost_per_sqft=construction_cost,
+        market_rate_per_sqft=market_rate,
+        avg_new_flat_size=avg_flat_size,
+        rent_per_month=rent,
+        rent_duration_months=rent_months,
+        relocation_cost_per_member=relocation,
+        bank_interest=bank_interest,
+        project_type=project_type,
+        is_self_redevelopment=is_self_redevelopment,
+        profit_sharing_with_developer=profit_sharing,
+        tdr_percentage=tdr_percentage,
+        tdr_type=tdr_type,
+        tdr_market_rate=tdr_market_rate,
+        road_width=road_width,
+        ancillary_fsi=ancillary_fsi,
+        ready_reckoner_zone=ready_reckoner_zone
+    )
+    
+    # The other tabs read the current inputs from session state
+    st.session_state.calc_inputs = calc_inputs
+    
+    # Results in the second column
+    with col2:
+        results_panel(calc_inputs, cash_flow_schedule, calculate_button, live_update)
+
+# Results of the single project panel; its own widgets rerun only this fragment
+@st.fragment
+def results_panel(calc_inputs, cash_flow_schedule, calculate_button, live_update):
+    if not (calculate_button or live_update):
+        return
+    region = calc_inputs['region']
+    project_type = calc_inputs['project_type']
+    
+    if calculate_button:
+        # Use the cached calculation function (shared across sessions, no expiry)
+        results = cached_calculate_profit(**calc_inputs)
+    else:
+        if 'incremental_calculator' not in st.session_state:
+            st.session_state.incremental_calculator = IncrementalCalculator()
+        results = st.session_state.incremental_calculator.update(**calc_inputs)
+    
+    # Store results in session state for AI assistant to access
+    st.session_state.results = results
+    
+    # Track if project is profitable in GA
+    is_profitable = results['total_profit'] >= 0
+    if calculate_button:
+        track_event("Result", "Profitability", "Profitable" if is_profitable else "Loss-making")
+    
+    # Display all results
+    st.header("REDEVELOPMENT PROJECT ANALYSIS")
+    
+    # Display results using UI components
+    display_basic_results(results)
+    display_land_details(results, region, REGION_CONFIG)
+    display_premium_calculation(results, region, REGION_CONFIG)
+    
+    # Show TDR information if applicable
+    if results.get('tdr_percentage', 0) > 0:
+        display_tdr_analysis(results, region, project_type, TDR_CONFIG, REGION_CONFIG)
+    
+    display_cost_analysis(results)
+    
+    # Handle profit/loss
+    is_profitable = results['total_profit'] >= 0
+    display_revenue(results, is_profitable)
+    display_profit_distribution(results, is_profitable)
+    
+    # The full analysis runs when Calculate Result is pressed; live updates show the core figures
+    if not calculate_button:
+        st.info("Press **Calculate Result** for break-even, sensitivity, cash flow, charts and the report.")
+    else:
+        display_break_even(calc_inputs)
+        display_sensitivity(calc_inputs, results)
+        display_cash_flow(calc_inputs, cash_flow_schedule)
+    
+        # Visualizations
+        display_visualization(results, region, is_profitable, REGION_CONFIG)
+    
+        # Report download
+        report_text = create_download_report(results, region, is_profitable, REGION_CONFIG)
+    
+        # Track download event
+        download_button = st.download_button(
+            label="Download Report as Text",
+            data=report_text,
+            file_name=f"redevelopment_report_{region}.txt",
+            mime="text/plain"
+        )
+        if download_button:
+            track_event("User Action", "Download Report")
+
+# Widgets of a tab that is not open are not drawn, and Streamlit would drop their values;
+# re-assigning them keeps the user's settings for when the tab is opened again
+def keep_widget_state(prefix):
+    for key in list(st.session_state.keys()):
+        if key.startswith(prefix):
+            st.session_state[key] = st.session_state[key]
+
 # Main Application UI
 def main():
     st.title("Redevelopment Financial Calculator")
@@ -191,342 +602,72 @@ def main():
     has_api_config = check_api_config()
 
     # Create top-level tabs - ADDED AI ASSISTANT TAB
-    main_tab, scenario_tab, ai_tab = st.tabs(["Single Project Analysis", "Scenario Comparison", "AI Assistant"])
+    # Only the open tab runs; switching tabs reruns the app with current inputs
+    main_tab, scenario_tab, risk_tab, optimizer_tab, ai_tab = st.tabs(
+        ["Single Project Analysis", "Scenario Comparison", "Risk Analysis", "TDR & Carpet Optimizer", "AI Assistant"],
+        key="active_tab",
+        on_change="rerun"
+    )
 
-    # Main single project analysis tab
+    # Main single project analysis tab, always run so the inputs keep their state
     with main_tab:
-        # Create two columns - one for inputs, one for results
-        col1, col2 = st.columns([1, 2])
-
-        # Input form in the first column
-        with col1:
-            st.header("Enter Project Details")
-            
-            # Location Parameters
-            st.subheader("Location")
-            region = st.selectbox(
-                "Region", 
-                list(REGION_CONFIG.keys()),
-                key="region",
-                on_change=lambda: track_event("Input", "Region Change", st.session_state.region)
-            )
-            st.session_state.params['region'] = region
-            
-            ready_reckoner_year = st.selectbox(
-                "Ready Reckoner Year", 
-                [2022, 2023, 2024],
-                key="ready_reckoner_year"
-            )
-            st.session_state.params['ready_reckoner_year'] = ready_reckoner_year
-            
-            project_type = st.selectbox(
-                "Project Type", 
-                ["residential", "commercial"],
-                key="project_type"
-            )
-            st.session_state.params['project_type'] = project_type
-            
-            is_self_redevelopment = st.radio(
-                "Redevelopment Type", 
-                ["Self-Redevelopment", "Builder Redevelopment"],
-                key="redevelopment_type"
-            ) == "Self-Redevelopment"
-            st.session_state.params['is_self_redevelopment'] = is_self_redevelopment
-            
-            # Land Parameters
-            st.subheader("Land Parameters")
-            land_area = get_land_area_input(region)
-            st.session_state.params['land_area'] = land_area
-            
-            # Show road width input only for Mumbai
-            road_width = None
-            if region == "Mumbai":
-                road_width = st.number_input(
-                    "Road Width Abutting Property (meters)", 
-                    min_value=6.0, 
-                    max_value=30.0, 
-                    value=12.0,
-                    key="road_width",
-                    help="FSI varies based on road width in Mumbai"
-                )
-                st.session_state.params['road_width'] = road_width
-            
-            total_members = st.number_input(
-                "Number of Members/Flats", 
-                value=40, 
-                min_value=1, 
-                step=1,
-                key="total_members"
-            )
-            st.session_state.params['total_members'] = total_members
-            
-            carpet_area = st.number_input(
-                "Current Carpet Area per Member (sqft)", 
-                value=500.0, 
-                min_value=100.0,
-                key="carpet_area"
-            )
-            st.session_state.params['carpet_area'] = carpet_area
-            
-            extra_percentage = st.number_input(
-                "Extra Carpet Percentage", 
-                value=30.0, 
-                min_value=0.0,
-                key="extra_percentage"
-            )
-            st.session_state.params['extra_percentage'] = extra_percentage
-            
-            # Construction Parameters
-            st.subheader("Construction Parameters")
-            
-            # Base FSI - dynamic based on road width for Mumbai
-            if region == "Mumbai" and road_width is not None:
-                default_fsi = get_fsi_based_on_road_width(region, project_type, road_width)
-                fsi_text = f"Base FSI Value (Road width based: {default_fsi})"
-            else:
-                default_fsi = REGION_CONFIG[region]["fsi_rules"][project_type]
-                fsi_text = "Base FSI Value"
-                
-            fsi = st.number_input(
-                fsi_text, 
-                value=float(default_fsi), 
-                min_value=0.1,
-                key="fsi"
-            )
-            st.session_state.params['fsi'] = fsi
-            
-            # TDR Input
-            tdr_percentage = st.number_input(
-                "TDR Percentage (0-100%)", 
-                min_value=0.0, 
-                max_value=100.0, 
-                value=st.session_state.params.get('tdr_percentage', 0.0),
-                key="tdr_percentage",
-                help="Percentage of Transfer of Development Rights to apply"
-            )
-            st.session_state.params['tdr_percentage'] = tdr_percentage
-            
-            tdr_type = None
-            tdr_market_rate = None
-            if tdr_percentage > 0:
-                if region == "Mumbai":
-                    tdr_type = st.selectbox(
-                        "TDR Type",
-                        options=REGION_CONFIG[region]["tdr_types_available"],
-                        format_func=lambda x: f"{x} ({TDR_CONFIG['Mumbai']['types'][x]['description']})",
-                        key="tdr_type",
-                        help="Select the type of TDR being utilized"
-                    )
-                    st.session_state.params['tdr_type'] = tdr_type
-                    
-                    tdr_market_rate = st.slider(
-                        "Current TDR Market Rate (₹/sqft)",
-                        min_value=TDR_CONFIG["Mumbai"]["min_rate"],
-                        max_value=TDR_CONFIG["Mumbai"]["max_rate"],
-                        value=TDR_CONFIG["Mumbai"]["market_rate"],
-                        key="tdr_market_rate",
-                        help="Adjust based on current market conditions"
-                    )
-                    st.session_state.params['tdr_market_rate'] = tdr_market_rate
-                else:
-                    tdr_type = "Standard TDR"
-                    st.session_state.params['tdr_type'] = tdr_type
-                    st.info(f"Using standard TDR with region-specific multiplier of {REGION_CONFIG[region]['fsi_rules']['tdr_multiplier']}x for {region}")
-            
-            # Conditional inputs for fungible vs ancillary FSI
-            fungible_fsi = get_fungible_input(region)
-            st.session_state.params['fungible_fsi'] = fungible_fsi
-            
-            ancillary_fsi = get_ancillary_input(region)
-            st.session_state.params['ancillary_fsi'] = ancillary_fsi
-            
-            # Cost parameters
-            default_construction = REGION_CONFIG[region]["premium_rates"]["construction"]
-            construction_cost = st.number_input(
-                "Construction Cost per sqft (₹)", 
-                value=float(default_construction),
-                min_value=1000.0,
-                key="construction_cost"
-            )
-            st.session_state.params['construction_cost'] = construction_cost
-            
-            market_rate = st.number_input(
-                "Market Rate per sqft (₹)", 
-                value=17500.0, 
-                min_value=5000.0,
-                key="market_rate"
-            )
-            st.session_state.params['market_rate'] = market_rate
-            
-            avg_flat_size = st.number_input(
-                "Average Size of New Salable Flats (sqft)", 
-                value=750.0, 
-                min_value=200.0,
-                key="avg_flat_size"
-            )
-            st.session_state.params['avg_flat_size'] = avg_flat_size
-            
-            # Financial Parameters
-            st.subheader("Financial Parameters")
-            rent = st.number_input(
-                "Monthly Rent per Flat (₹)", 
-                value=15000.0, 
-                min_value=0.0,
-                key="rent"
-            )
-            st.session_state.params['rent'] = rent
-            
-            rent_months = st.number_input(
-                "Rent Duration (months)", 
-                value=36, 
-                min_value=0, 
-                step=1,
-                key="rent_months"
-            )
-            st.session_state.params['rent_months'] = rent_months
-            
-            relocation = st.number_input(
-                "Relocation Cost per Member (₹)", 
-                value=20000.0, 
-                min_value=0.0,
-                key="relocation"
-            )
-            st.session_state.params['relocation'] = relocation
-            
-            bank_interest = st.number_input(
-                "Bank Interest (₹)", 
-                value=50000000.0, 
-                min_value=0.0,
-                key="bank_interest"
-            )
-            st.session_state.params['bank_interest'] = bank_interest
-            
-            # Profit Sharing (if builder redevelopment)
-            profit_sharing = 100  # Default to 100% for builder as requested
-            if not is_self_redevelopment:
-                st.info("For builder redevelopment, the builder typically takes 100% of the profit/loss.")
-                profit_sharing = 100  # Fixed at 100% for builder redevelopment
-            
-            # Add save button for current parameters
-            if st.button("Save Parameters"):
-                st.session_state.saved_params = st.session_state.params.copy()
-                st.success("Parameters saved successfully!")
-                track_event("User Action", "Save Parameters")
-            
-            # Calculate button
-            calculate_button = st.button(
-                "Calculate Result", 
-                type="primary",
-                on_click=lambda: track_event("User Action", "Calculate", f"Region:{region}")
-            )
-
-        # Results in the second column
-        with col2:
-            if calculate_button:
-                # Use the cached calculation function
-                results = cached_calculate_profit(
-                    region=region,
-                    ready_reckoner_year=ready_reckoner_year,
-                    land_area=land_area,
-                    current_carpet_area_per_member=carpet_area,
-                    total_members=total_members,
-                    extra_carpet_percentage=extra_percentage,
-                    fsi=fsi,
-                    fungible_fsi=fungible_fsi,
-                    construction_cost_per_sqft=construction_cost,
-                    market_rate_per_sqft=market_rate,
-                    avg_new_flat_size=avg_flat_size,
-                    rent_per_month=rent,
-                    rent_duration_months=rent_months,
-                    relocation_cost_per_member=relocation,
-                    bank_interest=bank_interest,
-                    project_type=project_type,
-                    is_self_redevelopment=is_self_redevelopment,
-                    profit_sharing_with_developer=profit_sharing,
-                    tdr_percentage=tdr_percentage,
-                    tdr_type=tdr_type,
-                    tdr_market_rate=tdr_market_rate,
-                    road_width=road_width,
-                    ancillary_fsi=ancillary_fsi
-                )
-                
-                # Store results in session state for AI assistant to access
-                st.session_state.results = results
-                
-                # Track if project is profitable in GA
-                is_profitable = results['total_profit'] >= 0
-                track_event("Result", "Profitability", "Profitable" if is_profitable else "Loss-making")
-                
-                # Display all results
-                st.header("REDEVELOPMENT PROJECT ANALYSIS")
-                
-                # Display results using UI components
-                display_basic_results(results)
-                display_land_details(results, region, REGION_CONFIG)
-                display_premium_calculation(results, region, REGION_CONFIG)
-                
-                # Show TDR information if applicable
-                if results.get('tdr_percentage', 0) > 0:
-                    display_tdr_analysis(results, region, project_type, TDR_CONFIG, REGION_CONFIG)
-                
-                display_cost_analysis(results)
-                
-                # Handle profit/loss
-                is_profitable = results['total_profit'] >= 0
-                display_revenue(results, is_profitable)
-                display_profit_distribution(results, is_profitable)
-                
-                # Visualizations
-                display_visualization(results, region, is_profitable, REGION_CONFIG)
-                
-                # Report download
-                report_text = create_download_report(results, region, is_profitable, REGION_CONFIG)
-                
-                # Track download event
-                download_button = st.download_button(
-                    label="Download Report as Text",
-                    data=report_text,
-                    file_name=f"redevelopment_report_{region}.txt",
-                    mime="text/plain",
-                    on_click=lambda: track_event("User Action", "Download Report")
-                )
+        single_project_panel()
+    calc_inputs = st.session_state.calc_inputs
 
     # Scenario comparison tab
-    #with scenario_tab:
-    #    st.header("Scenario Comparison")
-    #    st.markdown("""
-    #    Coming soon! This feature will allow you to compare multiple redevelopment scenarios side by side.
-    #    """)
-    #    
-    #    if st.button("Notify me when this feature is available", key="notify-feature"):
-    #        track_event("User Interest", "Feature Interest", "Scenario Comparison")
-    #        st.success("Thank you for your interest! We'll notify you when this feature becomes available.")
+    if scenario_tab.open:
+        with scenario_tab:
+            display_scenario_comparison(REGION_CONFIG)
+    else:
+        keep_widget_state("scenario_")
+    
+    # Monte Carlo risk analysis tab
+    if risk_tab.open:
+        with risk_tab:
+            display_risk_analysis(calc_inputs)
+    else:
+        keep_widget_state("risk_")
+    
+    # TDR / extra carpet optimizer tab
+    if optimizer_tab.open:
+        with optimizer_tab:
+            display_optimizer(calc_inputs)
+    else:
+        keep_widget_state("optimizer_")
     
     # AI Assistant tab - NEW
-    with ai_tab:
-        if has_api_config:
-            add_ai_assistant_tab()
-            # Add a button to clear chat history
-            if st.sidebar.button("Clear Chat History", key="clear_chat"):
-                clear_chat_history()
-                st.rerun()
-        else:
-            st.header("AI Assistant")
-            st.error("AI Assistant is not available because the API key is not configured.")
-            st.markdown("""
-            ### How to Enable the AI Assistant:
+    if ai_tab.open:
+        with ai_tab:
+            if has_api_config:
+                add_ai_assistant_tab()
+                # Add a button to clear chat history
+                if st.sidebar.button("Clear Chat History", key="clear_chat"):
+                    clear_chat_history()
+                    st.rerun()
+            else:
+                st.header("AI Assistant")
+                st.error("AI Assistant is not available because the API key is not configured.")
+                st.markdown("""
+                ### How to Enable the AI Assistant:
             
-            1. Sign up for Google AI Studio at [https://aistudio.google.com/](https://aistudio.google.com/)
-            2. Create a new API key in the API section
-            3. Create a file named `.env` in the same folder as your application
-            4. Add this line to the .env file:
-            ```
-            GEMINI_API_KEY=your_api_key_here
-            ```
-            5. Restart your Streamlit app
+                1. Sign up for Google AI Studio at [https://aistudio.google.com/](https://aistudio.google.com/)
+                2. Create a new API key in the API section
+                3. Create a file named `.env` in the same folder as your application
+                4. Add this line to the .env file:
+                ```
+                GEMINI_API_KEY=your_api_key_here
+                ```
+                5. Restart your Streamlit app
             
-            Once configured, the AI assistant will help answer questions about redevelopment projects in Maharashtra.
-            """)
+                Once configured, the AI assistant will help answer questions about redevelopment projects in Maharashtra.
+                """)
+
+    # Shared result cache counters, as of this run (a fragment rerun cannot update the sidebar)
+    cache_stats = result_cache.stats()
+    st.sidebar.caption(
+        f"Result cache: {cache_stats['hits'] + cache_stats['disk_hits']:,} hits, "
+        f"{cache_stats['misses']:,} misses ({cache_stats['size']:,} cached)"
+    )
 
     # Add the disclaimer footer
     add_footer_with_disclaimer()
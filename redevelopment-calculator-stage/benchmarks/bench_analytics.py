@@ -0,0 +1,118 @@
+# File: benchmarks/bench_analytics.py
+# Analytics rollups: checks that the rollups kept up to date by the visit writer match a full
+# rescan of the stored visits and that the streaming bot detector flags the bot, and times
+# the dashboard read against that rescan
+#
+# Synthetic visits (a mix of one-off sessions, repeat visitors and a bot hitting the app at a
+# fixed interval) go through a VisitWriter with rollups into an in-process store.
+#
+# Usage:
+#   python benchmarks/bench_analytics.py
+#   python benchmarks/bench_analytics.py --visits 50000
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import pytz
+
+from visit_writer import VisitWriter
+from visitor_rollups import ROLLUPS_PATH, VisitRollups, build_rollups, read_dashboard
+from visitor_store import LocalStore, ShardedCounter
+
+PLACES = [("India", "Maharashtra", "Mumbai"), ("India", "Maharashtra", "Pune"), ("India", "Karnataka", "Bengaluru"),
+          ("United States", "California", "San Jose"), ("Unknown", "Unknown", "Unknown")]
+
+
+def synthetic_visits(count, seed=7):
+    """`count` visits over the last few days, in time order."""
+    rng = random.Random(seed)
+    now = datetime.now(pytz.UTC)
+    visits = []
+    # A bot: one session, a visit every 30 seconds through the last hour
+    for i in range(min(100, count // 10)):
+        visits.append((now - timedelta(seconds=30 * i), "bot00001", PLACES[3]))
+    sessions = 0
+    while len(visits) < count:
+        sessions += 1
+        start = now - timedelta(seconds=rng.uniform(0, 3 * 86400))
+        place = rng.choice(PLACES)
+        for i in range(rng.choice((1, 1, 1, 2, 5))):
+            visits.append((start + timedelta(seconds=rng.uniform(0, 600) * i), f"s{sessions:07d}", place))
+    visits = sorted(visits[:count], key=lambda visit: visit[0])
+    return [{'timestamp': timestamp.isoformat(), 'session_id': session_id, 'visit_count': 1,
+             'country': country, 'region': region, 'city': city}
+            for timestamp, session_id, (country, region, city) in visits]
+
+
+def differences(incremental, rebuilt):
+    """Rollup fields that differ (floats compared with a tolerance)."""
+    found = []
+
+    def compare(path, a, b):
+        if isinstance(a, dict) and isinstance(b, dict):
+            for key in set(a) | set(b):
+                compare(f"{path}/{key}", a.get(key), b.get(key))
+        elif isinstance(a, float) or isinstance(b, float):
+            if a is None or b is None or abs(a - b) > 1e-6 * max(1.0, abs(a), abs(b)):
+                found.append((path, a, b))
+        elif a != b:
+            found.append((path, a, b))
+
+    compare(ROLLUPS_PATH, incremental, rebuilt)
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check and time the visitor analytics rollups.")
+    parser.add_argument("--visits", type=int, default=20000, help="Visits to generate")
+    parser.add_argument("--batch-size", type=int, default=100, help="Visit writer batch size")
+    args = parser.parse_args(argv)
+    # Every flagged session is logged; only the count is of interest here
+    logging.getLogger("visitor_rollups").setLevel(logging.ERROR)
+
+    store = LocalStore()
+    writer = VisitWriter(store, ShardedCounter(store, "visitor_counter"), rollups=VisitRollups(),
+                         batch_size=args.batch_size, max_pending=args.visits + 1)
+    start = time.perf_counter()
+    for visit in synthetic_visits(args.visits):
+        writer.record(visit)
+    writer.close(timeout=600)
+    written = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rebuilt = build_rollups(store.get("visitors"))
+    rescan = time.perf_counter() - start
+
+    requests = store.requests
+    start = time.perf_counter()
+    dashboard = read_dashboard(store)
+    read = time.perf_counter() - start
+    read_requests = store.requests - requests
+
+    print(f"{args.visits} visits written in {written:.2f}s ({writer.stats()['batches']} batches)")
+    print(f"full rescan        {rescan * 1000:9.1f} ms")
+    print(f"dashboard read     {read * 1000:9.1f} ms   {read_requests} requests, "
+          f"{len(dashboard['repeat_sessions'])} repeat sessions, {dashboard['recent_visits']} visits in the last hour")
+    print(f"flagged sessions   {len(dashboard['flagged'])} (bot00001 {'flagged' if 'bot00001' in dashboard['flagged'] else 'MISSED'})")
+
+    failures = differences(store.get(ROLLUPS_PATH), rebuilt)
+    if 'bot00001' not in dashboard['flagged']:
+        failures.append(("flagged/bot00001", None, "flagged"))
+    if failures:
+        for path, incremental, expected in failures[:10]:
+            print(f"  {path}: rollup {incremental!r}, rescan {expected!r}", file=sys.stderr)
+        print(f"FAILED: {len(failures)} rollup values differ from a full rescan", file=sys.stderr)
+        sys.exit(1)
+    print("OK: rollups match a full rescan")
+
+
+if __name__ == "__main__":
+    main()
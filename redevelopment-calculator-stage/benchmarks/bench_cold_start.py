@@ -0,0 +1,89 @@
+# File: benchmarks/bench_cold_start.py
+# Cold-start benchmark: time until the app's first script run has painted the input form
+#
+# Each sample is a fresh interpreter that imports Streamlit (as the server does before the
+# first session) and then runs app.py once through streamlit.testing, as a new session would.
+#
+# Usage:
+#   python benchmarks/bench_cold_start.py                 # fails if plotting is imported or the run is too slow
+#   python benchmarks/bench_cold_start.py --repeat 5 --max-seconds 2.0 --json
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+painted = time.perf_counter()
+form = any(button.label == "Calculate Result" for button in at.button) and not at.exception
+print(imported - start, painted - imported, 'matplotlib.pyplot' in sys.modules, form)
+"""
+
+
+def time_cold_start(repeat=3):
+    """Run the first session in fresh interpreters; returns one dict per sample."""
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(app=os.path.join(APP_DIR, "app.py"))],
+            cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.split()[-4:]
+        samples.append({
+            "streamlit_import_s": float(output[0]),
+            "first_paint_s": float(output[1]),
+            "loads_pyplot": output[2] == "True",
+            "form_painted": output[3] == "True",
+        })
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time to first paint of the input form on a cold start.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters to run")
+    parser.add_argument("--max-seconds", type=float, default=3.0, help="Fail if the median first paint exceeds this")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    samples = time_cold_start(args.repeat)
+    first_paint = [sample["first_paint_s"] for sample in samples]
+    result = {
+        "streamlit_import_median_s": statistics.median(sample["streamlit_import_s"] for sample in samples),
+        "first_paint_median_s": statistics.median(first_paint),
+        "first_paint_min_s": min(first_paint),
+        "loads_pyplot": any(sample["loads_pyplot"] for sample in samples),
+        "form_painted": all(sample["form_painted"] for sample in samples),
+    }
+
+    failures = []
+    if not result["form_painted"]:
+        failures.append("the input form was not painted (or the first run raised)")
+    if result["loads_pyplot"]:
+        failures.append("the first run imports matplotlib.pyplot")
+    if result["first_paint_median_s"] > args.max_seconds:
+        failures.append(f"median first paint {result['first_paint_median_s']:.3f}s exceeds {args.max_seconds:.3f}s")
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"streamlit import  median {result['streamlit_import_median_s'] * 1000:7.1f} ms")
+        print(f"first paint       median {result['first_paint_median_s'] * 1000:7.1f} ms   "
+              f"min {result['first_paint_min_s'] * 1000:7.1f} ms"
+              f"{'   (imports matplotlib.pyplot!)' if result['loads_pyplot'] else ''}")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# File: benchmarks/bench_import.py
+# Import-time benchmark guarding the Streamlit-free core import path
+#
+# Usage:
+#   python benchmarks/bench_import.py                # fails if the core imports streamlit or is too slow
+#   python benchmarks/bench_import.py --max-seconds 0.3 --repeat 10
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must import without pulling in the Streamlit runtime
+CORE_MODULES = ("config", "rate_store", "lookups", "calculator", "solver", "risk_analysis", "sensitivity", "cashflow", "optimizer", "scenarios", "result_cache", "dataflow", "charts", "portfolio_cli")
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, 'streamlit' in sys.modules)
+"""
+
+
+def time_import(module, repeat=5):
+    """Import `module` in fresh interpreters; returns (timings in seconds, streamlit loaded?)."""
+    timings = []
+    loads_streamlit = False
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(output[0]))
+        loads_streamlit = loads_streamlit or output[1] == "True"
+    return timings, loads_streamlit
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the calculator core.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--max-seconds", type=float, default=0.5, help="Fail if the median import of a core module exceeds this")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    failures = []
+    for module in CORE_MODULES:
+        timings, loads_streamlit = time_import(module, args.repeat)
+        median = statistics.median(timings)
+        results[module] = {"median_s": median, "min_s": min(timings), "loads_streamlit": loads_streamlit}
+        if loads_streamlit:
+            failures.append(f"{module} imports streamlit")
+        if median > args.max_seconds:
+            failures.append(f"{module} median import {median:.3f}s exceeds {args.max_seconds:.3f}s")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, result in results.items():
+            print(f"{module:<16} median {result['median_s'] * 1000:7.1f} ms   min {result['min_s'] * 1000:7.1f} ms"
+                  f"{'   (imports streamlit!)' if result['loads_streamlit'] else ''}")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
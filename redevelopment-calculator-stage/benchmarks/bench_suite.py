@@ -0,0 +1,231 @@
+# File: benchmarks/bench_suite.py
+# Benchmark suite for the calculator, config lookups, report generation and chart rendering
+#
+# Every benchmark reports the median time per call over several repeats. Results can be
+# saved as a JSON baseline (benchmarks/baselines/<name>.json) and later runs compared with it.
+#
+# Usage:
+#   python benchmarks/bench_suite.py                               # print timings
+#   python benchmarks/bench_suite.py --save v1.2                   # store them as a baseline
+#   python benchmarks/bench_suite.py --compare v1.2 --tolerance 1.3
+#   python benchmarks/bench_suite.py --only calculate_profit --repeat 9
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(APP_DIR, "benchmarks", "baselines")
+sys.path.insert(0, APP_DIR)
+
+import numpy as np
+import streamlit as st
+from streamlit.logger import set_log_level
+
+# Streamlit warns about the missing script run context on every cached call outside `streamlit run`
+set_log_level("error")
+
+import lookups
+from calculator import calculate_profit
+from config import REGION_CONFIG
+from utils import get_default_parameters, get_ready_reckoner_rate, get_fsi_based_on_road_width
+from ui_components import create_download_report
+import charts
+
+TDR_PERCENTAGE = 20.0
+
+
+def region_inputs(region, tdr_type=None):
+    """calculate_profit inputs for `region` from its UI defaults, with TDR when `tdr_type` is given."""
+    params = get_default_parameters(region)
+    return dict(
+        region=region,
+        ready_reckoner_year=params['ready_reckoner_year'],
+        land_area=params['land_area'],
+        current_carpet_area_per_member=params['carpet_area'],
+        total_members=params['total_members'],
+        extra_carpet_percentage=params['extra_percentage'],
+        fsi=REGION_CONFIG[region]["fsi_rules"][params['project_type']],
+        fungible_fsi=params['fungible_fsi'],
+        construction_cost_per_sqft=params['construction_cost'],
+        market_rate_per_sqft=params['market_rate'],
+        avg_new_flat_size=params['avg_flat_size'],
+        rent_per_month=params['rent'],
+        rent_duration_months=params['rent_months'],
+        relocation_cost_per_member=params['relocation'],
+        bank_interest=params['bank_interest'],
+        project_type=params['project_type'],
+        is_self_redevelopment=params['is_self_redevelopment'],
+        profit_sharing_with_developer=100,
+        tdr_percentage=TDR_PERCENTAGE if tdr_type else 0.0,
+        tdr_type=tdr_type,
+        tdr_market_rate=params['tdr_market_rate'],
+        road_width=params['road_width'],
+        ancillary_fsi=params['ancillary_fsi'],
+    )
+
+
+def _calculate_profit_cases():
+    for region in REGION_CONFIG:
+        yield f"calculate_profit[{region}, no TDR]", region_inputs(region)
+        for tdr_type in REGION_CONFIG[region]["tdr_types_available"]:
+            yield f"calculate_profit[{region}, {tdr_type}]", region_inputs(region, tdr_type)
+
+
+def _chart_data(inputs):
+    results = calculate_profit(**inputs)
+    is_profitable = results['total_profit'] >= 0
+    return {
+        "cost_breakdown": charts.cost_breakdown_data(results),
+        "profit_analysis": charts.profit_analysis_data(results, is_profitable),
+        "fsi_composition": charts.fsi_composition_data(results, inputs['region'], REGION_CONFIG),
+    }
+
+
+def benchmarks():
+    """Name -> (group, zero-argument callable) of every benchmark."""
+    cases = {}
+    for name, inputs in _calculate_profit_cases():
+        cases[name] = ("calculate_profit", lambda inputs=inputs: calculate_profit(**inputs))
+
+    # Config lookups: the in-process memoized lookups against the same calls through st.cache_data
+    cached_fsi = st.cache_data(lookups.get_fsi_based_on_road_width)
+    road_widths = [6.0, 9.0, 12.0, 13.5, 18.0, 24.0, 30.0]
+    cases["road_width_fsi[lookup]"] = ("lookups", lambda: [
+        get_fsi_based_on_road_width("Mumbai", "residential", width) for width in road_widths])
+    cases["road_width_fsi[st.cache_data]"] = ("lookups", lambda: [
+        cached_fsi("Mumbai", "residential", width) for width in road_widths])
+    years = [2022, 2023, 2024]
+    cases["ready_reckoner_rate[lookup]"] = ("lookups", lambda: [
+        lookups.get_ready_reckoner_rate(region, year) for region in REGION_CONFIG for year in years])
+    cases["ready_reckoner_rate[st.cache_data]"] = ("lookups", lambda: [
+        get_ready_reckoner_rate(region, year) for region in REGION_CONFIG for year in years])
+
+    # Text report, profitable and loss-making
+    for label, inputs in (("profit", region_inputs("Mumbai")),
+                          ("loss", {**region_inputs("Pune"), "market_rate_per_sqft": 5000.0})):
+        results = calculate_profit(**inputs)
+        is_profitable = results['total_profit'] >= 0
+        cases[f"create_download_report[{label}]"] = ("report", lambda results=results, region=inputs['region'],
+                                                     is_profitable=is_profitable: create_download_report(
+                                                         results, region, is_profitable, REGION_CONFIG))
+
+    # Charts of display_visualization: matplotlib render, chart cache hit and Vega-Lite specs
+    data = _chart_data(region_inputs("Mumbai", "Road TDR"))
+    for name, chart in data.items():
+        cases[f"chart_render[{name}]"] = ("charts", lambda name=name, chart=chart: charts.render_png(name, chart))
+        cases[f"chart_cache_hit[{name}]"] = ("charts", lambda name=name, chart=chart:
+                                             charts.chart_cache.get_or_render(name, chart))
+    cases["chart_vega_specs"] = ("charts", lambda: (
+        charts.cost_breakdown_spec(data["cost_breakdown"]),
+        charts.profit_analysis_specs(data["profit_analysis"]),
+        charts.fsi_composition_spec(data["fsi_composition"]),
+    ))
+    return cases
+
+
+def measure(function, repeat=5, min_time=0.2):
+    """Median and minimum seconds per call of `function` over `repeat` timing runs."""
+    function()  # warm up (and fill any cache under test)
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    timings = [seconds / number for seconds in timer.repeat(repeat=repeat, number=number)]
+    return statistics.median(timings), min(timings)
+
+
+def run(repeat=5, only=None):
+    results = {}
+    for name, (group, function) in benchmarks().items():
+        if only and group not in only:
+            continue
+        median, minimum = measure(function, repeat)
+        results[name] = {"group": group, "median_us": median * 1e6, "min_us": minimum * 1e6}
+    return results
+
+
+def environment():
+    import matplotlib
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "streamlit": st.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+def baseline_path(name):
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def compare(results, baseline, tolerance):
+    """Rows of (name, baseline us, current us, ratio) and the names slower than `tolerance` x baseline."""
+    rows, regressions = [], []
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            rows.append((name, None, result["median_us"], None))
+            continue
+        ratio = result["median_us"] / previous["median_us"]
+        rows.append((name, previous["median_us"], result["median_us"], ratio))
+        if ratio > tolerance:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the calculator, lookups, report and charts.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per benchmark")
+    parser.add_argument("--only", nargs="+", choices=["calculate_profit", "lookups", "report", "charts"],
+                        help="Run only these groups")
+    parser.add_argument("--save", metavar="NAME", help="Save results as benchmarks/baselines/NAME.json (or a .json path)")
+    parser.add_argument("--compare", metavar="NAME", help="Compare with a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="With --compare, fail if a benchmark is slower than this multiple of its baseline")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat, args.only)
+    report = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "environment": environment(), "results": results}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+    regressions = []
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.tolerance)
+        if not args.json:
+            print(f"Compared with {args.compare} ({baseline['created']}, Python {baseline['environment']['python']})")
+            for name, previous, current, ratio in rows:
+                if previous is None:
+                    print(f"{name:<44} {'new':>12} {current:12.2f} us")
+                else:
+                    flag = "   REGRESSION" if name in regressions else ""
+                    print(f"{name:<44} {previous:12.2f} {current:12.2f} us   x{ratio:5.2f}{flag}")
+    elif not args.json:
+        for name, result in results.items():
+            print(f"{name:<44} median {result['median_us']:12.2f} us   min {result['min_us']:12.2f} us")
+
+    if args.save:
+        path = baseline_path(args.save)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {path}", file=sys.stderr)
+
+    if regressions:
+        print(f"FAILED: slower than x{args.tolerance:.2f} baseline: " + ", ".join(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
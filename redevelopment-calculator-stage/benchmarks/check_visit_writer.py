@@ -0,0 +1,175 @@
+# File: benchmarks/check_visit_writer.py
+# Check of the background visit writer against a local fake Firebase server
+#
+# Many parallel sessions record their visit through one shared VisitWriter, as the sessions
+# of one app process do. The check fails if recording a visit waits on the database, if a
+# visit or count is lost once the writer is closed, if a full queue blocks instead of
+# dropping, or if a write whose reply was lost is applied twice when it is retried. Visits
+# are batched, so the server sees far fewer requests than sessions.
+#
+# Usage:
+#   python benchmarks/check_visit_writer.py
+#   python benchmarks/check_visit_writer.py --sessions 2000 --workers 200 --latency 0.05
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from visit_writer import VisitWriter
+from visitor_rollups import VisitRollups, build_rollups
+from visitor_store import FirebaseStore, LocalStore, ShardedCounter, StoreError, serve_local_store
+
+
+class SlowLocalStore(LocalStore):
+    """LocalStore whose every request takes `latency` seconds, like a distant database."""
+
+    def __init__(self, data=None, latency=0.0):
+        super().__init__(data)
+        self.latency = latency
+
+    def get(self, path):
+        time.sleep(self.latency)
+        return super().get(path)
+
+    def patch(self, path, values):
+        time.sleep(self.latency)
+        return super().patch(path, values)
+
+    def get_with_etag(self, path):
+        time.sleep(self.latency)
+        return super().get_with_etag(path)
+
+    def put_if_match(self, path, value, etag):
+        time.sleep(self.latency)
+        return super().put_if_match(path, value, etag)
+
+
+class LostReplyStore(LocalStore):
+    """LocalStore that applies the PATCH requests numbered in `lose` and then fails them, like a read timeout."""
+
+    def __init__(self, lose):
+        super().__init__()
+        self.lose = set(lose)
+        self.patches = 0
+
+    def patch(self, path, values):
+        result = super().patch(path, values)
+        self.patches += 1
+        if self.patches in self.lose:
+            raise StoreError("read timed out")
+        return result
+
+
+def check_batched(sessions, workers, latency):
+    """Record `sessions` visits in parallel and close the writer; returns a list of failures."""
+    local = SlowLocalStore({"visitor_count": 1000}, latency)
+    server = serve_local_store(local)
+    try:
+        store = FirebaseStore(f"http://127.0.0.1:{server.server_port}")
+        writer = VisitWriter(store, ShardedCounter(store, "visitor_counter", legacy_path="visitor_count"))
+        latencies = []
+
+        def session(number):
+            start = time.perf_counter()
+            writer.record({"session_id": f"s{number}", "timestamp": time.time()})
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(session, range(sessions)))
+        recorded = time.perf_counter() - start
+        writer.close()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    stats = writer.stats()
+    final = ShardedCounter(local, "visitor_counter").value()
+    visits = len(local.get("visitors") or {})
+    slowest = max(latencies)
+    print(f"batched writer   {sessions} sessions recorded in {recorded:.2f}s (slowest record {slowest * 1000:.2f}ms), "
+          f"written by {elapsed:.2f}s in {stats['batches']} batches, {local.requests} store requests: "
+          f"counter 1000 -> {final}, {visits} visits")
+
+    failures = []
+    if slowest > max(latency, 0.05):
+        failures.append(f"recording a visit took {slowest * 1000:.1f}ms")
+    if final != 1000 + sessions:
+        failures.append(f"lost {1000 + sessions - final} increments")
+    if visits != sessions:
+        failures.append(f"lost {sessions - visits} visits")
+    if stats["dropped"] or stats["failed"] or stats["pending"]:
+        failures.append(f"writer ended with {stats}")
+    return failures
+
+
+def check_backpressure(max_pending=50, visits=500):
+    """Overfill a writer whose database hangs; recording must drop, not block."""
+    local = SlowLocalStore(latency=1.0)
+    writer = VisitWriter(local, ShardedCounter(local, "visitor_counter"), max_pending=max_pending, batch_size=10)
+    start = time.perf_counter()
+    accepted = sum(writer.record({"session_id": f"s{number}"}) for number in range(visits))
+    elapsed = time.perf_counter() - start
+    dropped = writer.stats()["dropped"]
+    writer.close(timeout=0)
+    print(f"full queue       {visits} visits into {max_pending} slots in {elapsed * 1000:.1f}ms: "
+          f"{accepted} queued, {dropped} dropped")
+
+    failures = []
+    if elapsed > 0.5:
+        failures.append(f"recording into a full queue took {elapsed:.2f}s")
+    if accepted + dropped != visits or accepted > max_pending + 11:
+        failures.append(f"expected about {max_pending} queued visits, got {accepted} ({dropped} dropped)")
+    return failures
+
+
+def check_lost_replies(visits=5):
+    """Lose the reply of the visit PATCH, the count PATCH and both; nothing may be applied twice."""
+    failures = []
+    # The writer logs every failed write; only the outcome matters here
+    logging.getLogger("visit_writer").setLevel(logging.ERROR)
+    for lose, what in (((1,), "visit write"), ((2,), "count"), ((1, 2), "visit write and count")):
+        local = LostReplyStore(lose)
+        writer = VisitWriter(local, ShardedCounter(local, "visitor_counter"), rollups=VisitRollups(), flush_interval=0.05)
+        for number in range(visits):
+            writer.record({"session_id": f"s{number}", "timestamp": f"2026-01-01T10:{number:02d}:00+00:00"})
+        writer.flush(timeout=5)
+        # A lost count reply is checked and settled on the next idle round
+        deadline = time.monotonic() + 5
+        while writer.stats()["pending"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+
+        stored = len(local.get("visitors") or {})
+        rescan = build_rollups(local.get("visitors"))
+        counts = (stored, local.get("visitor_rollups/total"), local.get("visitor_rollups/session_count"),
+                  ShardedCounter(local, "visitor_counter").value())
+        print(f"lost reply       {what}: {stored} visits, rollup total {counts[1]}, "
+              f"{counts[2]} sessions, counter {counts[3]}")
+        if counts != (visits, rescan["total"], rescan["session_count"], visits):
+            failures.append(f"lost {what} reply: visits, total, sessions, counter = {counts}, expected {visits} each")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the background visit writer never blocks or loses visits.")
+    parser.add_argument("--sessions", type=int, default=1000, help="Sessions to run")
+    parser.add_argument("--workers", type=int, default=100, help="Sessions running at the same time")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds each database request takes")
+    args = parser.parse_args(argv)
+
+    failures = check_batched(args.sessions, args.workers, args.latency) + check_backpressure() + check_lost_replies()
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+    print("OK: visits recorded without waiting, none lost")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# File: benchmarks/check_visitor_counter.py
+# Concurrency check of the visitor counter against a local fake Firebase server
+#
+# Fires many parallel sessions at an in-memory store served over the Firebase REST API.
+# Each session posts its visit and increments the visitor counter as a new app session does.
+# The check fails if any count or visit is lost. --naive also runs the old GET-then-PUT
+# increment of a single value to show the counts it loses.
+#
+# Usage:
+#   python benchmarks/check_visitor_counter.py
+#   python benchmarks/check_visitor_counter.py --sessions 500 --workers 200 --naive
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from http_client import HttpClient
+from visitor_store import FirebaseStore, LocalStore, ShardedCounter, serve_local_store
+
+
+def run_sessions(url, sessions, workers, naive=False):
+    """Run `sessions` parallel sessions; returns (CAS conflicts, slowest increment, seconds)."""
+    conflicts = []
+    latencies = []
+
+    def session(number):
+        # Each session gets its own client and counter, as if every session were a separate app process
+        store = FirebaseStore(url, client=HttpClient())
+        store.post("visitors", {"session_id": f"s{number}", "timestamp": time.time()})
+        start = time.perf_counter()
+        if naive:
+            store.put("visitor_count", (store.get("visitor_count") or 0) + 1)
+        else:
+            counter = ShardedCounter(store, "visitor_counter", legacy_path="visitor_count")
+            counter.increment()
+            conflicts.append(counter.conflicts)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(session, range(sessions)))
+    return sum(conflicts), max(latencies), time.perf_counter() - start
+
+
+def check(sessions, workers, naive=False):
+    """Run the sessions against a fresh server; returns a list of failures."""
+    # Start from an old-style counter, which the sharded one takes over
+    local = LocalStore({"visitor_count": 1000})
+    server = serve_local_store(local)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}"
+        conflicts, slowest, elapsed = run_sessions(url, sessions, workers, naive)
+        if naive:
+            final = local.get("visitor_count")
+        else:
+            final = ShardedCounter(local, "visitor_counter").value()
+    finally:
+        server.shutdown()
+
+    visits = len(local.get("visitors") or {})
+    label = "GET+PUT (naive)" if naive else "sharded CAS"
+    print(f"{label:<16} {sessions} sessions in {elapsed:.2f}s (slowest increment {slowest:.2f}s): "
+          f"counter 1000 -> {final}, {visits} visits, {conflicts} CAS conflicts")
+
+    failures = []
+    if final != 1000 + sessions:
+        failures.append(f"{label}: lost {1000 + sessions - final} increments")
+    if visits != sessions:
+        failures.append(f"{label}: lost {sessions - visits} visits")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that concurrent sessions lose no visitor counts.")
+    parser.add_argument("--sessions", type=int, default=300, help="Sessions to run")
+    parser.add_argument("--workers", type=int, default=100, help="Sessions running at the same time")
+    parser.add_argument("--naive", action="store_true", help="Also run the old GET-then-PUT increment (expected to lose counts)")
+    args = parser.parse_args(argv)
+
+    failures = check(args.sessions, args.workers)
+    if args.naive:
+        for failure in check(args.sessions, args.workers, naive=True):
+            print(f"  expected: {failure}")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+    print("OK: no counts or visits lost")
+
+
+if __name__ == "__main__":
+    main()
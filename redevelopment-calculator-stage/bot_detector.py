@@ -0,0 +1,152 @@
+# File: bot_detector.py
+# Contains the streaming bot detector: per session it keeps only the running mean and variance
+# (Welford) of the intervals between visits plus the last visit time, and flags the session at
+# the visit where the intervals become suspiciously regular
+#
+# A session's state is one compact row, [intervals, mean, m2, last, flagged_at], so the whole
+# table can be stored (see visitor_rollups) and loaded again.
+
+import math
+import threading
+from collections import OrderedDict
+
+# Coefficient of variation of the intervals below which a session looks automated
+SUSPICIOUS_CV = 0.1
+# Intervals needed before a session can be judged
+MIN_INTERVALS = 3
+# Sessions the detector keeps; the least recently seen are forgotten beyond this
+DEFAULT_MAX_SESSIONS = 10000
+
+
+class SessionTiming:
+    """Running interval statistics of one session, in constant memory."""
+
+    __slots__ = ("intervals", "mean", "m2", "last", "flagged_at")
+
+    def __init__(self, intervals=0, mean=0.0, m2=0.0, last=None, flagged_at=None):
+        self.intervals = intervals
+        self.mean = mean
+        self.m2 = m2
+        self.last = last
+        self.flagged_at = flagged_at
+
+    def add_interval(self, interval):
+        """Welford update with one more interval (seconds)."""
+        self.intervals += 1
+        delta = interval - self.mean
+        self.mean += delta / self.intervals
+        self.m2 += delta * (interval - self.mean)
+
+    def std_dev(self):
+        """Population standard deviation of the intervals, as is_suspicious_timing uses."""
+        return math.sqrt(max(self.m2, 0.0) / self.intervals) if self.intervals else 0.0
+
+    def cv(self):
+        """Coefficient of variation of the intervals (None until there is a positive mean)."""
+        if not self.intervals or self.mean <= 0:
+            return None
+        return self.std_dev() / self.mean
+
+    def is_suspicious(self, threshold=SUSPICIOUS_CV, min_intervals=MIN_INTERVALS):
+        if self.intervals < min_intervals:
+            return False
+        cv = self.cv()
+        return cv is not None and cv < threshold
+
+    def add_visit(self, timestamp, threshold=SUSPICIOUS_CV, min_intervals=MIN_INTERVALS):
+        """
+        Count a visit at `timestamp` (epoch seconds). Returns True if this
+        visit got the session flagged; the flag (and its time) then stays.
+        """
+        if self.last is not None:
+            self.add_interval(timestamp - self.last)
+        self.last = timestamp if self.last is None else max(self.last, timestamp)
+        if self.flagged_at is None and self.is_suspicious(threshold, min_intervals):
+            self.flagged_at = timestamp
+            return True
+        return False
+
+    def row(self):
+        return [self.intervals, self.mean, self.m2, self.last, self.flagged_at]
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+    def copy(self):
+        return SessionTiming(*self.row())
+
+
+class StreamingBotDetector:
+    """
+    Judges sessions visit by visit. observe() returns True at the visit
+    where a session's intervals first become suspiciously regular (and
+    calls `on_flag(session_id, timing)`), so bots are flagged as they
+    happen instead of by a rescan. Thread-safe; keeps at most
+    `max_sessions` sessions (least recently seen are dropped).
+    """
+
+    def __init__(self, threshold=SUSPICIOUS_CV, min_intervals=MIN_INTERVALS,
+                 max_sessions=DEFAULT_MAX_SESSIONS, on_flag=None):
+        self.threshold = threshold
+        self.min_intervals = min_intervals
+        self.max_sessions = max_sessions
+        self.on_flag = on_flag
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def timing(self, session_id):
+        """A copy of the session's state (None if unknown), to update and put() back."""
+        with self._lock:
+            timing = self._sessions.get(session_id)
+            return timing.copy() if timing is not None else None
+
+    def put(self, session_id, timing):
+        with self._lock:
+            self._sessions[session_id] = timing
+            self._sessions.move_to_end(session_id)
+            while self.max_sessions and len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def observe(self, session_id, timestamp):
+        """Count a visit of `session_id` at `timestamp` (epoch seconds); True if it got the session flagged."""
+        timing = self.timing(session_id) or SessionTiming()
+        flagged = timing.add_visit(timestamp, self.threshold, self.min_intervals)
+        self.put(session_id, timing)
+        if flagged and self.on_flag is not None:
+            self.on_flag(session_id, timing)
+        return flagged
+
+    def is_suspicious(self, session_id):
+        with self._lock:
+            timing = self._sessions.get(session_id)
+            return timing is not None and timing.is_suspicious(self.threshold, self.min_intervals)
+
+    def flagged(self):
+        """Session id -> time it was flagged, of every flagged session."""
+        with self._lock:
+            return {session_id: timing.flagged_at for session_id, timing in self._sessions.items()
+                    if timing.flagged_at is not None}
+
+    def state(self):
+        """The state table: session id -> [intervals, mean, m2, last, flagged_at]."""
+        with self._lock:
+            return {session_id: timing.row() for session_id, timing in self._sessions.items()}
+
+    def load(self, state):
+        """Add the rows of a stored state table (oldest last visit first, so LRU order holds)."""
+        rows = sorted((state or {}).items(), key=lambda item: item[1][3] or 0)
+        for session_id, row in rows:
+            self.put(session_id, SessionTiming.from_row(row))
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+def is_suspicious_intervals(time_diffs, threshold=SUSPICIOUS_CV, min_intervals=MIN_INTERVALS):
+    """One pass over `time_diffs`: is their coefficient of variation below `threshold`?"""
+    timing = SessionTiming()
+    for interval in time_diffs or ():
+        timing.add_interval(interval)
+    return timing.is_suspicious(threshold, min_intervals)
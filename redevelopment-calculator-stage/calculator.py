@@ -1,116 +1,144 @@
 # File: calculator.py
 # Contains the main calculation function
 
-from config import REGION_CONFIG, TDR_CONFIG
-from utils import get_ready_reckoner_rate, get_fsi_based_on_road_width
+import numpy as np
 
-def calculate_profit(
-        region,
-        ready_reckoner_year,
-        land_area,
-        current_carpet_area_per_member,
-        total_members,
-        extra_carpet_percentage,
-        fsi,
-        fungible_fsi,
-        construction_cost_per_sqft,
-        market_rate_per_sqft,
-        avg_new_flat_size,
-        rent_per_month,
-        rent_duration_months,
-        relocation_cost_per_member,
-        bank_interest,
-        project_type,
-        is_self_redevelopment,
-        profit_sharing_with_developer,
-        tdr_percentage=0.0,
-        tdr_type=None,
-        tdr_market_rate=None,
-        road_width=None,
-        ancillary_fsi=0.0
-    ):
-    """Calculate profit/loss from redevelopment project."""
-    
-    # Land area conversion
-    land_area_sqm = land_area * 101.17 if REGION_CONFIG[region]["uses_guntha"] else land_area
-    
-    # Get FSI based on road width for Mumbai
-    base_fsi = get_fsi_based_on_road_width(region, project_type, road_width) if region == "Mumbai" and road_width else fsi
-        
-    # Get ready reckoner rate
-    ready_reckoner_rate = get_ready_reckoner_rate(region, ready_reckoner_year)
-    
-    # Calculate areas
-    total_current_carpet_area = current_carpet_area_per_member * total_members
-    total_offered_carpet_area = total_current_carpet_area * (1 + extra_carpet_percentage/100)
-    land_area_sqft = land_area_sqm * 10.764
-    
-    # TDR Calculation
+from config import (
+    ROAD_WIDTH_FSI_RULES, READY_RECKONER_RATES, PROJECT_TYPES,
+    REGION_NAMES, REGION_RULES, REGION_RULES_BY_CODE, TDR_TYPE_RULES, STANDARD_TDR_RULES
+)
+from results import CalculationResult, BatchResult
+from lookups import (
+    get_ready_reckoner_rate, get_ready_reckoner_rate_batch,
+    get_fsi_based_on_road_width, get_fsi_based_on_road_width_batch, ROAD_WIDTH_FSI_INDEX
+)
+
+# ======================
+# Calculation stages
+# ======================
+# Each stage takes its inputs (calculate_profit arguments or earlier stage
+# outputs) by name and returns its outputs as a tuple. calculate_profit runs
+# them in order; dataflow.py reruns only those downstream of changed inputs.
+
+def area_stage(region, land_area):
+    """Land area in sqm (converting gunthas) and sqft."""
+    land_area_sqm = land_area * 101.17 if REGION_RULES[region].uses_guntha else land_area
+    return land_area_sqm, land_area_sqm * 10.764
+
+
+def ready_reckoner_stage(region, ready_reckoner_year, ready_reckoner_zone):
+    return (get_ready_reckoner_rate(region, ready_reckoner_year, ready_reckoner_zone),)
+
+
+def base_fsi_stage(region, project_type, fsi, road_width):
+    """Base FSI, from the road width for regions with road width rules (Mumbai); also the road width applied."""
+    uses_road_width = region in ROAD_WIDTH_FSI_RULES and road_width
+    base_fsi = get_fsi_based_on_road_width(region, project_type, road_width) if uses_road_width else fsi
+    return base_fsi, road_width if uses_road_width else None
+
+
+def tdr_stage(region, project_type, land_area_sqm, ready_reckoner_rate, tdr_percentage, tdr_type, tdr_market_rate):
+    """TDR cost and bonus area."""
     tdr_cost = 0
     tdr_bonus = 0
     if tdr_percentage > 0:
         if region == "Mumbai" and tdr_type:
             # Mumbai-specific TDR calculation with different types
-            tdr_settings = TDR_CONFIG.get(region, {}).get("types", {}).get(tdr_type, {})
-            if tdr_settings:
+            tdr_rules = TDR_TYPE_RULES[region].get(tdr_type)
+            if tdr_rules:
                 base_tdr_area = land_area_sqm * (tdr_percentage/100)
-                tdr_bonus = base_tdr_area * tdr_settings["fsi_multiplier"]
+                tdr_bonus = base_tdr_area * tdr_rules.fsi_multiplier
                 
                 if tdr_market_rate is not None:
-                    tdr_rate = tdr_market_rate * tdr_settings["cost_factor"]
+                    tdr_rate = tdr_market_rate * tdr_rules.cost_factor
                     tdr_cost = base_tdr_area * 10.764 * tdr_rate
                 else:
-                    tdr_cost = base_tdr_area * ready_reckoner_rate * tdr_settings["cost_factor"]
+                    tdr_cost = base_tdr_area * ready_reckoner_rate * tdr_rules.cost_factor
         else:
             # Standard TDR calculation for other regions
-            tdr_settings = TDR_CONFIG["default"]["types"]["Standard TDR"]
+            rules = REGION_RULES[region]
             base_tdr_area = land_area_sqm * (tdr_percentage/100)
             
             # Use region-specific TDR multiplier
-            tdr_multiplier = REGION_CONFIG[region]["fsi_rules"]["tdr_multiplier"]
-            tdr_bonus = base_tdr_area * tdr_settings["fsi_multiplier"] * tdr_multiplier
+            tdr_bonus = base_tdr_area * STANDARD_TDR_RULES.fsi_multiplier * rules.tdr_multiplier
             
             # Calculate TDR cost based on ready reckoner rate and cost factor
-            tdr_cost_factor = tdr_settings["cost_factor"]
-            tdr_rate = ready_reckoner_rate * REGION_CONFIG[region]["tdr_rates"][project_type]
-            tdr_cost = base_tdr_area * tdr_rate * tdr_cost_factor
+            tdr_rate = ready_reckoner_rate * rules.tdr_rate[project_type]
+            tdr_cost = base_tdr_area * tdr_rate * STANDARD_TDR_RULES.cost_factor
+    return tdr_cost, tdr_bonus
+
+
+def fsi_stage(region, base_fsi, land_area_sqm, tdr_percentage, tdr_bonus_area, fungible_fsi, ancillary_fsi):
+    """FSI composition: base FSI + TDR, plus fungible (Mumbai) or ancillary FSI."""
+    has_fungible = REGION_RULES[region].has_fungible
     
     # Calculate effective FSI (base FSI + TDR)
     if tdr_percentage > 0:
-        effective_fsi = base_fsi + (tdr_bonus / land_area_sqm if land_area_sqm > 0 else 0)
+        effective_fsi = base_fsi + (tdr_bonus_area / land_area_sqm if land_area_sqm > 0 else 0)
     else:
         effective_fsi = base_fsi
     
     # Calculate FSI components
-    fungible_area_factor = base_fsi * fungible_fsi if REGION_CONFIG[region]["has_fungible"] and fungible_fsi > 0 else 0
-    ancillary_area_factor = base_fsi * ancillary_fsi if not REGION_CONFIG[region]["has_fungible"] and ancillary_fsi > 0 else 0
+    fungible_area_factor = base_fsi * fungible_fsi if has_fungible and fungible_fsi > 0 else 0
+    ancillary_area_factor = base_fsi * ancillary_fsi if not has_fungible and ancillary_fsi > 0 else 0
     total_effective_fsi = effective_fsi + fungible_area_factor + ancillary_area_factor
-    
-    # Calculate buildable area
+    return effective_fsi, fungible_area_factor, ancillary_area_factor, total_effective_fsi
+
+
+def carpet_stage(current_carpet_area_per_member, total_members, extra_carpet_percentage):
+    """Members' current and offered carpet area."""
+    total_current_carpet_area = current_carpet_area_per_member * total_members
+    total_offered_carpet_area = total_current_carpet_area * (1 + extra_carpet_percentage/100)
+    return total_current_carpet_area, total_offered_carpet_area
+
+
+def buildable_area_stage(region, land_area_sqft, total_effective_fsi, is_self_redevelopment, total_offered_carpet_area):
+    """Buildable area with bonuses and the part left to sell."""
+    rules = REGION_RULES[region]
     total_buildable_area_sqft = land_area_sqft * total_effective_fsi
-    green_bonus = total_buildable_area_sqft * REGION_CONFIG[region]["bonuses"]["green_building"]
-    self_redev_bonus = total_buildable_area_sqft * REGION_CONFIG[region]["bonuses"]["self_redev"] if is_self_redevelopment else 0
+    green_bonus = total_buildable_area_sqft * rules.green_building_bonus
+    self_redev_bonus = total_buildable_area_sqft * rules.self_redev_bonus if is_self_redevelopment else 0
     total_final_area = total_buildable_area_sqft + green_bonus + self_redev_bonus
     builder_sellable_area = total_final_area - total_offered_carpet_area
-    
-    # Calculate costs
+    return total_buildable_area_sqft, green_bonus, self_redev_bonus, total_final_area, builder_sellable_area
+
+
+def building_cost_stage(region, land_area_sqm, ready_reckoner_rate, fungible_fsi, ancillary_fsi,
+                        total_final_area, construction_cost_per_sqft):
+    """Premium (fungible or ancillary FSI) and construction cost."""
+    rules = REGION_RULES[region]
     premium_cost = 0
-    if REGION_CONFIG[region]["has_fungible"]:
+    if rules.has_fungible:
         premium_cost = land_area_sqm * ready_reckoner_rate * fungible_fsi
     elif ancillary_fsi > 0:
-        premium_cost = land_area_sqm * ready_reckoner_rate * ancillary_fsi * REGION_CONFIG[region]["fsi_rules"]["ancillary_cost"]
+        premium_cost = land_area_sqm * ready_reckoner_rate * ancillary_fsi * rules.ancillary_cost
     
     construction_cost = total_final_area * construction_cost_per_sqft
+    return premium_cost, construction_cost
+
+
+def member_cost_stage(total_members, rent_per_month, rent_duration_months, relocation_cost_per_member):
+    """Rent and relocation paid for the members."""
     rent_cost = total_members * rent_per_month * rent_duration_months
     relocation_cost = total_members * relocation_cost_per_member
-    
-    # Taxes
-    gst_cost = construction_cost * REGION_CONFIG[region]["gst"]["builder"] if not is_self_redevelopment else 0
+    return rent_cost, relocation_cost
+
+
+def tax_stage(region, is_self_redevelopment, construction_cost, total_members, total_offered_carpet_area, market_rate_per_sqft):
+    """GST and stamp duty."""
+    rules = REGION_RULES[region]
+    gst_cost = construction_cost * (rules.gst_self if is_self_redevelopment else rules.gst_builder)
     if is_self_redevelopment:
-        stamp_duty_cost = REGION_CONFIG[region]["stamp_duty"]["self"] * total_members
+        stamp_duty_cost = rules.stamp_duty_self * total_members
     else:
-        stamp_duty_cost = total_offered_carpet_area * market_rate_per_sqft * REGION_CONFIG[region]["stamp_duty"]["builder"]
-    
+        stamp_duty_cost = total_offered_carpet_area * market_rate_per_sqft * rules.stamp_duty_builder
+    return gst_cost, stamp_duty_cost
+
+
+def profit_stage(premium_cost, tdr_cost, construction_cost, rent_cost, relocation_cost, bank_interest, gst_cost,
+                 stamp_duty_cost, builder_sellable_area, market_rate_per_sqft, is_self_redevelopment, total_members,
+                 avg_new_flat_size):
+    """Total cost, project value and how the profit is split."""
     total_cost = premium_cost + tdr_cost + construction_cost + rent_cost + relocation_cost + bank_interest + gst_cost + stamp_duty_cost
     
     # Profit calculation
@@ -127,47 +155,386 @@ def calculate_profit(
     # Calculate per-member profit
     per_member_profit = society_profit / total_members if total_members > 0 else 0
     num_salable_flats = builder_sellable_area / avg_new_flat_size if avg_new_flat_size > 0 else 0
+    return total_cost, project_value, total_profit, developer_profit, society_profit, per_member_profit, num_salable_flats
+
+
+def calculate_profit(
+        region,
+        ready_reckoner_year,
+        land_area,
+        current_carpet_area_per_member,
+        total_members,
+        extra_carpet_percentage,
+        fsi,
+        fungible_fsi,
+        construction_cost_per_sqft,
+        market_rate_per_sqft,
+        avg_new_flat_size,
+        rent_per_month,
+        rent_duration_months,
+        relocation_cost_per_member,
+        bank_interest,
+        project_type,
+        is_self_redevelopment,
+        profit_sharing_with_developer,
+        tdr_percentage=0.0,
+        tdr_type=None,
+        tdr_market_rate=None,
+        road_width=None,
+        ancillary_fsi=0.0,
+        ready_reckoner_zone=None
+    ):
+    """Calculate profit/loss from redevelopment project."""
+    
+    land_area_sqm, land_area_sqft = area_stage(region, land_area)
+    ready_reckoner_rate, = ready_reckoner_stage(region, ready_reckoner_year, ready_reckoner_zone)
+    base_fsi, applied_road_width = base_fsi_stage(region, project_type, fsi, road_width)
+    tdr_cost, tdr_bonus = tdr_stage(region, project_type, land_area_sqm, ready_reckoner_rate,
+                                    tdr_percentage, tdr_type, tdr_market_rate)
+    effective_fsi, fungible_area_factor, ancillary_area_factor, total_effective_fsi = fsi_stage(
+        region, base_fsi, land_area_sqm, tdr_percentage, tdr_bonus, fungible_fsi, ancillary_fsi)
+    total_current_carpet_area, total_offered_carpet_area = carpet_stage(
+        current_carpet_area_per_member, total_members, extra_carpet_percentage)
+    total_buildable_area_sqft, green_bonus, self_redev_bonus, total_final_area, builder_sellable_area = buildable_area_stage(
+        region, land_area_sqft, total_effective_fsi, is_self_redevelopment, total_offered_carpet_area)
+    premium_cost, construction_cost = building_cost_stage(
+        region, land_area_sqm, ready_reckoner_rate, fungible_fsi, ancillary_fsi, total_final_area, construction_cost_per_sqft)
+    rent_cost, relocation_cost = member_cost_stage(total_members, rent_per_month, rent_duration_months, relocation_cost_per_member)
+    gst_cost, stamp_duty_cost = tax_stage(
+        region, is_self_redevelopment, construction_cost, total_members, total_offered_carpet_area, market_rate_per_sqft)
+    total_cost, project_value, total_profit, developer_profit, society_profit, per_member_profit, num_salable_flats = profit_stage(
+        premium_cost, tdr_cost, construction_cost, rent_cost, relocation_cost, bank_interest, gst_cost, stamp_duty_cost,
+        builder_sellable_area, market_rate_per_sqft, is_self_redevelopment, total_members, avg_new_flat_size)
     
-    return {
-        "region": region,
-        "project_type": project_type,
-        "is_self_redevelopment": is_self_redevelopment,
-        "land_area": land_area,
-        "land_area_sqm": land_area_sqm,
-        "ready_reckoner_rate": ready_reckoner_rate,
-        "base_fsi": base_fsi,
-        "effective_fsi": effective_fsi,
-        "total_effective_fsi": total_effective_fsi,
-        "tdr_percentage": tdr_percentage,
-        "tdr_type": tdr_type,
-        "tdr_cost": tdr_cost,
-        "tdr_bonus_area": tdr_bonus,
-        "fungible_fsi": fungible_fsi,
-        "fungible_area_factor": fungible_area_factor,
-        "ancillary_fsi": ancillary_fsi,
-        "ancillary_area_factor": ancillary_area_factor,
-        "total_current_carpet_area": total_current_carpet_area,
-        "total_offered_carpet_area": total_offered_carpet_area,
-        "total_buildable_area_sqft": total_buildable_area_sqft,
-        "green_bonus": green_bonus,
-        "self_redev_bonus": self_redev_bonus,
-        "total_final_area": total_final_area,
-        "builder_sellable_area": builder_sellable_area,
-        "premium_cost": premium_cost,
-        "construction_cost_per_sqft": construction_cost_per_sqft,
-        "construction_cost": construction_cost,
-        "rent_cost": rent_cost,
-        "relocation_cost": relocation_cost,
-        "bank_interest": bank_interest,
-        "gst_cost": gst_cost,
-        "stamp_duty_cost": stamp_duty_cost,
-        "total_cost": total_cost,
-        "market_rate_per_sqft": market_rate_per_sqft,
-        "project_value": project_value,
-        "total_profit": total_profit,
-        "developer_profit": developer_profit,
-        "society_profit": society_profit,
-        "per_member_profit": per_member_profit,
-        "num_salable_flats": num_salable_flats,
-        "road_width": road_width if region == "Mumbai" and road_width else None
-    }
+    return CalculationResult(
+        region=region,
+        project_type=project_type,
+        is_self_redevelopment=is_self_redevelopment,
+        land_area=land_area,
+        land_area_sqm=land_area_sqm,
+        ready_reckoner_zone=ready_reckoner_zone,
+        ready_reckoner_rate=ready_reckoner_rate,
+        base_fsi=base_fsi,
+        effective_fsi=effective_fsi,
+        total_effective_fsi=total_effective_fsi,
+        tdr_percentage=tdr_percentage,
+        tdr_type=tdr_type,
+        tdr_cost=tdr_cost,
+        tdr_bonus_area=tdr_bonus,
+        fungible_fsi=fungible_fsi,
+        fungible_area_factor=fungible_area_factor,
+        ancillary_fsi=ancillary_fsi,
+        ancillary_area_factor=ancillary_area_factor,
+        total_current_carpet_area=total_current_carpet_area,
+        total_offered_carpet_area=total_offered_carpet_area,
+        total_buildable_area_sqft=total_buildable_area_sqft,
+        green_bonus=green_bonus,
+        self_redev_bonus=self_redev_bonus,
+        total_final_area=total_final_area,
+        builder_sellable_area=builder_sellable_area,
+        premium_cost=premium_cost,
+        construction_cost_per_sqft=construction_cost_per_sqft,
+        construction_cost=construction_cost,
+        rent_cost=rent_cost,
+        relocation_cost=relocation_cost,
+        bank_interest=bank_interest,
+        gst_cost=gst_cost,
+        stamp_duty_cost=stamp_duty_cost,
+        total_cost=total_cost,
+        market_rate_per_sqft=market_rate_per_sqft,
+        project_value=project_value,
+        total_profit=total_profit,
+        developer_profit=developer_profit,
+        society_profit=society_profit,
+        per_member_profit=per_member_profit,
+        num_salable_flats=num_salable_flats,
+        road_width=applied_road_width
+    )
+
+
+# ======================
+# Batch (vectorized) calculation
+# ======================
+
+# Region, project type and TDR type names in the order used for integer codes
+_REGIONS = list(REGION_NAMES)
+_REGION_NAME_ARRAY = np.asarray(REGION_NAMES, dtype=object)
+_PROJECT_TYPES = list(PROJECT_TYPES)
+_MUMBAI = REGION_RULES["Mumbai"].code
+_MUMBAI_TDR_RULES = list(TDR_TYPE_RULES["Mumbai"].values())
+_MUMBAI_TDR_TYPES = [rules.name for rules in _MUMBAI_TDR_RULES]
+_RR_YEARS = sorted({year for rates in READY_RECKONER_RATES.values() for year in rates})
+
+
+def _rule_column(field, dtype=float):
+    """Gather one RegionRules field into an array indexed by region code."""
+    return np.array([getattr(rules, field) for rules in REGION_RULES_BY_CODE], dtype=dtype)
+
+
+# Per-region rule columns, gathered by region code in calculate_profit_batch
+_USES_GUNTHA = _rule_column("uses_guntha", bool)
+_HAS_FUNGIBLE = _rule_column("has_fungible", bool)
+_TDR_MULTIPLIER = _rule_column("tdr_multiplier")
+_ANCILLARY_COST = _rule_column("ancillary_cost")
+_GREEN_BONUS = _rule_column("green_building_bonus")
+_SELF_REDEV_BONUS = _rule_column("self_redev_bonus")
+_STAMP_DUTY_BUILDER = _rule_column("stamp_duty_builder")
+_STAMP_DUTY_SELF = _rule_column("stamp_duty_self")
+_GST_BUILDER = _rule_column("gst_builder")
+_GST_SELF = _rule_column("gst_self")
+
+_HAS_ROAD_WIDTH_RULES = np.array([region in ROAD_WIDTH_FSI_RULES for region in _REGIONS])
+
+# Per-(region, project type) rule tables
+_REGION_FSI = np.array([[rules.base_fsi[pt] for pt in _PROJECT_TYPES] for rules in REGION_RULES_BY_CODE], dtype=float)
+_TDR_RATES = np.array([[rules.tdr_rate[pt] for pt in _PROJECT_TYPES] for rules in REGION_RULES_BY_CODE], dtype=float)
+
+# Ready reckoner rates by (region, year); missing years are 0 like get_ready_reckoner_rate
+_RR_TABLE = np.array(
+    [[READY_RECKONER_RATES.get(r, {}).get(year, 0) for year in _RR_YEARS] + [0] for r in _REGIONS],
+    dtype=float
+)
+
+# Mumbai TDR types (unknown types map to the trailing zero row)
+_MUMBAI_TDR_FSI_MULTIPLIER = np.array([rules.fsi_multiplier for rules in _MUMBAI_TDR_RULES] + [0], dtype=float)
+_MUMBAI_TDR_COST_FACTOR = np.array([rules.cost_factor for rules in _MUMBAI_TDR_RULES] + [0], dtype=float)
+
+
+def _encode(values, names):
+    """Map an array of names to integer codes; unknown names get len(names)."""
+    values = np.asarray(values, dtype=object)
+    codes = np.full(values.shape, len(names), dtype=np.intp)
+    for code, name in enumerate(names):
+        codes[values == name] = code
+    return codes
+
+
+def calculate_profit_batch(
+        region,
+        ready_reckoner_year,
+        land_area,
+        current_carpet_area_per_member,
+        total_members,
+        extra_carpet_percentage,
+        fsi,
+        fungible_fsi,
+        construction_cost_per_sqft,
+        market_rate_per_sqft,
+        avg_new_flat_size,
+        rent_per_month,
+        rent_duration_months,
+        relocation_cost_per_member,
+        bank_interest,
+        project_type,
+        is_self_redevelopment,
+        profit_sharing_with_developer,
+        tdr_percentage=0.0,
+        tdr_type=None,
+        tdr_market_rate=None,
+        road_width=None,
+        ancillary_fsi=0.0,
+        ready_reckoner_zone=None
+    ):
+    """
+    Vectorized calculate_profit over columnar inputs.
+
+    Every argument may be a scalar or an array; they are broadcast together.
+    None in tdr_market_rate and road_width (or NaN) means "not given", as
+    does None in tdr_type and ready_reckoner_zone.
+    Returns a BatchResult with the same fields as calculate_profit's
+    CalculationResult, each holding an array whose values match the scalar
+    function element by element.
+    """
+    # Encode categorical columns and broadcast everything to one shape
+    region_code = _encode(region, _REGIONS)
+    if (region_code == len(_REGIONS)).any():
+        raise KeyError(f"Unknown region in batch: {np.asarray(region, dtype=object)[region_code == len(_REGIONS)][0]}")
+    project_code = _encode(project_type, _PROJECT_TYPES)
+    if (project_code == len(_PROJECT_TYPES)).any():
+        raise KeyError(f"Unknown project type in batch: {np.asarray(project_type, dtype=object)[project_code == len(_PROJECT_TYPES)][0]}")
+    tdr_type_obj = np.asarray(tdr_type, dtype=object)
+    tdr_code = _encode(tdr_type_obj, _MUMBAI_TDR_TYPES)
+    has_tdr_type = (tdr_type_obj != None) & (tdr_type_obj != "")  # noqa: E711 - elementwise
+    year_code = _encode(ready_reckoner_year, _RR_YEARS)
+
+    columns = np.broadcast_arrays(
+        region_code, project_code, tdr_code, has_tdr_type, year_code,
+        np.asarray(ready_reckoner_year, dtype=object),
+        np.asarray(ready_reckoner_zone, dtype=object),
+        np.asarray(land_area, dtype=float),
+        np.asarray(current_carpet_area_per_member, dtype=float),
+        np.asarray(total_members, dtype=float),
+        np.asarray(extra_carpet_percentage, dtype=float),
+        np.asarray(fsi, dtype=float),
+        np.asarray(fungible_fsi, dtype=float),
+        np.asarray(construction_cost_per_sqft, dtype=float),
+        np.asarray(market_rate_per_sqft, dtype=float),
+        np.asarray(avg_new_flat_size, dtype=float),
+        np.asarray(rent_per_month, dtype=float),
+        np.asarray(rent_duration_months, dtype=float),
+        np.asarray(relocation_cost_per_member, dtype=float),
+        np.asarray(bank_interest, dtype=float),
+        np.asarray(is_self_redevelopment, dtype=bool),
+        np.asarray(tdr_percentage, dtype=float),
+        np.asarray(tdr_market_rate, dtype=float),
+        np.asarray(road_width, dtype=float),
+        np.asarray(ancillary_fsi, dtype=float),
+    )
+    (region_code, project_code, tdr_code, has_tdr_type, year_code, ready_reckoner_year, ready_reckoner_zone,
+     land_area, current_carpet_area_per_member, total_members, extra_carpet_percentage,
+     fsi, fungible_fsi, construction_cost_per_sqft, market_rate_per_sqft, avg_new_flat_size,
+     rent_per_month, rent_duration_months, relocation_cost_per_member, bank_interest,
+     is_self_redevelopment, tdr_percentage, tdr_market_rate, road_width, ancillary_fsi) = columns
+
+    is_mumbai = region_code == _MUMBAI
+    has_fungible = _HAS_FUNGIBLE[region_code]
+
+    # Land area conversion
+    land_area_sqm = np.where(_USES_GUNTHA[region_code], land_area * 101.17, land_area)
+
+    # Get FSI based on road width for regions with road width rules (falls back to the regional FSI outside all bands)
+    uses_road_width = _HAS_ROAD_WIDTH_RULES[region_code] & ~np.isnan(road_width) & (road_width != 0)
+    road_fsi = np.array(_REGION_FSI[region_code, project_code])
+    for band_region, band_project_type in ROAD_WIDTH_FSI_INDEX:
+        rows = (region_code == REGION_RULES[band_region].code) & (project_code == _PROJECT_TYPES.index(band_project_type))
+        if rows.any():
+            road_fsi[rows] = get_fsi_based_on_road_width_batch(band_region, band_project_type, road_width[rows])
+    base_fsi = np.where(uses_road_width, road_fsi, fsi)
+
+    # Get ready reckoner rate, preferring zone-level rates where a zone is given
+    ready_reckoner_rate = _RR_TABLE[region_code, year_code]
+    has_zone = (ready_reckoner_zone != None) & (ready_reckoner_zone != "")  # noqa: E711 - elementwise
+    if has_zone.any():
+        zone_rates = get_ready_reckoner_rate_batch(
+            _REGION_NAME_ARRAY[region_code][has_zone], ready_reckoner_year[has_zone], ready_reckoner_zone[has_zone]
+        )
+        ready_reckoner_rate = ready_reckoner_rate.copy()
+        ready_reckoner_rate[has_zone] = np.where(np.isnan(zone_rates), ready_reckoner_rate[has_zone], zone_rates)
+
+    # Calculate areas
+    total_current_carpet_area = current_carpet_area_per_member * total_members
+    total_offered_carpet_area = total_current_carpet_area * (1 + extra_carpet_percentage/100)
+    land_area_sqft = land_area_sqm * 10.764
+
+    # TDR Calculation - Mumbai typed TDR and standard TDR become masked branches
+    has_tdr = tdr_percentage > 0
+    mumbai_tdr = has_tdr & is_mumbai & has_tdr_type
+    known_mumbai_tdr = mumbai_tdr & (tdr_code < len(_MUMBAI_TDR_TYPES))
+    standard_tdr = has_tdr & ~mumbai_tdr
+    base_tdr_area = land_area_sqm * (tdr_percentage/100)
+
+    # Mumbai-specific TDR calculation with different types
+    cost_factor = _MUMBAI_TDR_COST_FACTOR[tdr_code]
+    mumbai_bonus = base_tdr_area * _MUMBAI_TDR_FSI_MULTIPLIER[tdr_code]
+    mumbai_cost = np.where(
+        np.isnan(tdr_market_rate),
+        base_tdr_area * ready_reckoner_rate * cost_factor,
+        base_tdr_area * 10.764 * (tdr_market_rate * cost_factor)
+    )
+
+    # Standard TDR calculation with region-specific multiplier
+    standard_bonus = base_tdr_area * STANDARD_TDR_RULES.fsi_multiplier * _TDR_MULTIPLIER[region_code]
+    standard_rate = ready_reckoner_rate * _TDR_RATES[region_code, project_code]
+    standard_cost = base_tdr_area * standard_rate * STANDARD_TDR_RULES.cost_factor
+
+    tdr_bonus = np.where(known_mumbai_tdr, mumbai_bonus, np.where(standard_tdr, standard_bonus, 0.0))
+    tdr_cost = np.where(known_mumbai_tdr, mumbai_cost, np.where(standard_tdr, standard_cost, 0.0))
+
+    # Calculate effective FSI (base FSI + TDR)
+    has_land = land_area_sqm > 0
+    tdr_fsi = np.divide(tdr_bonus, land_area_sqm, out=np.zeros_like(tdr_bonus), where=has_land)
+    effective_fsi = np.where(has_tdr, base_fsi + tdr_fsi, base_fsi)
+
+    # Calculate FSI components
+    fungible_area_factor = np.where(has_fungible & (fungible_fsi > 0), base_fsi * fungible_fsi, 0.0)
+    ancillary_area_factor = np.where(~has_fungible & (ancillary_fsi > 0), base_fsi * ancillary_fsi, 0.0)
+    total_effective_fsi = effective_fsi + fungible_area_factor + ancillary_area_factor
+
+    # Calculate buildable area
+    total_buildable_area_sqft = land_area_sqft * total_effective_fsi
+    green_bonus = total_buildable_area_sqft * _GREEN_BONUS[region_code]
+    self_redev_bonus = np.where(is_self_redevelopment, total_buildable_area_sqft * _SELF_REDEV_BONUS[region_code], 0.0)
+    total_final_area = total_buildable_area_sqft + green_bonus + self_redev_bonus
+    builder_sellable_area = total_final_area - total_offered_carpet_area
+
+    # Calculate costs
+    premium_cost = np.where(
+        has_fungible,
+        land_area_sqm * ready_reckoner_rate * fungible_fsi,
+        np.where(
+            ancillary_fsi > 0,
+            land_area_sqm * ready_reckoner_rate * ancillary_fsi * _ANCILLARY_COST[region_code],
+            0.0
+        )
+    )
+
+    construction_cost = total_final_area * construction_cost_per_sqft
+    rent_cost = total_members * rent_per_month * rent_duration_months
+    relocation_cost = total_members * relocation_cost_per_member
+
+    # Taxes
+    gst_cost = construction_cost * np.where(is_self_redevelopment, _GST_SELF[region_code], _GST_BUILDER[region_code])
+    stamp_duty_cost = np.where(
+        is_self_redevelopment,
+        _STAMP_DUTY_SELF[region_code] * total_members,
+        total_offered_carpet_area * market_rate_per_sqft * _STAMP_DUTY_BUILDER[region_code]
+    )
+
+    total_cost = premium_cost + tdr_cost + construction_cost + rent_cost + relocation_cost + bank_interest + gst_cost + stamp_duty_cost
+
+    # Profit calculation
+    project_value = builder_sellable_area * market_rate_per_sqft
+    total_profit = project_value - total_cost
+
+    developer_profit = np.where(is_self_redevelopment, 0.0, total_profit)
+    society_profit = np.where(is_self_redevelopment, total_profit, 0.0)
+
+    # Calculate per-member profit
+    per_member_profit = np.divide(society_profit, total_members, out=np.zeros_like(society_profit), where=total_members > 0)
+    num_salable_flats = np.divide(builder_sellable_area, avg_new_flat_size, out=np.zeros_like(builder_sellable_area), where=avg_new_flat_size > 0)
+
+    shape = region_code.shape
+    return BatchResult(
+        region=np.broadcast_to(np.asarray(region, dtype=object), shape),
+        project_type=np.broadcast_to(np.asarray(project_type, dtype=object), shape),
+        is_self_redevelopment=is_self_redevelopment,
+        land_area=land_area,
+        land_area_sqm=land_area_sqm,
+        ready_reckoner_zone=ready_reckoner_zone,
+        ready_reckoner_rate=ready_reckoner_rate,
+        base_fsi=base_fsi,
+        effective_fsi=effective_fsi,
+        total_effective_fsi=total_effective_fsi,
+        tdr_percentage=tdr_percentage,
+        tdr_type=np.broadcast_to(tdr_type_obj, shape),
+        tdr_cost=tdr_cost,
+        tdr_bonus_area=tdr_bonus,
+        fungible_fsi=fungible_fsi,
+        fungible_area_factor=fungible_area_factor,
+        ancillary_fsi=ancillary_fsi,
+        ancillary_area_factor=ancillary_area_factor,
+        total_current_carpet_area=total_current_carpet_area,
+        total_offered_carpet_area=total_offered_carpet_area,
+        total_buildable_area_sqft=total_buildable_area_sqft,
+        green_bonus=green_bonus,
+        self_redev_bonus=self_redev_bonus,
+        total_final_area=total_final_area,
+        builder_sellable_area=builder_sellable_area,
+        premium_cost=premium_cost,
+        construction_cost_per_sqft=construction_cost_per_sqft,
+        construction_cost=construction_cost,
+        rent_cost=rent_cost,
+        relocation_cost=relocation_cost,
+        bank_interest=bank_interest,
+        gst_cost=gst_cost,
+        stamp_duty_cost=stamp_duty_cost,
+        total_cost=total_cost,
+        market_rate_per_sqft=market_rate_per_sqft,
+        project_value=project_value,
+        total_profit=total_profit,
+        developer_profit=developer_profit,
+        society_profit=society_profit,
+        per_member_profit=per_member_profit,
+        num_salable_flats=num_salable_flats,
+        road_width=np.where(uses_road_width, road_width, np.nan)
+    )
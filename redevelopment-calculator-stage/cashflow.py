@@ -0,0 +1,163 @@
+# File: cashflow.py
+# Contains the monthly cash-flow model (loan drawdown, NPV and IRR) built on the batch calculator
+
+import numpy as np
+
+from calculator import calculate_profit_batch
+
+# Schedule parameters with their defaults; None means derived from the inputs:
+# construction_months defaults to rent_duration_months (members are out while the
+# building goes up) and sales_end_month to six months after completion
+DEFAULT_SCHEDULE = {
+    "construction_months": None,
+    "sales_start_month": 6,
+    "sales_end_month": None,
+    "loan_to_cost": 0.5,
+    "annual_loan_rate": 0.11,
+    "annual_discount_rate": 0.12,
+}
+
+# Safeguarded Newton iterations for the IRR
+_IRR_MAX_ITERATIONS = 50
+_IRR_TOLERANCE = 1e-10
+_IRR_BRACKET = (-0.5, 1.0)
+
+
+def _monthly_rate(annual_rate):
+    return (1 + annual_rate) ** (1 / 12) - 1
+
+
+def _spread(months, start, end):
+    """Weights (rows x months) spreading 1 evenly over months start..end inclusive."""
+    active = (months >= start[:, None]) & (months <= end[:, None])
+    return active / (end - start + 1)[:, None]
+
+
+def _npv(cash_flows, months, monthly_rate):
+    return np.sum(cash_flows * (1 + np.asarray(monthly_rate, dtype=float)[:, None]) ** -months, axis=1)
+
+
+def monthly_irr(cash_flows):
+    """
+    Monthly IRR of each row of `cash_flows` (rows x months, month 0 first).
+
+    All rows are solved together by Newton steps kept inside a bisection
+    bracket. Rows whose NPV does not change sign over the bracket (e.g.
+    flows that are never negative) have no IRR and get NaN.
+    """
+    cash_flows = np.atleast_2d(cash_flows)
+    months = np.arange(cash_flows.shape[1])
+    lo = np.full(len(cash_flows), _IRR_BRACKET[0])
+    hi = np.full(len(cash_flows), _IRR_BRACKET[1])
+    npv_lo = _npv(cash_flows, months, lo)
+    solvable = np.sign(npv_lo) * np.sign(_npv(cash_flows, months, hi)) < 0
+
+    rate = np.where(solvable, 0.01, np.nan)
+    # Only rows that have not converged yet are iterated
+    active = np.flatnonzero(solvable)
+    for _ in range(_IRR_MAX_ITERATIONS):
+        if not len(active):
+            break
+        flows, current = cash_flows[active], rate[active]
+        discount = (1 + current[:, None]) ** -months
+        npv = np.sum(flows * discount, axis=1)
+        slope = np.sum(-months * flows * discount, axis=1) / (1 + current)
+
+        # Shrink the bracket around the root, then step; fall back to bisection outside it
+        same_side = np.sign(npv) == np.sign(npv_lo[active])
+        lo[active] = np.where(same_side, current, lo[active])
+        hi[active] = np.where(same_side, hi[active], current)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = current - npv / slope
+        inside = (step >= lo[active]) & (step <= hi[active])
+        new_rate = np.where(inside, step, (lo[active] + hi[active]) / 2)
+
+        rate[active] = new_rate
+        active = active[np.abs(new_rate - current) > _IRR_TOLERANCE]
+    return rate
+
+
+def cash_flow_analysis(inputs, schedule=None):
+    """
+    Time-phased cash flows, NPV and IRR for one or many scenarios.
+
+    `inputs` holds the keyword arguments of calculate_profit (scalars or
+    arrays, broadcast together); `schedule` overrides DEFAULT_SCHEDULE and
+    its values may be arrays too. Month 0 carries the premium, TDR,
+    relocation and stamp duty; construction cost and GST are spread evenly
+    over the construction months, rent over the rent duration, and sales
+    evenly from sales_start_month to sales_end_month.
+
+    A loan funds loan_to_cost of every cost up to completion; sales proceeds
+    repay it as they come in and any balance left is repaid at completion.
+    Interest is paid monthly on the outstanding balance and replaces the
+    fixed bank_interest input. NPV and IRR are of the equity cash flows
+    (after loan draws, interest and repayment).
+
+    Every scenario is evaluated at once: each schedule is a row of a
+    (scenarios x months) matrix. Returns 1-D arrays per scenario plus the
+    monthly matrices used for charts.
+    """
+    schedule = {**DEFAULT_SCHEDULE, **(schedule or {})}
+    results = calculate_profit_batch(**inputs)
+    shape = np.shape(results["total_profit"])
+
+    def column(value):
+        return np.broadcast_to(np.asarray(value, dtype=float), shape).ravel()
+
+    rent_months = np.maximum(np.round(column(inputs["rent_duration_months"])), 0).astype(int)
+    if schedule["construction_months"] is None:
+        construction_months = np.maximum(rent_months, 1)
+    else:
+        construction_months = np.maximum(np.round(column(schedule["construction_months"])), 1).astype(int)
+    sales_start = np.maximum(np.round(column(schedule["sales_start_month"])), 0).astype(int)
+    if schedule["sales_end_month"] is None:
+        sales_end = construction_months + 6
+    else:
+        sales_end = np.round(column(schedule["sales_end_month"])).astype(int)
+    sales_end = np.maximum(sales_end, sales_start)
+
+    horizon = int(max(construction_months.max(), sales_end.max(), rent_months.max()))
+    months = np.arange(horizon + 1)
+
+    # Cost and revenue schedules (scenarios x months)
+    upfront = column(results["premium_cost"]) + column(results["tdr_cost"]) \
+        + column(results["relocation_cost"]) + column(results["stamp_duty_cost"])
+    building = column(results["construction_cost"]) + column(results["gst_cost"])
+    costs = building[:, None] * _spread(months, np.ones_like(construction_months), construction_months)
+    costs[:, 0] += upfront
+    has_rent = rent_months > 0
+    monthly_rent = column(inputs["total_members"]) * column(inputs["rent_per_month"])
+    costs += np.where(has_rent, monthly_rent, 0.0)[:, None] * ((months >= 1) & (months <= rent_months[:, None]))
+    sales = column(results["project_value"])[:, None] * _spread(months, sales_start, sales_end)
+
+    # Loan drawdown up to completion, swept by sales as they come in and cleared at completion.
+    # The swept balance B[t] = max(B[t-1] + draws[t] - sales[t], 0) has the closed form
+    # S[t] - min(0, min(S[:t+1])) with S the running sum of draws - sales.
+    before_completion = months < construction_months[:, None]
+    draws = column(schedule["loan_to_cost"])[:, None] * costs * (months <= construction_months[:, None])
+    net = np.cumsum(draws - sales, axis=1)
+    balance = (net - np.minimum(np.minimum.accumulate(net, axis=1), 0.0)) * before_completion
+    previous_balance = np.zeros_like(balance)
+    previous_balance[:, 1:] = balance[:, :-1]
+    interest = _monthly_rate(column(schedule["annual_loan_rate"]))[:, None] * previous_balance
+    repayment = previous_balance + draws - balance
+
+    project_flows = sales - costs
+    cash_flows = project_flows + draws - interest - repayment
+    cumulative = np.cumsum(cash_flows, axis=1)
+    discount_rate = _monthly_rate(column(schedule["annual_discount_rate"]))
+
+    return {
+        "months": months,
+        "sales": sales,
+        "costs": costs,
+        "interest": interest,
+        "cash_flows": cash_flows,
+        "total_interest": interest.sum(axis=1),
+        "total_profit": cash_flows.sum(axis=1),
+        "peak_funding": np.maximum(-cumulative.min(axis=1), 0.0),
+        "npv": _npv(cash_flows, months, discount_rate),
+        "project_npv": _npv(project_flows, months, discount_rate),
+        "irr": (1 + monthly_irr(cash_flows)) ** 12 - 1,
+    }
@@ -0,0 +1,263 @@
+# File: charts.py
+# Contains the project visualization charts: the data each chart shows, matplotlib renderers
+# whose PNG output is cached by that data, and Vega-Lite specs that skip matplotlib entirely
+
+import io
+import threading
+from collections import OrderedDict
+
+from plotting import pyplot
+
+# Rendered charts kept in memory (shared by every session of the app process)
+DEFAULT_CHART_CACHE_SIZE = 128
+
+# Same output as st.pyplot's defaults
+SAVEFIG_OPTIONS = {"format": "png", "dpi": 200, "bbox_inches": "tight"}
+
+PROFIT_COLORS = ('#e74c3c', '#3498db')
+AREA_COLORS = ('#3498db', '#2ecc71')
+
+
+# Chart data: only the slice of the results each chart shows, as hashable tuples of plain values
+
+def cost_breakdown_data(results):
+    """(labels, values) of the project's non-zero costs."""
+    costs = (
+        ('Premium Cost', results['premium_cost']),
+        ('TDR Cost', results['tdr_cost']),
+        ('Construction Cost', results['construction_cost']),
+        ('GST', results['gst_cost']),
+        ('Stamp Duty', results['stamp_duty_cost']),
+        ('Rent Cost', results['rent_cost']),
+        ('Relocation Cost', results['relocation_cost']),
+        ('Bank Interest', results['bank_interest']),
+    )
+    # Zero values are left out for better visualization
+    costs = [(label, float(value)) for label, value in costs if value > 0]
+    return tuple(label for label, _ in costs), tuple(value for _, value in costs)
+
+
+def profit_analysis_data(results, is_profitable):
+    """
+    Area allocation plus the profit (or loss) split:
+    (area_labels, area_values, kind, labels, values, ylabel, title), kind is 'pie' or 'bar'.
+    """
+    area_labels = ('Society Area', 'Sellable Area')
+    area_values = (float(results['total_offered_carpet_area']), float(results['builder_sellable_area']))
+
+    if results['is_self_redevelopment']:
+        labels = ('Total Cost', 'Project Value')
+        values = (float(results['total_cost']), float(results['project_value']))
+        title = 'Cost vs. Project Value' if is_profitable else 'Cost vs. Project Value (Loss Scenario)'
+        return area_labels, area_values, 'bar', labels, values, 'Amount (₹)', title
+
+    if is_profitable:
+        labels = ('Developer Profit', 'Society Profit')
+        values = (max(0.0, float(results['developer_profit'])), max(0.0, float(results['society_profit'])))
+        kind = 'pie' if all(value > 0 for value in values) else 'bar'
+        return area_labels, area_values, kind, labels, values, 'Profit Amount (₹)', 'Profit Distribution'
+
+    labels = ('Developer Loss', 'Society Loss')
+    values = (abs(float(results['developer_profit'])), abs(float(results['society_profit'])))
+    return area_labels, area_values, 'bar', labels, values, 'Loss Amount (₹)', 'Loss Distribution'
+
+
+def fsi_composition_data(results, region, REGION_CONFIG):
+    """(labels, values, colors, total_effective_fsi) of the FSI components."""
+    labels = ['Base FSI']
+    values = [float(results['base_fsi'])]
+    colors = ['#3498db']  # Blue
+
+    # Add TDR if present
+    tdr_value = results['effective_fsi'] - results['base_fsi']
+    if tdr_value > 0:
+        labels.append('TDR Bonus')
+        values.append(float(tdr_value))
+        colors.append('#2ecc71')  # Green
+
+    # Add Fungible/Ancillary if present
+    if REGION_CONFIG[region]["has_fungible"] and results['fungible_area_factor'] > 0:
+        labels.append('Fungible FSI')
+        values.append(float(results['fungible_area_factor']))
+        colors.append('#e74c3c')  # Red
+    elif not REGION_CONFIG[region]["has_fungible"] and results['ancillary_area_factor'] > 0:
+        labels.append('Ancillary FSI')
+        values.append(float(results['ancillary_area_factor']))
+        colors.append('#f39c12')  # Orange
+
+    return tuple(labels), tuple(values), tuple(colors), float(results['total_effective_fsi'])
+
+
+# matplotlib renderers
+
+def _draw_cost_breakdown(data):
+    labels, values = data
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
+    ax.set_title('Project Cost Breakdown')
+    return fig
+
+
+def _draw_profit_analysis(data):
+    area_labels, area_values, kind, labels, values, ylabel, title = data
+    plt = pyplot()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+
+    ax1.bar(area_labels, area_values, color=AREA_COLORS)
+    ax1.set_ylabel('Square Feet')
+    ax1.set_title('Area Allocation')
+
+    if kind == 'pie':
+        ax2.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=PROFIT_COLORS)
+        ax2.axis('equal')
+    else:
+        ax2.bar(labels, values, color=PROFIT_COLORS)
+        ax2.set_ylabel(ylabel)
+    ax2.set_title(title)
+
+    fig.tight_layout()
+    return fig
+
+
+def _draw_fsi_composition(data):
+    labels, values, colors, total = data
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.bar(labels, values, color=colors)
+    ax.set_ylabel('FSI Value')
+    ax.set_title('FSI Composition')
+
+    # Add a line for total effective FSI
+    ax.axhline(y=total, color='r', linestyle='-', label=f'Total Effective FSI: {total:.2f}')
+    ax.legend()
+
+    fig.tight_layout()
+    return fig
+
+
+CHART_RENDERERS = {
+    "cost_breakdown": _draw_cost_breakdown,
+    "profit_analysis": _draw_profit_analysis,
+    "fsi_composition": _draw_fsi_composition,
+}
+
+
+def render_png(name, data):
+    """PNG bytes of chart `name` drawn from `data`; the figure is closed before returning."""
+    fig = CHART_RENDERERS[name](data)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, **SAVEFIG_OPTIONS)
+        return buffer.getvalue()
+    finally:
+        pyplot().close(fig)
+
+
+class ChartCache:
+    """Bounded LRU cache of rendered chart PNGs, keyed by chart name and the data it shows."""
+
+    def __init__(self, maxsize=DEFAULT_CHART_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, name, data):
+        key = (name, data)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+
+        image = render_png(name, data)
+        with self._lock:
+            self.misses += 1
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+        return image
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._images),
+                "maxsize": self.maxsize,
+                "bytes": sum(len(image) for image in self._images.values()),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.hits = self.misses = 0
+
+
+chart_cache = ChartCache()
+
+
+# Vega-Lite specs (for st.vega_lite_chart): drawn in the browser, no matplotlib involved
+
+def _pie_spec(labels, values, title, colors=None):
+    color = {"field": "label", "type": "nominal", "sort": list(labels), "title": None}
+    if colors:
+        color["scale"] = {"domain": list(labels), "range": list(colors)}
+    return {
+        "title": title,
+        "data": {"values": [{"label": label, "value": value} for label, value in zip(labels, values)]},
+        "mark": {"type": "arc", "tooltip": True},
+        "encoding": {
+            "theta": {"field": "value", "type": "quantitative", "stack": True},
+            "color": color,
+            "order": {"field": "value", "type": "quantitative", "sort": "descending"},
+        },
+    }
+
+
+def _bar_spec(labels, values, colors, title, ylabel):
+    return {
+        "title": title,
+        "data": {"values": [{"label": label, "value": value} for label, value in zip(labels, values)]},
+        "mark": {"type": "bar", "tooltip": True},
+        "encoding": {
+            "x": {"field": "label", "type": "nominal", "sort": list(labels), "title": None, "axis": {"labelAngle": 0}},
+            "y": {"field": "value", "type": "quantitative", "title": ylabel},
+            "color": {"field": "label", "type": "nominal", "legend": None,
+                      "scale": {"domain": list(labels), "range": list(colors)}},
+        },
+    }
+
+
+def cost_breakdown_spec(data):
+    labels, values = data
+    return _pie_spec(labels, values, 'Project Cost Breakdown')
+
+
+def profit_analysis_specs(data):
+    """Two specs: the area allocation and the profit (or loss) split."""
+    area_labels, area_values, kind, labels, values, ylabel, title = data
+    area = _bar_spec(area_labels, area_values, AREA_COLORS, 'Area Allocation', 'Square Feet')
+    if kind == 'pie':
+        return area, _pie_spec(labels, values, title, PROFIT_COLORS)
+    return area, _bar_spec(labels, values, PROFIT_COLORS, title, ylabel)
+
+
+def fsi_composition_spec(data):
+    labels, values, colors, total = data
+    bars = _bar_spec(labels, values, colors, None, 'FSI Value')
+    del bars["title"], bars["data"]
+    rule = {
+        "mark": {"type": "rule", "color": "red", "strokeWidth": 2},
+        "encoding": {"y": {"datum": total}},
+    }
+    return {
+        "title": f"FSI Composition (Total Effective FSI: {total:.2f})",
+        "data": {"values": [{"label": label, "value": value} for label, value in zip(labels, values)]},
+        "layer": [bars, rule],
+    }
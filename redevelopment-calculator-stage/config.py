@@ -1,6 +1,9 @@
 # File: config.py
 # Contains all configuration data for the application
 
+from dataclasses import dataclass
+from types import MappingProxyType
+
 # ======================
 # Road Width Based FSI Rules for Mumbai
 # ======================
@@ -303,4 +306,82 @@ READY_RECKONER_RATES = {
     "Pune": {2022: 80000, 2023: 85000, 2024: 90000},
     "Nagpur": {2022: 60000, 2023: 65000, 2024: 70000},
     "Nashik": {2022: 70000, 2023: 75000, 2024: 80000}
-}
\ No newline at end of file
+}
+
+
+# ======================
+# Precompiled rule objects
+# ======================
+# Immutable, slotted views of REGION_CONFIG and TDR_CONFIG built once at import,
+# so the calculator reads plain attributes instead of nested dictionary keys.
+# Region codes follow the order of REGION_CONFIG and index the batch rule tables.
+
+@dataclass(frozen=True, slots=True)
+class RegionRules:
+    code: int
+    name: str
+    uses_guntha: bool
+    has_fungible: bool
+    base_fsi: MappingProxyType          # project type -> base FSI
+    tdr_multiplier: float
+    ancillary_cost: float
+    tdr_rate: MappingProxyType          # project type -> TDR rate as a fraction of ready reckoner
+    green_building_bonus: float
+    self_redev_bonus: float
+    stamp_duty_builder: float
+    stamp_duty_self: float
+    gst_builder: float
+    gst_self: float
+    default_construction_cost: float
+    default_fungible_fsi: float
+
+
+@dataclass(frozen=True, slots=True)
+class TdrRules:
+    code: int
+    name: str
+    fsi_multiplier: float
+    cost_factor: float
+
+
+PROJECT_TYPES = ("residential", "commercial")
+
+
+def _compile_region_rules(code, name, config):
+    return RegionRules(
+        code=code,
+        name=name,
+        uses_guntha=config["uses_guntha"],
+        has_fungible=config["has_fungible"],
+        base_fsi=MappingProxyType({pt: config["fsi_rules"][pt] for pt in PROJECT_TYPES}),
+        tdr_multiplier=config["fsi_rules"]["tdr_multiplier"],
+        ancillary_cost=config["fsi_rules"]["ancillary_cost"],
+        tdr_rate=MappingProxyType({pt: config["tdr_rates"][pt] for pt in PROJECT_TYPES}),
+        green_building_bonus=config["bonuses"]["green_building"],
+        self_redev_bonus=config["bonuses"]["self_redev"],
+        stamp_duty_builder=config["stamp_duty"]["builder"],
+        stamp_duty_self=config["stamp_duty"]["self"],
+        gst_builder=config["gst"]["builder"],
+        gst_self=config["gst"]["self"],
+        default_construction_cost=config["premium_rates"]["construction"],
+        default_fungible_fsi=config["premium_rates"]["fungible_fsi"],
+    )
+
+
+REGION_NAMES = tuple(REGION_CONFIG)
+REGION_RULES_BY_CODE = tuple(_compile_region_rules(code, name, REGION_CONFIG[name]) for code, name in enumerate(REGION_NAMES))
+REGION_RULES = MappingProxyType({rules.name: rules for rules in REGION_RULES_BY_CODE})
+
+# Typed TDR rules per region (only Mumbai distinguishes TDR types) and the standard TDR used elsewhere
+TDR_TYPE_RULES = MappingProxyType({
+    region: MappingProxyType({
+        name: TdrRules(code, name, settings["fsi_multiplier"], settings["cost_factor"])
+        for code, (name, settings) in enumerate(TDR_CONFIG[region]["types"].items())
+    })
+    for region in TDR_CONFIG if region != "default"
+})
+STANDARD_TDR_RULES = TdrRules(
+    0, "Standard TDR",
+    TDR_CONFIG["default"]["types"]["Standard TDR"]["fsi_multiplier"],
+    TDR_CONFIG["default"]["types"]["Standard TDR"]["cost_factor"],
+)
@@ -0,0 +1,117 @@
+# File: dataflow.py
+# Contains the incremental calculator: calculate_profit's stages as a dependency graph,
+# rerunning only the stages downstream of inputs that changed
+
+import inspect
+from dataclasses import dataclass
+
+from calculator import (
+    calculate_profit, area_stage, ready_reckoner_stage, base_fsi_stage, tdr_stage, fsi_stage, carpet_stage,
+    buildable_area_stage, building_cost_stage, member_cost_stage, tax_stage, profit_stage
+)
+from results import RESULT_FIELDS, CalculationResult
+
+
+@dataclass(frozen=True, slots=True)
+class Stage:
+    name: str
+    function: object
+    inputs: tuple
+    outputs: tuple
+
+
+def _stage(name, function, outputs):
+    """A stage whose inputs are the names of its function's parameters."""
+    return Stage(name, function, tuple(inspect.signature(function).parameters), outputs)
+
+
+# In dependency order: every stage only reads calculate_profit inputs and outputs of stages above it
+STAGES = (
+    _stage("area", area_stage, ("land_area_sqm", "land_area_sqft")),
+    _stage("ready_reckoner", ready_reckoner_stage, ("ready_reckoner_rate",)),
+    _stage("base_fsi", base_fsi_stage, ("base_fsi", "applied_road_width")),
+    _stage("tdr", tdr_stage, ("tdr_cost", "tdr_bonus_area")),
+    _stage("fsi", fsi_stage, ("effective_fsi", "fungible_area_factor", "ancillary_area_factor", "total_effective_fsi")),
+    _stage("carpet", carpet_stage, ("total_current_carpet_area", "total_offered_carpet_area")),
+    _stage("buildable_area", buildable_area_stage, (
+        "total_buildable_area_sqft", "green_bonus", "self_redev_bonus", "total_final_area", "builder_sellable_area")),
+    _stage("building_cost", building_cost_stage, ("premium_cost", "construction_cost")),
+    _stage("member_cost", member_cost_stage, ("rent_cost", "relocation_cost")),
+    _stage("tax", tax_stage, ("gst_cost", "stamp_duty_cost")),
+    _stage("profit", profit_stage, (
+        "total_cost", "project_value", "total_profit", "developer_profit", "society_profit",
+        "per_member_profit", "num_salable_flats")),
+)
+
+# calculate_profit's parameters with their defaults (required ones have none)
+_PARAMETERS = inspect.signature(calculate_profit).parameters
+_DEFAULTS = {
+    name: parameter.default for name, parameter in _PARAMETERS.items()
+    if parameter.default is not inspect.Parameter.empty
+}
+
+# Where each result field comes from; the applied road width is reported as road_width
+_RESULT_SOURCES = tuple("applied_road_width" if name == "road_width" else name for name in RESULT_FIELDS)
+
+
+def _check_graph():
+    known = set(_PARAMETERS)
+    for stage in STAGES:
+        missing = set(stage.inputs) - known
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' reads {', '.join(sorted(missing))} before any stage produces it")
+        known.update(stage.outputs)
+    missing = set(_RESULT_SOURCES) - known
+    if missing:
+        raise ValueError(f"No stage produces result fields: {', '.join(sorted(missing))}")
+
+
+_check_graph()
+
+
+class IncrementalCalculator:
+    """
+    calculate_profit that remembers its last inputs and every stage's outputs.
+
+    update() compares the new inputs with the previous ones and reruns only
+    the stages that read a changed value. A rerun stage whose outputs come
+    out unchanged stops the change from propagating further. Results are
+    identical to calculate_profit's.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.result = None
+        self.last_rerun = ()
+
+    def update(self, **inputs):
+        """Recalculate for `inputs` (calculate_profit's keyword arguments) and return the CalculationResult."""
+        unknown = inputs.keys() - _PARAMETERS.keys()
+        if unknown:
+            raise TypeError(f"calculate_profit() got unexpected arguments: {', '.join(sorted(unknown))}")
+        inputs = {**_DEFAULTS, **inputs}
+        missing = _PARAMETERS.keys() - inputs.keys()
+        if missing:
+            raise TypeError(f"calculate_profit() missing required arguments: {', '.join(sorted(missing))}")
+
+        changed = {name for name, value in inputs.items() if name not in self.values or self.values[name] != value}
+        if not changed and self.result is not None:
+            self.last_rerun = ()
+            return self.result
+        # Work on a copy, kept only once every stage ran: a stage that raises leaves the previous state intact
+        values = {**self.values, **inputs}
+
+        rerun = []
+        for stage in STAGES:
+            if changed.isdisjoint(stage.inputs):
+                continue
+            outputs = stage.function(*[values[name] for name in stage.inputs])
+            for name, value in zip(stage.outputs, outputs):
+                if name not in values or values[name] != value:
+                    changed.add(name)
+                values[name] = value
+            rerun.append(stage.name)
+
+        result = CalculationResult._make([values[name] for name in _RESULT_SOURCES])
+        self.values, self.result, self.last_rerun = values, result, tuple(rerun)
+        return result
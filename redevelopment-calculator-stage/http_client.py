@@ -0,0 +1,253 @@
+# File: http_client.py
+# Contains the shared client for the app's outbound HTTP calls (Firebase, IP geolocation):
+# one pooled keep-alive session with timeouts, jittered retries, a circuit breaker per host
+# and latency metrics per endpoint
+
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) seconds; no call may hang a script thread longer than this per attempt
+DEFAULT_TIMEOUT = (3.05, 10.0)
+
+# Keep-alive connections kept per host (concurrent sessions share them)
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+# Attempts of a retryable call and the backoff between them: random in [0, base * 2**attempt), capped
+MAX_ATTEMPTS = 3
+BACKOFF_SECONDS = 0.2
+MAX_BACKOFF_SECONDS = 2.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Repeating these cannot apply a change twice
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "PATCH", "DELETE")
+
+# A host's circuit opens after this many failed calls in a row, and lets one trial call
+# through once it has been open this long
+BREAKER_FAILURES = 5
+BREAKER_COOLDOWN_SECONDS = 30.0
+
+# Latencies kept per endpoint for the percentiles
+LATENCY_SAMPLES = 512
+
+
+class HttpError(Exception):
+    """An outbound call failed (after its retries)."""
+
+
+class CircuitOpenError(HttpError):
+    """The host failed repeatedly; calls are refused until its cooldown ends."""
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failures` failed calls in a row it
+    opens and refuses calls for `cooldown` seconds; then a single trial call
+    is let through (half-open), whose success closes it again.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failed = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._trial or time.monotonic() - self._opened_at >= self.cooldown:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._trial and time.monotonic() - self._opened_at >= self.cooldown:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failed = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failed += 1
+            if self._trial or self._failed >= self.failures:
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+class EndpointMetrics:
+    """Call counts and latencies of one endpoint."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def summary(self):
+        samples = sorted(self.samples)
+
+        def percentile(fraction):
+            return samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000 if samples else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "mean_ms": self.total_seconds / self.calls * 1000 if self.calls else None,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": self.max_seconds * 1000,
+        }
+
+
+class HttpClient:
+    """
+    Thread-safe client over one requests.Session. Every call has a timeout;
+    connection errors, timeouts and RETRY_STATUSES are retried with jittered
+    backoff when repeating the call is safe (idempotent methods, or any
+    method when the connection was never made). Calls to a host whose
+    circuit is open fail at once with CircuitOpenError, so callers can fall
+    back to cached values instead of waiting on a dead backend.
+
+    `endpoint` names the call in the metrics (default: method and host).
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_attempts=MAX_ATTEMPTS,
+                 breaker_failures=BREAKER_FAILURES, breaker_cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._breakers = {}
+        self._metrics = {}
+
+    def breaker(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.breaker_failures, self.breaker_cooldown)
+            return self._breakers[host]
+
+    def _record(self, endpoint, seconds=None, error=False, retried=False, rejected=False):
+        with self._lock:
+            metrics = self._metrics.setdefault(endpoint, EndpointMetrics())
+            if rejected:
+                metrics.rejected += 1
+                return
+            if retried:
+                metrics.retries += 1
+                return
+            metrics.calls += 1
+            metrics.errors += error
+            metrics.total_seconds += seconds
+            metrics.max_seconds = max(metrics.max_seconds, seconds)
+            metrics.samples.append(seconds)
+
+    def request(self, method, url, endpoint=None, timeout=None, allowed=None, idempotent=None, **kwargs):
+        """
+        Send the request and return the response. Raises HttpError when every
+        attempt failed (or returned a status outside `allowed`, default 2xx)
+        and CircuitOpenError when the host is refusing calls.
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc
+        endpoint = endpoint or f"{method} {host}"
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            self._record(endpoint, rejected=True)
+            raise CircuitOpenError(f"{endpoint}: {host} is unavailable, not retrying for now")
+
+        start = time.perf_counter()
+        settled = False
+        try:
+            for attempt in range(self.max_attempts):
+                error = None
+                try:
+                    response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+                except requests.ConnectTimeout as e:
+                    error, retryable = e, True
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error, retryable = e, idempotent
+                except requests.RequestException as e:
+                    # e.g. a reply cut off mid-body (safe to repeat only if idempotent) or a redirect loop
+                    error, retryable = e, idempotent and isinstance(e, requests.exceptions.ChunkedEncodingError)
+                else:
+                    ok = response.status_code in allowed if allowed else response.ok
+                    if ok or response.status_code not in RETRY_STATUSES:
+                        # Any answer means the host is up, even one the caller rejects
+                        breaker.record_success()
+                        settled = True
+                        self._record(endpoint, time.perf_counter() - start, error=not ok)
+                        if not ok:
+                            raise HttpError(f"{endpoint} returned HTTP {response.status_code}")
+                        return response
+                    error = HttpError(f"{endpoint} returned HTTP {response.status_code}")
+                    retryable = idempotent or response.status_code == 429
+
+                if not retryable or attempt == self.max_attempts - 1:
+                    break
+                self._record(endpoint, retried=True)
+                time.sleep(random.uniform(0, min(BACKOFF_SECONDS * 2 ** attempt, MAX_BACKOFF_SECONDS)))
+        finally:
+            # Whatever went wrong, the outcome is recorded, so a half-open trial slot is never left taken
+            if not settled:
+                breaker.record_failure()
+
+        self._record(endpoint, time.perf_counter() - start, error=True)
+        if isinstance(error, HttpError):
+            raise error
+        raise HttpError(f"{endpoint} failed: {error}") from error
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def metrics(self):
+        """Endpoint -> calls, errors, retries, rejected calls and latency (mean/p50/p95/max ms)."""
+        with self._lock:
+            return {endpoint: metrics.summary() for endpoint, metrics in sorted(self._metrics.items())}
+
+    def circuit_states(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.state for host, breaker in breakers.items()}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """The client shared by every session of the app process."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
@@ -0,0 +1,105 @@
+# File: lookups.py
+# Contains the rule lookups used by the calculator, memoized in-process with no Streamlit dependency
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from config import ROAD_WIDTH_FSI_RULES, REGION_RULES, READY_RECKONER_RATES
+from rate_store import get_store
+
+@lru_cache(maxsize=65536)
+def get_ready_reckoner_rate(region, year, zone=None):
+    """
+    Get ready reckoner rate for region and year.
+    With a zone code, the zone's rate from the rate store is used when the store has one;
+    otherwise the city-level rate applies.
+    """
+    if zone:
+        store = get_store()
+        if store is not None:
+            rate = store.lookup(region, zone, year)
+            if rate is not None:
+                return rate
+    return READY_RECKONER_RATES.get(region, {}).get(year, 0)
+
+def get_ready_reckoner_rate_batch(regions, years, zones):
+    """
+    Vectorized zone-level ready reckoner rates; NaN where no zone rate applies
+    (no zone given, no rate store, or no entry in the store).
+    """
+    store = get_store()
+    if store is None:
+        return np.full(np.broadcast_shapes(np.shape(regions), np.shape(years), np.shape(zones)), np.nan)
+    return store.lookup_batch(regions, zones, years)
+
+# ======================
+# Road width FSI interval index
+# ======================
+
+@dataclass(frozen=True, slots=True)
+class RoadWidthBands:
+    """Half-open road width bands [low, high) of one (region, project type), sorted by low."""
+    lows: tuple
+    highs: tuple
+    fsis: tuple
+    low_array: np.ndarray
+    high_array: np.ndarray
+    fsi_array: np.ndarray
+
+    def lookup(self, road_width):
+        """FSI of the band containing road_width, or None if no band contains it."""
+        i = bisect_right(self.lows, road_width) - 1
+        if i >= 0 and road_width < self.highs[i]:
+            return self.fsis[i]
+        return None
+
+    def lookup_batch(self, road_widths, default=np.nan):
+        """Vectorized lookup over an array of road widths; `default` where no band matches."""
+        road_widths = np.asarray(road_widths, dtype=float)
+        i = np.searchsorted(self.low_array, road_widths, side="right") - 1
+        clipped = np.maximum(i, 0)
+        inside = (i >= 0) & (road_widths < self.high_array[clipped])
+        return np.where(inside, self.fsi_array[clipped], default)
+
+
+def _compile_road_width_bands(bands):
+    ordered = sorted(bands.items())
+    lows = tuple(float(low) for (low, _), _ in ordered)
+    highs = tuple(float(high) for (_, high), _ in ordered)
+    fsis = tuple(fsi for _, fsi in ordered)
+    return RoadWidthBands(lows, highs, fsis, np.array(lows), np.array(highs), np.array(fsis, dtype=float))
+
+
+# Bands per (region, project type), compiled once at import
+ROAD_WIDTH_FSI_INDEX = {
+    (region, project_type): _compile_road_width_bands(bands)
+    for region, by_project_type in ROAD_WIDTH_FSI_RULES.items()
+    for project_type, bands in by_project_type.items()
+}
+
+
+def get_fsi_based_on_road_width(region, project_type, road_width):
+    """
+    Returns FSI based on road width for the given region and project type.
+    """
+    bands = ROAD_WIDTH_FSI_INDEX.get((region, project_type))
+    if bands is not None and road_width is not None:
+        fsi = bands.lookup(road_width)
+        if fsi is not None:
+            return fsi
+    return REGION_RULES[region].base_fsi[project_type]
+
+
+def get_fsi_based_on_road_width_batch(region, project_type, road_widths):
+    """
+    Vectorized get_fsi_based_on_road_width for one region and project type
+    over an array of road widths (NaN means no road width given).
+    """
+    default = REGION_RULES[region].base_fsi[project_type]
+    bands = ROAD_WIDTH_FSI_INDEX.get((region, project_type))
+    if bands is None:
+        return np.full(np.shape(road_widths), float(default))
+    return bands.lookup_batch(road_widths, default)
@@ -0,0 +1,98 @@
+# File: optimizer.py
+# Contains the TDR / extra carpet optimizer: a dense grid evaluated in one batch, reduced to a Pareto front
+
+import numpy as np
+
+from config import REGION_CONFIG, TDR_CONFIG
+from calculator import calculate_profit_batch
+
+# Default search grid
+DEFAULT_TDR_PERCENTAGES = tuple(range(0, 101))
+DEFAULT_EXTRA_CARPET_PERCENTAGES = tuple(range(0, 101))
+
+# Columns of a candidate that constraints may bound from below, with their display labels
+CONSTRAINT_METRICS = {
+    "per_member_profit": "Profit per Member (₹)",
+    "society_benefit": "Society Benefit (₹)",
+    "developer_profit": "Developer Profit (₹)",
+    "total_profit": "Total Profit (₹)",
+    "extra_carpet_percentage": "Extra Carpet Percentage",
+}
+
+
+def optimize_tdr_and_carpet(inputs, tdr_types=None, tdr_percentages=DEFAULT_TDR_PERCENTAGES,
+                            extra_carpet_percentages=DEFAULT_EXTRA_CARPET_PERCENTAGES, constraints=None):
+    """
+    Search TDR type, TDR percentage and extra carpet percentage for one project.
+
+    `inputs` holds the keyword arguments of calculate_profit; the three
+    searched inputs are replaced by the full grid of `tdr_types` (default:
+    the region's available types), `tdr_percentages` and
+    `extra_carpet_percentages`, which is evaluated in a single
+    calculate_profit_batch call. `constraints` maps CONSTRAINT_METRICS
+    names to minimum values, e.g. {"per_member_profit": 0,
+    "extra_carpet_percentage": 30}.
+
+    The society's benefit is the market value of the extra carpet it
+    receives plus its share of the profit. Returns the number of feasible
+    candidates and their Pareto front of society benefit vs developer
+    profit (no other feasible candidate is at least as good on both and
+    better on one), ordered by developer profit, highest first.
+    """
+    region = inputs["region"]
+    if tdr_types is None:
+        tdr_types = REGION_CONFIG[region]["tdr_types_available"]
+    constraints = constraints or {}
+    unknown = set(constraints) - set(CONSTRAINT_METRICS)
+    if unknown:
+        raise ValueError(f"Cannot constrain {', '.join(sorted(unknown))}. Choose from: {', '.join(CONSTRAINT_METRICS)}")
+
+    # Full grid, one row per (TDR type, TDR percentage, extra carpet percentage)
+    type_grid, tdr_grid, carpet_grid = np.meshgrid(
+        np.arange(len(tdr_types)), np.asarray(tdr_percentages, dtype=float),
+        np.asarray(extra_carpet_percentages, dtype=float), indexing="ij"
+    )
+    type_grid, tdr_grid, carpet_grid = type_grid.ravel(), tdr_grid.ravel(), carpet_grid.ravel()
+    tdr_market_rate = inputs.get("tdr_market_rate")
+    if region == "Mumbai" and tdr_market_rate is None:
+        tdr_market_rate = TDR_CONFIG["Mumbai"]["market_rate"]
+
+    results = calculate_profit_batch(**{
+        **inputs,
+        "tdr_type": np.asarray(tdr_types, dtype=object)[type_grid],
+        "tdr_percentage": tdr_grid,
+        "extra_carpet_percentage": carpet_grid,
+        "tdr_market_rate": tdr_market_rate,
+    })
+
+    extra_carpet_area = results["total_offered_carpet_area"] - results["total_current_carpet_area"]
+    candidates = {
+        "tdr_type": results["tdr_type"],
+        "tdr_percentage": tdr_grid,
+        "extra_carpet_percentage": carpet_grid,
+        "society_benefit": extra_carpet_area * results["market_rate_per_sqft"] + results["society_profit"],
+        "developer_profit": results["developer_profit"],
+        "per_member_profit": results["per_member_profit"],
+        "total_profit": results["total_profit"],
+    }
+
+    feasible = np.ones(len(tdr_grid), dtype=bool)
+    for name, minimum in constraints.items():
+        feasible &= candidates[name] >= minimum
+    rows = np.flatnonzero(feasible)
+
+    # Sweep by developer profit (highest first); a row is on the front if it beats
+    # the society benefit of every row with at least as much developer profit
+    society, developer = candidates["society_benefit"][rows], candidates["developer_profit"][rows]
+    order = np.lexsort((-society, -developer))
+    best_so_far = np.maximum.accumulate(society[order])
+    on_front = np.ones(len(order), dtype=bool)
+    on_front[1:] = society[order][1:] > best_so_far[:-1]
+    front = rows[order[on_front]]
+    front_columns = {name: column[front].tolist() for name, column in candidates.items()}
+
+    return {
+        "candidates": len(tdr_grid),
+        "feasible": len(rows),
+        "front": [dict(zip(front_columns, values)) for values in zip(*front_columns.values())],
+    }
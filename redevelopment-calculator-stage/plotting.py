@@ -0,0 +1,39 @@
+# File: plotting.py
+# Contains the lazy matplotlib loader: pyplot is imported when the first chart is drawn,
+# so sessions that never show a chart do not pay for it at start-up
+#
+# Build matplotlib's font cache ahead of time (e.g. while building the container image):
+#   python plotting.py
+
+import threading
+
+_pyplot = None
+_lock = threading.Lock()
+
+
+def pyplot():
+    """matplotlib.pyplot with the non-interactive Agg backend, imported on first use."""
+    global _pyplot
+    if _pyplot is None:
+        with _lock:
+            if _pyplot is None:
+                import matplotlib
+                # Charts are only ever rendered to images; no GUI backend is probed or loaded
+                matplotlib.use("Agg")
+                import matplotlib.pyplot
+                _pyplot = matplotlib.pyplot
+    return _pyplot
+
+
+def prebuild_font_cache():
+    """Build (or load) matplotlib's font cache and return its directory."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import font_manager
+    # Resolving a font scans the system fonts once and writes the cache if it is missing
+    font_manager.findfont("DejaVu Sans")
+    return matplotlib.get_cachedir()
+
+
+if __name__ == "__main__":
+    print(f"Font cache ready in {prebuild_font_cache()}")
@@ -0,0 +1,260 @@
+# File: portfolio_cli.py
+# Headless bulk evaluator: streams a CSV/Parquet portfolio of societies through the batch calculator
+#
+# Usage:
+#   python portfolio_cli.py societies.csv scored.csv
+#   python portfolio_cli.py societies.parquet scored.parquet --chunk-size 50000 --workers 4
+
+import argparse
+import csv
+import io
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from calculator import calculate_profit_batch
+
+# Input columns; optional ones fall back to calculate_profit's defaults when absent
+REQUIRED_COLUMNS = (
+    "region", "ready_reckoner_year", "land_area", "current_carpet_area_per_member", "total_members",
+    "extra_carpet_percentage", "fsi", "fungible_fsi", "construction_cost_per_sqft", "market_rate_per_sqft",
+    "avg_new_flat_size", "rent_per_month", "rent_duration_months", "relocation_cost_per_member",
+    "bank_interest", "project_type", "is_self_redevelopment",
+)
+OPTIONAL_COLUMNS = {
+    "profit_sharing_with_developer": 100,
+    "tdr_percentage": 0.0,
+    "tdr_type": None,
+    "tdr_market_rate": None,
+    "road_width": None,
+    "ancillary_fsi": 0.0,
+    "ready_reckoner_zone": None,
+}
+TEXT_COLUMNS = ("region", "project_type", "tdr_type", "ready_reckoner_zone")
+BOOL_COLUMNS = ("is_self_redevelopment",)
+
+DEFAULT_CHUNK_SIZE = 20_000
+
+
+def _is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes", "y", "self", "self-redevelopment")
+    return bool(value)
+
+
+def _prepare_inputs(columns, overrides):
+    """Turn raw chunk columns (lists or arrays) into calculate_profit_batch keyword arguments."""
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns and name not in overrides]
+    if missing:
+        raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+
+    inputs = {}
+    for name in REQUIRED_COLUMNS + tuple(OPTIONAL_COLUMNS):
+        if name in overrides:
+            inputs[name] = overrides[name]
+            continue
+        if name not in columns:
+            inputs[name] = OPTIONAL_COLUMNS[name]
+            continue
+        values = columns[name]
+        if name in TEXT_COLUMNS:
+            # Empty cells mean "not given"
+            inputs[name] = np.asarray([v if v not in ("", None) else None for v in values], dtype=object)
+        elif name in BOOL_COLUMNS:
+            inputs[name] = np.asarray([_parse_bool(v) for v in values], dtype=bool)
+        elif name == "ready_reckoner_year":
+            inputs[name] = np.asarray([int(float(v)) for v in values], dtype=object)
+        else:
+            inputs[name] = np.asarray([np.nan if v in ("", None) else float(v) for v in values])
+    return inputs
+
+
+def score_chunk(columns, overrides=None):
+    """Score one chunk of society records; returns the result columns as arrays."""
+    return calculate_profit_batch(**_prepare_inputs(columns, overrides or {}))
+
+
+def _read_csv_chunks(path, chunk_size):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield {name: list(values) for name, values in zip(header, zip(*rows))}
+                rows = []
+        if rows:
+            yield {name: list(values) for name, values in zip(header, zip(*rows))}
+
+
+def _read_parquet_chunks(path, chunk_size):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield {name: column.to_pylist() for name, column in zip(batch.schema.names, batch.columns)}
+
+
+def _read_parquet_schema(path):
+    import pyarrow.parquet as pq
+
+    return pq.read_schema(path)
+
+
+def _output_columns(columns, results):
+    """Input columns followed by every result column not already in the input."""
+    output = dict(columns)
+    for name, values in results.items():
+        if name not in output:
+            output[name] = values
+    return output
+
+
+def _encode_csv(columns):
+    """Render output columns as CSV text (without header); NaN and None become empty cells."""
+    cells = []
+    for values in columns.values():
+        if isinstance(values, np.ndarray) and values.dtype.kind == "f" and np.isnan(values).any():
+            values = np.where(np.isnan(values), None, values.astype(object))
+        cells.append(values.tolist() if isinstance(values, np.ndarray) else values)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(zip(*cells))
+    return buffer.getvalue()
+
+
+def _process_chunk(columns, overrides, as_csv):
+    """Score a chunk and prepare it for writing; runs in the worker processes."""
+    output = _output_columns(columns, score_chunk(columns, overrides))
+    return list(output), _encode_csv(output) if as_csv else output
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.header_written = False
+
+    def write(self, header, chunk):
+        if not self.header_written:
+            csv.writer(self.file).writerow(header)
+            self.header_written = True
+        self.file.write(chunk)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    """
+    Column types never come from the values of a chunk (an all-empty column
+    would be typed null and the next chunk could not be written): text
+    columns are strings, other input columns keep the input Parquet file's
+    types (strings for CSV input) and result columns their array dtype.
+    """
+
+    def __init__(self, path, input_schema=None):
+        self.path = path
+        self.input_schema = input_schema
+        self.schema = None
+        self.writer = None
+
+    def _schema(self, header, chunk):
+        import pyarrow as pa
+
+        fields = []
+        for name in header:
+            if name in TEXT_COLUMNS:
+                kind = pa.string()
+            elif self.input_schema is not None and name in self.input_schema.names:
+                kind = self.input_schema.field(name).type
+            elif isinstance(chunk[name], np.ndarray):
+                kind = pa.from_numpy_dtype(chunk[name].dtype)
+            else:
+                kind = pa.string()
+            fields.append(pa.field(name, kind))
+        return pa.schema(fields)
+
+    def write(self, header, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            self.schema = self._schema(header, chunk)
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        arrays = [pa.array(chunk[field.name], type=field.type, from_pandas=True) for field in self.schema]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def evaluate_portfolio(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, overrides=None):
+    """
+    Stream a portfolio file through the calculator chunk by chunk.
+
+    Only a bounded number of chunks is in memory at once: one being read
+    and written, plus up to 2 * workers being scored by the process pool.
+    Scoring and CSV formatting happen in the workers; output order matches
+    input order. Returns the number of rows scored.
+    """
+    chunks = _read_parquet_chunks(input_path, chunk_size) if _is_parquet(input_path) else _read_csv_chunks(input_path, chunk_size)
+    as_csv = not _is_parquet(output_path)
+    if as_csv:
+        writer = _CsvWriter(output_path)
+    else:
+        writer = _ParquetWriter(output_path, _read_parquet_schema(input_path) if _is_parquet(input_path) else None)
+    overrides = overrides or {}
+    rows = 0
+
+    try:
+        if workers <= 1:
+            for columns in chunks:
+                writer.write(*_process_chunk(columns, overrides, as_csv))
+                rows += len(next(iter(columns.values())))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for columns in chunks:
+                    pending.append((len(next(iter(columns.values()))), pool.submit(_process_chunk, columns, overrides, as_csv)))
+                    if len(pending) >= 2 * workers:
+                        chunk_rows, future = pending.popleft()
+                        writer.write(*future.result())
+                        rows += chunk_rows
+                while pending:
+                    chunk_rows, future = pending.popleft()
+                    writer.write(*future.result())
+                    rows += chunk_rows
+    finally:
+        writer.close()
+
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a portfolio of housing societies with the redevelopment calculator.")
+    parser.add_argument("input", help="CSV or Parquet file with one society per row (calculate_profit argument names as columns)")
+    parser.add_argument("output", help="CSV or Parquet file to write (format chosen by extension)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows scored per batch")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for scoring (1 = in-process)")
+    parser.add_argument("--ready-reckoner-year", type=int, help="Score every row against this ready reckoner year")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.ready_reckoner_year is not None:
+        overrides["ready_reckoner_year"] = args.ready_reckoner_year
+
+    start = time.perf_counter()
+    rows = evaluate_portfolio(args.input, args.output, args.chunk_size, args.workers, overrides)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows:,} societies in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f}/s) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# File: rate_store.py
+# Zone-level ready reckoner rates stored as memory-mapped, sorted NumPy columns
+#
+# Build a store from a CSV with columns region, zone, year, rate:
+#   python rate_store.py build ready_reckoner_zones.csv data/ready_reckoner
+#
+# The store directory holds:
+#   meta.json   region names (store region codes), zone width and the version directory
+#   <version>/zones.npy   sorted unique zone codes (fixed-width bytes)
+#   <version>/keys.npy    sorted uint64 keys packing (region code, zone rank, year)
+#   <version>/rates.npy   rate for each key
+# Files are opened with mmap_mode="r", so app processes on one machine share
+# the page cache and nothing is parsed at startup.
+#
+# A build writes a new version directory and then replaces meta.json, so readers see either
+# the old store or the new one. A running app keeps the store it opened (and the rates it
+# memoized); restart it to pick up a rebuilt store.
+
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "READY_RECKONER_STORE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ready_reckoner")
+)
+
+# Key layout: region code (8 bits) | zone rank (40 bits) | year (16 bits)
+_ZONE_SHIFT = np.uint64(16)
+_REGION_SHIFT = np.uint64(56)
+
+# Names of the version directories build() writes: v<time in ns>-<pid>; nothing else is ever removed
+_VERSION_NAME = re.compile(r"v\d+-\d+")
+
+
+def normalize_zone(zone):
+    """Canonical form of a zone code: stripped and upper-cased."""
+    return str(zone).strip().upper()
+
+
+def _pack_keys(region_codes, zone_ranks, years):
+    return (
+        (np.asarray(region_codes, dtype=np.uint64) << _REGION_SHIFT)
+        | (np.asarray(zone_ranks, dtype=np.uint64) << _ZONE_SHIFT)
+        | np.asarray(years, dtype=np.uint64)
+    )
+
+
+class ReadyReckonerStore:
+    """Read-only, memory-mapped store of ready reckoner rates by (region, zone, year)."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.path = path
+        # Stores built before versioning keep their columns next to meta.json
+        self.version = meta.get("version")
+        columns_path = os.path.join(path, self.version) if self.version else path
+        self.regions = meta["regions"]
+        self.region_codes = {name: code for code, name in enumerate(self.regions)}
+        self.zone_width = meta["zone_width"]
+        self.zone_dtype = f"S{self.zone_width}"
+        self.zones = np.load(os.path.join(columns_path, "zones.npy"), mmap_mode="r")
+        self.keys = np.load(os.path.join(columns_path, "keys.npy"), mmap_mode="r")
+        self.rates = np.load(os.path.join(columns_path, "rates.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _zone_ranks(self, zones):
+        """Rank of each zone in the sorted zone column, or -1 if the zone is unknown."""
+        encoded = [normalize_zone(z).encode() if z not in (None, "") else b"" for z in np.ravel(zones)]
+        # A zone longer than any stored one is unknown; the fixed-width cast would cut it
+        # down to (and match) a different, stored zone
+        encoded = np.asarray([zone if len(zone) <= self.zone_width else b"" for zone in encoded],
+                             dtype=self.zone_dtype)
+        ranks = np.searchsorted(self.zones, encoded)
+        clipped = np.minimum(ranks, len(self.zones) - 1)
+        found = (ranks < len(self.zones)) & (self.zones[clipped] == encoded) & (encoded != b"")
+        return np.where(found, ranks, -1).reshape(np.shape(zones))
+
+    def lookup(self, region, zone, year):
+        """Rate for one (region, zone, year), or None if the store has no such entry."""
+        region_code = self.region_codes.get(region)
+        if region_code is None or zone in (None, "") or len(self.zones) == 0:
+            return None
+        rank = int(self._zone_ranks([zone])[0])
+        if rank < 0:
+            return None
+        key = _pack_keys(region_code, rank, int(year))
+        pos = int(np.searchsorted(self.keys, key))
+        if pos < len(self.keys) and self.keys[pos] == key:
+            return float(self.rates[pos])
+        return None
+
+    def lookup_batch(self, regions, zones, years):
+        """
+        Vectorized lookup; `regions` are region names, `zones` zone codes
+        (None for none) and `years` integers, all broadcast together.
+        Returns rates with NaN where the store has no entry.
+        """
+        regions, zones, years = np.broadcast_arrays(
+            np.asarray(regions, dtype=object), np.asarray(zones, dtype=object), np.asarray(years, dtype=object)
+        )
+        rates = np.full(regions.shape, np.nan)
+        if len(self.zones) == 0:
+            return rates
+        region_codes = np.asarray([self.region_codes.get(r, -1) for r in regions.ravel()]).reshape(regions.shape)
+        zone_ranks = self._zone_ranks(zones)
+        valid = (region_codes >= 0) & (zone_ranks >= 0)
+        if not valid.any():
+            return rates
+        keys = _pack_keys(region_codes[valid], zone_ranks[valid], years[valid].astype(np.int64))
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[pos] == keys
+        valid_rates = np.where(found, self.rates[pos], np.nan)
+        rates[valid] = valid_rates
+        return rates
+
+    @staticmethod
+    def build(path, records):
+        """
+        Write a store to `path` from (region, zone, year, rate) records.
+        The columns go to a new version directory and meta.json, which names
+        it, is replaced last, so readers never see a partial store.
+        """
+        records = [(region, normalize_zone(zone), int(year), float(rate)) for region, zone, year, rate in records]
+        regions = sorted({region for region, _, _, _ in records})
+        region_codes = {name: code for code, name in enumerate(regions)}
+        zone_width = max([len(zone.encode()) for _, zone, _, _ in records] + [1])
+        zones = np.unique(np.asarray([zone.encode() for _, zone, _, _ in records], dtype=f"S{zone_width}"))
+        zone_ranks = {zone.decode(): rank for rank, zone in enumerate(zones)}
+
+        keys = _pack_keys(
+            [region_codes[region] for region, _, _, _ in records],
+            [zone_ranks[zone] for _, zone, _, _ in records],
+            [year for _, _, year, _ in records],
+        )
+        rates = np.asarray([rate for _, _, _, rate in records], dtype=float)
+        order = np.argsort(keys, kind="stable")
+        keys, rates = keys[order], rates[order]
+        if len(keys) > 1 and (np.diff(keys) == 0).any():
+            raise ValueError("Duplicate (region, zone, year) entries in ready reckoner records")
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        previous = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                previous = json.load(f).get("version")
+
+        version = f"v{time.time_ns()}-{os.getpid()}"
+        os.makedirs(os.path.join(path, version))
+        columns = {"zones.npy": zones, "keys.npy": keys, "rates.npy": rates}
+        for name, column in columns.items():
+            with open(os.path.join(path, version, name), "wb") as f:
+                np.save(f, column)
+        tmp = os.path.join(path, ".meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"regions": regions, "zone_width": zone_width, "entries": len(keys), "version": version}, f)
+        # The one switch from the old store to the new one
+        os.replace(tmp, meta_path)
+
+        # Keep the version just replaced (a reader may have read the old meta.json and not yet
+        # opened its columns); older ones and unversioned columns are no longer referenced
+        for name in os.listdir(path):
+            if (_VERSION_NAME.fullmatch(name) and name not in (version, previous)
+                    and os.path.isdir(os.path.join(path, name))):
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        for name in columns:
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+
+
+_store = None
+_store_loaded = False
+
+
+def get_store(path=None):
+    """The shared rate store, opened on first use; None if no store has been built."""
+    global _store, _store_loaded
+    if path is not None:
+        return ReadyReckonerStore(path) if os.path.exists(os.path.join(path, "meta.json")) else None
+    if not _store_loaded:
+        _store_loaded = True
+        if os.path.exists(os.path.join(DEFAULT_STORE_PATH, "meta.json")):
+            _store = ReadyReckonerStore(DEFAULT_STORE_PATH)
+    return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the zone-level ready reckoner rate store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build a store from a CSV with columns region, zone, year, rate")
+    build.add_argument("csv_path")
+    build.add_argument("store_path", nargs="?", default=DEFAULT_STORE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with open(args.csv_path, newline="") as f:
+            records = [(row["region"], row["zone"], row["year"], row["rate"]) for row in csv.DictReader(f)]
+        ReadyReckonerStore.build(args.store_path, records)
+        print(f"Wrote {len(records):,} ready reckoner rates to {args.store_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# File: result_cache.py
+# Content-addressed cache of calculate_profit results: in-memory LRU plus an optional on-disk tier
+#
+# calculate_profit is deterministic, so entries never expire. In memory they are
+# keyed on the normalized inputs; on disk on a hash of those and a version of the
+# rule configuration, so a config change simply produces new keys. Entries that
+# are reused are written to RESULT_CACHE_DIR (set it to an empty string to disable
+# the disk tier) so popular scenarios are warm again after a restart.
+
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from config import ROAD_WIDTH_FSI_RULES, TDR_CONFIG, REGION_CONFIG, READY_RECKONER_RATES
+from calculator import calculate_profit
+from rate_store import get_store
+from results import CalculationResult
+
+# Bump when the calculation itself changes in a way the config does not capture
+CALCULATOR_VERSION = 1
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_DISK_MAXSIZE = 1024
+# Memory hits an entry needs before it is written to the disk tier
+DEFAULT_PERSIST_AFTER_HITS = 1
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RESULT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "result_cache")
+)
+
+# calculate_profit's parameters in signature order, with their defaults (None when required)
+_PARAMETERS = tuple(
+    (name, None if parameter.default is inspect.Parameter.empty else parameter.default)
+    for name, parameter in inspect.signature(calculate_profit).parameters.items()
+)
+_PARAMETER_NAMES = frozenset(name for name, _ in _PARAMETERS)
+
+
+@lru_cache(maxsize=None)
+def config_version():
+    """Hash of everything besides the inputs that calculate_profit's result depends on."""
+    store = get_store()
+    store_identity = None
+    if store is not None:
+        store_identity = (store.path, store.version or os.path.getmtime(os.path.join(store.path, "meta.json")), len(store))
+    rules = (CALCULATOR_VERSION, ROAD_WIDTH_FSI_RULES, TDR_CONFIG, REGION_CONFIG, READY_RECKONER_RATES, store_identity)
+    return hashlib.sha256(repr(rules).encode()).hexdigest()[:16]
+
+
+def _normalize(value):
+    kind = type(value)
+    if kind is float:
+        # -0.0 and 0.0 give the same result, so they share a key
+        return value + 0.0
+    if kind is str or kind is bool or value is None:
+        return value
+    if isinstance(value, np.generic):
+        return _normalize(value.item())
+    if isinstance(value, int):
+        # 36 and 36.0 give the same result, so they share a key
+        return float(value)
+    if isinstance(value, float):
+        return float(value) + 0.0
+    raise TypeError(f"Cannot build a cache key from {kind.__name__} value {value!r}")
+
+
+def input_key(inputs):
+    """
+    Canonical key of a calculate_profit call: the normalized value of every
+    parameter (defaults filled in) in signature order. Equal inputs give
+    equal keys, so the key itself addresses the result in memory.
+    """
+    unknown = inputs.keys() - _PARAMETER_NAMES
+    if unknown:
+        raise TypeError(f"calculate_profit() got unexpected arguments: {', '.join(sorted(unknown))}")
+    return tuple(_normalize(inputs.get(name, default)) for name, default in _PARAMETERS)
+
+
+def disk_key(key):
+    """Stable content hash of an input key and the config version, used as the on-disk file name."""
+    payload = json.dumps([config_version(), key], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU cache of calculate_profit results with hit/miss counters and an optional disk tier."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, disk_path=None, disk_maxsize=DEFAULT_DISK_MAXSIZE,
+                 persist_after_hits=DEFAULT_PERSIST_AFTER_HITS):
+        self.maxsize = maxsize
+        self.disk_path = disk_path or None
+        self.disk_maxsize = disk_maxsize
+        self.persist_after_hits = persist_after_hits
+        self._entries = OrderedDict()  # key -> [result, hits]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, inputs):
+        """Result of calculate_profit(**inputs), computed only if no tier has it."""
+        key = input_key(inputs)
+        persist = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                entry[1] += 1
+                if entry[1] == self.persist_after_hits:
+                    persist = entry[0]
+        if entry is not None:
+            if persist is not None:
+                self._write_disk(key, persist)
+            return entry[0]
+
+        result = self._read_disk(key)
+        if result is not None:
+            with self._lock:
+                self.disk_hits += 1
+            # Already on disk, so it never needs writing again
+            self._store(key, result, hits=self.persist_after_hits)
+            return result
+
+        result = calculate_profit(**inputs)
+        with self._lock:
+            self.misses += 1
+        self._store(key, result, hits=0)
+        return result
+
+    def _store(self, key, result, hits):
+        with self._lock:
+            self._entries[key] = [result, hits]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _disk_file(self, key):
+        return os.path.join(self.disk_path, f"{disk_key(key)}.json")
+
+    def _read_disk(self, key):
+        if self.disk_path is None:
+            return None
+        path = self._disk_file(key)
+        try:
+            with open(path) as f:
+                result = CalculationResult(**json.load(f))
+            os.utime(path)  # keeps recently used files out of pruning
+            return result
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _write_disk(self, key, result):
+        if self.disk_path is None:
+            return
+        try:
+            os.makedirs(self.disk_path, exist_ok=True)
+            path = self._disk_file(key)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(result.to_dict(), f)
+            os.replace(tmp, path)
+            self._prune_disk()
+        except (OSError, TypeError, ValueError):
+            # The disk tier is best effort; the memory tier still holds the result
+            pass
+
+    def _prune_disk(self):
+        files = [os.path.join(self.disk_path, name) for name in os.listdir(self.disk_path) if name.endswith(".json")]
+        if len(files) <= self.disk_maxsize:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.disk_maxsize]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        """Empty the memory tier and reset the counters (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+
+# Shared by every session of the app process
+result_cache = ResultCache(disk_path=DEFAULT_CACHE_DIR)
+
+
+def cached_calculate_profit(**inputs):
+    """calculate_profit through the shared result cache."""
+    return result_cache.get_or_compute(inputs)
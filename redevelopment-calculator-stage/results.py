@@ -0,0 +1,195 @@
+# File: results.py
+# Contains the result types returned by calculate_profit (one project) and calculate_profit_batch (columns)
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+
+class _ResultFields(NamedTuple):
+    region: str
+    project_type: str
+    is_self_redevelopment: bool
+    land_area: float
+    land_area_sqm: float
+    ready_reckoner_zone: str
+    ready_reckoner_rate: float
+    base_fsi: float
+    effective_fsi: float
+    total_effective_fsi: float
+    tdr_percentage: float
+    tdr_type: str
+    tdr_cost: float
+    tdr_bonus_area: float
+    fungible_fsi: float
+    fungible_area_factor: float
+    ancillary_fsi: float
+    ancillary_area_factor: float
+    total_current_carpet_area: float
+    total_offered_carpet_area: float
+    total_buildable_area_sqft: float
+    green_bonus: float
+    self_redev_bonus: float
+    total_final_area: float
+    builder_sellable_area: float
+    premium_cost: float
+    construction_cost_per_sqft: float
+    construction_cost: float
+    rent_cost: float
+    relocation_cost: float
+    bank_interest: float
+    gst_cost: float
+    stamp_duty_cost: float
+    total_cost: float
+    market_rate_per_sqft: float
+    project_value: float
+    total_profit: float
+    developer_profit: float
+    society_profit: float
+    per_member_profit: float
+    num_salable_flats: float
+    road_width: float
+
+
+class CalculationResult(_ResultFields):
+    """
+    Result of one calculate_profit call: an immutable tuple of values (no
+    per-instance dict or keys, so it is small and pickles quickly).
+    Fields are read as attributes or dict-style, result['total_profit'];
+    keys(), values(), items(), get() and `in` work as on the old dict,
+    while iterating the result itself yields its values like a tuple.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if type(key) is str:
+            try:
+                return tuple.__getitem__(self, _FIELD_INDEX[key])
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key):
+        return key in _FIELD_INDEX
+
+    def get(self, key, default=None):
+        index = _FIELD_INDEX.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return RESULT_FIELDS
+
+    def values(self):
+        return tuple(self)
+
+    def items(self):
+        return zip(RESULT_FIELDS, self)
+
+    def to_dict(self):
+        return dict(zip(RESULT_FIELDS, self))
+
+
+# Field order of both result types; road_width must stay last (see BatchResult.rows)
+RESULT_FIELDS = CalculationResult._fields
+_FIELD_INDEX = {name: index for index, name in enumerate(RESULT_FIELDS)}
+
+
+class _FieldMapping(Mapping):
+    """Read-only mapping view of a dataclass's result fields."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in _FIELD_INDEX:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in _FIELD_INDEX
+
+    def __iter__(self):
+        return iter(RESULT_FIELDS)
+
+    def __len__(self):
+        return len(RESULT_FIELDS)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in RESULT_FIELDS}
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class BatchResult(_FieldMapping):
+    """
+    Columnar result of calculate_profit_batch: one array per CalculationResult field.
+    Read columns as attributes or as batch['name']; row(i) gives one project's result.
+    """
+    region: np.ndarray
+    project_type: np.ndarray
+    is_self_redevelopment: np.ndarray
+    land_area: np.ndarray
+    land_area_sqm: np.ndarray
+    ready_reckoner_zone: np.ndarray
+    ready_reckoner_rate: np.ndarray
+    base_fsi: np.ndarray
+    effective_fsi: np.ndarray
+    total_effective_fsi: np.ndarray
+    tdr_percentage: np.ndarray
+    tdr_type: np.ndarray
+    tdr_cost: np.ndarray
+    tdr_bonus_area: np.ndarray
+    fungible_fsi: np.ndarray
+    fungible_area_factor: np.ndarray
+    ancillary_fsi: np.ndarray
+    ancillary_area_factor: np.ndarray
+    total_current_carpet_area: np.ndarray
+    total_offered_carpet_area: np.ndarray
+    total_buildable_area_sqft: np.ndarray
+    green_bonus: np.ndarray
+    self_redev_bonus: np.ndarray
+    total_final_area: np.ndarray
+    builder_sellable_area: np.ndarray
+    premium_cost: np.ndarray
+    construction_cost_per_sqft: np.ndarray
+    construction_cost: np.ndarray
+    rent_cost: np.ndarray
+    relocation_cost: np.ndarray
+    bank_interest: np.ndarray
+    gst_cost: np.ndarray
+    stamp_duty_cost: np.ndarray
+    total_cost: np.ndarray
+    market_rate_per_sqft: np.ndarray
+    project_value: np.ndarray
+    total_profit: np.ndarray
+    developer_profit: np.ndarray
+    society_profit: np.ndarray
+    per_member_profit: np.ndarray
+    num_salable_flats: np.ndarray
+    road_width: np.ndarray
+
+    @property
+    def shape(self):
+        return np.shape(self.total_profit)
+
+    def rows(self):
+        """
+        Every row as a CalculationResult of plain Python values, in flattened order.
+        A NaN road width (not used) becomes None, as in calculate_profit.
+        """
+        columns = [np.broadcast_to(getattr(self, name), self.shape).ravel().tolist() for name in RESULT_FIELDS]
+        results = []
+        for values in zip(*columns):
+            if values[-1] != values[-1]:
+                values = values[:-1] + (None,)
+            results.append(CalculationResult._make(values))
+        return results
+
+    def row(self, index):
+        """One project's result as a CalculationResult; `index` is a flat row number."""
+        values = [np.broadcast_to(getattr(self, name), self.shape).ravel()[index] for name in RESULT_FIELDS]
+        values = [value.item() if isinstance(value, np.generic) else value for value in values]
+        if values[-1] != values[-1]:
+            values[-1] = None
+        return CalculationResult._make(values)
@@ -0,0 +1,100 @@
+# File: risk_analysis.py
+# Contains the Monte Carlo risk analysis built on the batch calculator
+
+import numpy as np
+
+from calculator import calculate_profit_batch
+
+# Supported sampling distributions and the parameters each one needs
+DISTRIBUTIONS = {
+    "Fixed": (),
+    "Uniform": ("low", "high"),
+    "Triangular": ("low", "mode", "high"),
+    "Normal": ("mean", "std"),
+    "Lognormal": ("mean", "std"),
+}
+
+# Inputs of calculate_profit that can be sampled, with their display labels
+RISK_INPUTS = {
+    "market_rate_per_sqft": "Market Rate per sqft (₹)",
+    "construction_cost_per_sqft": "Construction Cost per sqft (₹)",
+    "rent_duration_months": "Rent Duration (months)",
+    "tdr_market_rate": "TDR Market Rate (₹/sqft)",
+}
+
+DEFAULT_SAMPLES = 100_000
+PERCENTILES = (10, 50, 90)
+
+
+def sample_distribution(rng, spec, n_samples):
+    """
+    Draw samples for one input from a distribution spec.
+
+    `spec` is a dict with a "distribution" name from DISTRIBUTIONS and its
+    parameters, e.g. {"distribution": "Triangular", "low": 15000,
+    "mode": 17500, "high": 20000}. "Fixed" returns spec["value"].
+    Samples are clipped at zero since none of the inputs can be negative.
+    Raises ValueError for a range whose bounds are out of order.
+    """
+    distribution = spec["distribution"]
+    if distribution == "Fixed":
+        return np.full(n_samples, float(spec["value"]))
+    if distribution in ("Uniform", "Triangular") and spec["low"] > spec["high"]:
+        raise ValueError(f"Low ({spec['low']:,.2f}) must not be above High ({spec['high']:,.2f})")
+    if distribution == "Uniform":
+        samples = rng.uniform(spec["low"], spec["high"], n_samples)
+    elif distribution == "Triangular":
+        if not spec["low"] <= spec["mode"] <= spec["high"]:
+            raise ValueError(f"Mode ({spec['mode']:,.2f}) must lie between Low ({spec['low']:,.2f}) "
+                             f"and High ({spec['high']:,.2f})")
+        if spec["low"] == spec["high"]:
+            return np.full(n_samples, float(spec["low"]))
+        samples = rng.triangular(spec["low"], spec["mode"], spec["high"], n_samples)
+    elif distribution == "Normal":
+        samples = rng.normal(spec["mean"], spec["std"], n_samples)
+    elif distribution == "Lognormal":
+        # Parameterised by the mean and std of the input itself, not of its logarithm
+        mean, std = float(spec["mean"]), float(spec["std"])
+        if mean <= 0:
+            return np.zeros(n_samples)
+        sigma = np.sqrt(np.log1p((std / mean) ** 2))
+        samples = rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma, n_samples)
+    else:
+        raise ValueError(f"Unknown distribution '{distribution}'. Choose one of: {', '.join(DISTRIBUTIONS)}")
+    return np.maximum(samples, 0.0)
+
+
+def run_monte_carlo(inputs, distributions, n_samples=DEFAULT_SAMPLES, seed=42):
+    """
+    Run a Monte Carlo risk analysis around one scenario.
+
+    `inputs` holds the keyword arguments of calculate_profit; each entry of
+    `distributions` (keyed by a RISK_INPUTS name) replaces that input with
+    n_samples draws. All samples go through calculate_profit_batch in one
+    call. The same seed always reproduces the same result.
+    """
+    unknown = set(distributions) - set(RISK_INPUTS)
+    if unknown:
+        raise ValueError(f"Cannot sample {', '.join(sorted(unknown))}. Choose from: {', '.join(RISK_INPUTS)}")
+
+    # One generator per run, drawing inputs in a fixed order for reproducibility
+    rng = np.random.default_rng(seed)
+    sampled = {
+        name: sample_distribution(rng, distributions[name], n_samples)
+        for name in RISK_INPUTS if name in distributions
+    }
+    results = calculate_profit_batch(**{**inputs, **sampled})
+
+    total_profit = results["total_profit"]
+    per_member_profit = results["per_member_profit"]
+    return {
+        "n_samples": n_samples,
+        "seed": seed,
+        "probability_of_loss": float(np.mean(total_profit < 0)),
+        "expected_total_profit": float(np.mean(total_profit)),
+        "expected_per_member_profit": float(np.mean(per_member_profit)),
+        "total_profit_percentiles": dict(zip(PERCENTILES, np.percentile(total_profit, PERCENTILES).tolist())),
+        "per_member_profit_percentiles": dict(zip(PERCENTILES, np.percentile(per_member_profit, PERCENTILES).tolist())),
+        "total_profit": total_profit,
+        "per_member_profit": per_member_profit,
+    }
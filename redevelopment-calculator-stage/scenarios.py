@@ -0,0 +1,153 @@
+# File: scenarios.py
+# Contains the multi-scenario engine behind the Scenario Comparison tab
+
+from collections import OrderedDict
+
+import numpy as np
+
+from config import REGION_CONFIG, TDR_CONFIG
+from calculator import calculate_profit_batch
+
+# Parameters a scenario may change, keyed by their name in st.session_state.params
+SCENARIO_PARAMETERS = {
+    "is_self_redevelopment": "Self-Redevelopment",
+    "project_type": "Project Type",
+    "ready_reckoner_year": "Ready Reckoner Year",
+    "land_area": "Land Area",
+    "road_width": "Road Width (m)",
+    "total_members": "Number of Members/Flats",
+    "carpet_area": "Current Carpet Area per Member (sqft)",
+    "extra_percentage": "Extra Carpet Percentage",
+    "fsi": "Base FSI Value",
+    "tdr_percentage": "TDR Percentage",
+    "tdr_type": "TDR Type",
+    "tdr_market_rate": "TDR Market Rate (₹/sqft)",
+    "fungible_fsi": "Fungible FSI (fraction)",
+    "ancillary_fsi": "Ancillary FSI (fraction)",
+    "construction_cost": "Construction Cost per sqft (₹)",
+    "market_rate": "Market Rate per sqft (₹)",
+    "avg_flat_size": "Average Size of New Salable Flats (sqft)",
+    "rent": "Monthly Rent per Flat (₹)",
+    "rent_months": "Rent Duration (months)",
+    "relocation": "Relocation Cost per Member (₹)",
+    "bank_interest": "Bank Interest (₹)",
+}
+
+# Results compared side by side, with the kind of value each one holds
+COMPARISON_METRICS = {
+    "total_effective_fsi": ("Total Effective FSI", "ratio"),
+    "total_final_area": ("Total Area with Bonuses", "area"),
+    "builder_sellable_area": ("Builder Sellable Area", "area"),
+    "total_cost": ("Total Project Cost", "currency"),
+    "project_value": ("Project Value", "currency"),
+    "total_profit": ("Total Profit", "currency"),
+    "developer_profit": ("Developer Profit", "currency"),
+    "society_profit": ("Society Profit", "currency"),
+    "per_member_profit": ("Profit per Member", "currency"),
+    "num_salable_flats": ("Salable Flats", "ratio"),
+}
+
+# Upper bound on memoized scenario results kept per session
+MAX_CACHED_SCENARIOS = 256
+
+
+def params_to_inputs(params):
+    """Translate session-state parameters into calculate_profit keyword arguments."""
+    region = params['region']
+    project_type = params.get('project_type', 'residential')
+    uses_tdr = params.get('tdr_percentage', 0.0) > 0
+    return dict(
+        region=region,
+        ready_reckoner_year=params.get('ready_reckoner_year', 2024),
+        land_area=params['land_area'],
+        current_carpet_area_per_member=params['carpet_area'],
+        total_members=params['total_members'],
+        extra_carpet_percentage=params['extra_percentage'],
+        fsi=params.get('fsi', REGION_CONFIG[region]["fsi_rules"][project_type]),
+        fungible_fsi=params.get('fungible_fsi', 0.0) if REGION_CONFIG[region]["has_fungible"] else 0.0,
+        construction_cost_per_sqft=params['construction_cost'],
+        market_rate_per_sqft=params['market_rate'],
+        avg_new_flat_size=params['avg_flat_size'],
+        rent_per_month=params['rent'],
+        rent_duration_months=params['rent_months'],
+        relocation_cost_per_member=params['relocation'],
+        bank_interest=params['bank_interest'],
+        project_type=project_type,
+        is_self_redevelopment=params.get('is_self_redevelopment', True),
+        profit_sharing_with_developer=100,
+        tdr_percentage=params.get('tdr_percentage', 0.0),
+        tdr_type=params.get('tdr_type') if uses_tdr else None,
+        tdr_market_rate=params.get('tdr_market_rate') if uses_tdr and region == "Mumbai" else None,
+        road_width=params.get('road_width') if region == "Mumbai" else None,
+        ancillary_fsi=params.get('ancillary_fsi', 0.0) if not REGION_CONFIG[region]["has_fungible"] else 0.0,
+        ready_reckoner_zone=params.get('ready_reckoner_zone') or None
+    )
+
+
+def scenario_presets(params):
+    """Ready-made scenarios for the current parameters, as {name: parameter changes}."""
+    presets = {
+        "Builder Redevelopment": {"is_self_redevelopment": False},
+        "Self-Redevelopment": {"is_self_redevelopment": True},
+    }
+    if params['region'] == "Mumbai":
+        tdr_percentage = params.get('tdr_percentage') or 20.0
+        market_rate = params.get('tdr_market_rate') or TDR_CONFIG["Mumbai"]["market_rate"]
+        for tdr_type in REGION_CONFIG["Mumbai"]["tdr_types_available"]:
+            presets[f"{tdr_type} {tdr_percentage:.0f}%"] = {
+                "tdr_type": tdr_type,
+                "tdr_percentage": tdr_percentage,
+                "tdr_market_rate": market_rate,
+            }
+    else:
+        tdr_percentage = params.get('tdr_percentage') or 20.0
+        presets[f"Standard TDR {tdr_percentage:.0f}%"] = {"tdr_type": "Standard TDR", "tdr_percentage": tdr_percentage}
+    return presets
+
+
+def _cache_key(inputs):
+    return tuple(sorted(inputs.items()))
+
+
+def evaluate_scenarios(base_params, scenarios, cache=None):
+    """
+    Evaluate scenarios defined as parameter changes on top of `base_params`.
+
+    `scenarios` maps a scenario name to its changes (session-state parameter
+    names). The unchanged base is always evaluated as "Current Inputs".
+    Results are memoized in `cache` (an OrderedDict, e.g. kept in session
+    state) by the scenario's full inputs, so only new or edited scenarios are
+    computed; those are evaluated together in one calculate_profit_batch call.
+    The cache keeps the MAX_CACHED_SCENARIOS most recently used results.
+
+    Returns {name: CalculationResult} in the order base first, then `scenarios`.
+    """
+    if cache is None:
+        cache = OrderedDict()
+
+    named_inputs = {"Current Inputs": params_to_inputs(base_params)}
+    for name, changes in scenarios.items():
+        named_inputs[name] = params_to_inputs({**base_params, **changes})
+
+    # Evaluate every scenario missing from the cache in a single batch
+    missing = {}
+    for inputs in named_inputs.values():
+        key = _cache_key(inputs)
+        if key in cache:
+            cache.move_to_end(key)
+        else:
+            missing[key] = inputs
+    if missing:
+        rows = list(missing.values())
+        columns = {name: np.asarray([row[name] for row in rows], dtype=object) for name in rows[0]}
+        batch = calculate_profit_batch(**columns)
+        for key, result in zip(missing, batch.rows()):
+            cache[key] = result
+
+    results = {name: cache[_cache_key(inputs)] for name, inputs in named_inputs.items()}
+
+    # Drop the least recently used entries once the cache outgrows its bound
+    while len(cache) > MAX_CACHED_SCENARIOS:
+        cache.popitem(last=False)
+
+    return results
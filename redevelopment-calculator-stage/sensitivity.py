@@ -0,0 +1,73 @@
+# File: sensitivity.py
+# Contains the one-at-a-time sensitivity (tornado) analysis built on the batch calculator
+
+import numpy as np
+
+from calculator import calculate_profit_batch
+
+# Numeric inputs of calculate_profit that are varied, with their display labels
+SENSITIVITY_INPUTS = {
+    "land_area": "Land Area",
+    "road_width": "Road Width",
+    "fsi": "Base FSI",
+    "tdr_percentage": "TDR Percentage",
+    "tdr_market_rate": "TDR Market Rate",
+    "fungible_fsi": "Fungible FSI",
+    "ancillary_fsi": "Ancillary FSI",
+    "total_members": "Number of Members",
+    "current_carpet_area_per_member": "Current Carpet Area per Member",
+    "extra_carpet_percentage": "Extra Carpet Percentage",
+    "construction_cost_per_sqft": "Construction Cost per sqft",
+    "market_rate_per_sqft": "Market Rate per sqft",
+    "rent_per_month": "Monthly Rent per Flat",
+    "rent_duration_months": "Rent Duration",
+    "relocation_cost_per_member": "Relocation Cost per Member",
+    "bank_interest": "Bank Interest",
+}
+
+# Relative changes applied to each input
+DEFAULT_STEPS = (-0.2, -0.1, 0.1, 0.2)
+
+
+def sensitivity_analysis(inputs, steps=DEFAULT_STEPS, metric="total_profit", baseline=None):
+    """
+    Vary each numeric input by the relative `steps` and rank inputs by their effect.
+
+    `inputs` holds the keyword arguments of calculate_profit. Inputs that are
+    unset or zero are skipped since a relative change cannot move them. Every
+    perturbed scenario is evaluated in a single calculate_profit_batch call;
+    pass `baseline` (the metric for the unchanged inputs, e.g. from the
+    results already on screen) to avoid recomputing it.
+
+    Returns the baseline and one row per input, sorted by swing (the spread
+    of the metric across all steps), largest first.
+    """
+    names = [name for name in SENSITIVITY_INPUTS if inputs.get(name)]
+    steps = tuple(steps)
+
+    # One row per (input, step); row 0 is the unchanged baseline
+    n_rows = 1 + len(names) * len(steps)
+    columns = {name: np.full(n_rows, float(inputs[name])) for name in names}
+    for i, name in enumerate(names):
+        rows = slice(1 + i * len(steps), 1 + (i + 1) * len(steps))
+        columns[name][rows] = float(inputs[name]) * (1 + np.asarray(steps))
+
+    values = calculate_profit_batch(**{**inputs, **columns})[metric]
+    if baseline is None:
+        baseline = float(values[0])
+
+    rows = []
+    for i, name in enumerate(names):
+        varied = values[1 + i * len(steps):1 + (i + 1) * len(steps)]
+        rows.append({
+            "input": name,
+            "label": SENSITIVITY_INPUTS[name],
+            "value": inputs[name],
+            "metric": dict(zip(steps, varied.tolist())),
+            "low": float(varied.min()),
+            "high": float(varied.max()),
+            "swing": float(varied.max() - varied.min()),
+        })
+    rows.sort(key=lambda row: row["swing"], reverse=True)
+
+    return {"metric": metric, "baseline": baseline, "steps": steps, "rows": rows}
@@ -0,0 +1,105 @@
+# File: solver.py
+# Contains the break-even / goal-seek solver built on calculate_profit
+
+from calculator import calculate_profit
+
+# Inputs the solver can vary, with the range of values that make sense for each
+SOLVABLE_INPUTS = {
+    "market_rate_per_sqft": (0.0, float('inf')),
+    "extra_carpet_percentage": (0.0, float('inf')),
+    "tdr_percentage": (0.0, 100.0),
+    "construction_cost_per_sqft": (0.0, float('inf')),
+}
+
+# Results the solver can drive to a target
+TARGET_METRICS = ("total_profit", "per_member_profit")
+
+
+def solve_for_target(inputs, variable, metric="total_profit", target=0.0, tolerance=1.0, max_evaluations=12):
+    """
+    Find the value of one input at which a profit metric reaches a target.
+
+    `inputs` holds the keyword arguments of calculate_profit. Profit is
+    (piecewise) linear in every solvable input, so a secant step lands on
+    the answer within a linear piece; a bracket is kept so a step that
+    crosses a kink falls back to bisection instead of diverging.
+
+    Returns a dict with the solved `value` (None if the target cannot be
+    reached inside the input's valid range), the metric at that value and
+    the number of calculate_profit evaluations used.
+    """
+    if variable not in SOLVABLE_INPUTS:
+        raise ValueError(f"Cannot solve for '{variable}'. Choose one of: {', '.join(SOLVABLE_INPUTS)}")
+    if metric not in TARGET_METRICS:
+        raise ValueError(f"Cannot target '{metric}'. Choose one of: {', '.join(TARGET_METRICS)}")
+
+    lower, upper = SOLVABLE_INPUTS[variable]
+    evaluations = 0
+
+    def gap(x):
+        nonlocal evaluations
+        evaluations += 1
+        return calculate_profit(**{**inputs, variable: x})[metric] - target
+
+    def result(value, value_gap):
+        return {
+            "variable": variable,
+            "metric": metric,
+            "target": target,
+            "value": value,
+            "metric_value": None if value is None else value_gap + target,
+            "evaluations": evaluations,
+        }
+
+    # Two starting points around the current input
+    x0 = min(max(float(inputs.get(variable) or 0.0), lower), upper)
+    step = max(abs(x0) * 0.1, 1.0)
+    x1 = x0 + step if x0 + step <= upper else x0 - step
+    f0, f1 = gap(x0), gap(x1)
+    if abs(f0) <= tolerance:
+        return result(x0, f0)
+
+    # (low, low_gap, high, high_gap) once two points on opposite sides of the target are seen
+    bracket = (min(x0, x1), f0 if x0 < x1 else f1, max(x0, x1), f1 if x0 < x1 else f0) if f0 * f1 < 0 else None
+    best = min(((x0, f0), (x1, f1)), key=lambda point: abs(point[1]))
+
+    while abs(best[1]) > tolerance and evaluations < max_evaluations:
+        # Secant step: exact within a linear piece of the profit curve
+        slope = (f1 - f0) / (x1 - x0)
+        x2 = x1 - f1 / slope if slope != 0 else None
+
+        if bracket is not None:
+            # A step that leaves the bracket crossed a kink: bisect instead
+            low, low_gap, high, high_gap = bracket
+            if x2 is None or not low < x2 < high:
+                x2 = (low + high) / 2
+        else:
+            # The metric does not respond to this input (e.g. per-member profit in builder mode)
+            if x2 is None:
+                break
+            # The target lies outside the valid range once the boundary has been tried
+            x2 = min(max(x2, lower), upper)
+            if x2 == x1 or x2 == float('inf'):
+                break
+
+        f2 = gap(x2)
+        if abs(f2) < abs(best[1]):
+            best = (x2, f2)
+
+        # Keep the tightest bracket around the target
+        if bracket is not None:
+            low, low_gap, high, high_gap = bracket
+            bracket = (low, low_gap, x2, f2) if f2 * low_gap < 0 else (x2, f2, high, high_gap)
+        elif f2 * f1 < 0:
+            bracket = (min(x1, x2), f1 if x1 < x2 else f2, max(x1, x2), f2 if x1 < x2 else f1)
+
+        x0, f0, x1, f1 = x1, f1, x2, f2
+
+    if abs(best[1]) <= tolerance or bracket is not None:
+        return result(best[0], best[1])
+    return result(None, None)
+
+
+def solve_break_even(inputs):
+    """Break-even values of the main inputs for the current scenario (total profit = 0)."""
+    return {variable: solve_for_target(inputs, variable)["value"] for variable in SOLVABLE_INPUTS}
@@ -1,9 +1,21 @@
 # File: ui_components.py
 # Contains UI components for displaying results
 
+from collections import OrderedDict
+
 import streamlit as st
-import matplotlib.pyplot as plt
-from utils import format_currency, format_area
+from utils import format_currency, format_currency_short, format_area
+from solver import solve_break_even
+from risk_analysis import DISTRIBUTIONS, RISK_INPUTS, DEFAULT_SAMPLES, run_monte_carlo
+from sensitivity import sensitivity_analysis
+from cashflow import cash_flow_analysis
+from optimizer import optimize_tdr_and_carpet
+from scenarios import SCENARIO_PARAMETERS, COMPARISON_METRICS, scenario_presets, evaluate_scenarios
+from plotting import pyplot
+from charts import (
+    chart_cache, cost_breakdown_data, profit_analysis_data, fsi_composition_data,
+    cost_breakdown_spec, profit_analysis_specs, fsi_composition_spec
+)
 
 # Basic project info
 def display_basic_results(results):
@@ -182,130 +194,401 @@ def display_profit_distribution(results, is_profitable):
     - **Number of Potential Salable Flats**: {results['num_salable_flats']:.1f}
     """)
 
+# Break-even analysis
+def display_break_even(calc_inputs):
+    st.subheader("BREAK-EVEN ANALYSIS")
+    break_even = solve_break_even(calc_inputs)
+    
+    def describe(value, formatter, limit_text):
+        return formatter(value) if value is not None else limit_text
+    
+    st.markdown(f"""
+    Values at which the project's total profit becomes zero, keeping all other inputs unchanged:
+    - **Break-even Market Rate**: {describe(break_even['market_rate_per_sqft'], lambda v: f"{format_currency(v)}/sqft", "Not reachable")}
+    - **Maximum Extra Carpet**: {describe(break_even['extra_carpet_percentage'], lambda v: f"{v:.1f}%", "Not reachable")}
+    - **Break-even TDR Percentage**: {describe(break_even['tdr_percentage'], lambda v: f"{v:.1f}%", "Not reachable within 0-100%")}
+    - **Maximum Construction Cost**: {describe(break_even['construction_cost_per_sqft'], lambda v: f"{format_currency(v)}/sqft", "Not reachable")}
+    """)
+
+# Sensitivity (tornado) analysis
+def display_sensitivity(calc_inputs, results):
+    st.subheader("SENSITIVITY ANALYSIS")
+    sensitivity = sensitivity_analysis(calc_inputs, baseline=results['total_profit'])
+    rows = [row for row in sensitivity['rows'] if row['swing'] > 0][:10]
+    if not rows:
+        st.info("None of the inputs change the total profit.")
+        return
+    
+    low_step, high_step = min(sensitivity['steps']), max(sensitivity['steps'])
+    baseline = sensitivity['baseline']
+    st.markdown(f"Effect on total profit of changing each input by {low_step:+.0%} and {high_step:+.0%}, largest first.")
+    
+    # Tornado chart: bars extend from the baseline to the metric at the extreme steps
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 0.5 * len(rows) + 1.5))
+    labels = [row['label'] for row in reversed(rows)]
+    low_deltas = [row['metric'][low_step] - baseline for row in reversed(rows)]
+    high_deltas = [row['metric'][high_step] - baseline for row in reversed(rows)]
+    # The two bars of an input sit side by side, so one never hides the other when both go the same way
+    height = 0.4
+    positions = range(len(labels))
+    ax.barh([y + height / 2 for y in positions], low_deltas, height, color='#e74c3c', label=f'Input {low_step:+.0%}')
+    ax.barh([y - height / 2 for y in positions], high_deltas, height, color='#2ecc71', label=f'Input {high_step:+.0%}')
+    ax.set_yticks(list(positions))
+    ax.set_yticklabels(labels)
+    ax.axvline(0, color='black', linewidth=0.8)
+    ax.set_xlabel('Change in Total Profit (₹)')
+    ax.set_title('Sensitivity of Total Profit')
+    ax.legend()
+    fig.tight_layout()
+    st.pyplot(fig)
+    plt.close(fig)
+    
+    st.markdown("\n".join(
+        f"- **{row['label']}**: {format_currency(row['low'])} to {format_currency(row['high'])}"
+        for row in rows
+    ))
+
+# Time-phased cash flow analysis
+def display_cash_flow(calc_inputs, schedule):
+    st.subheader("CASH FLOW ANALYSIS")
+    cash_flow = cash_flow_analysis(calc_inputs, schedule)
+    irr = cash_flow['irr'][0]
+    
+    npv_col, irr_col, funding_col = st.columns(3)
+    npv_col.metric("NPV", format_currency_short(cash_flow['npv'][0]))
+    irr_col.metric("IRR (annual)", f"{irr * 100:.1f}%" if irr == irr else "N/A")
+    funding_col.metric("Peak Funding Need", format_currency_short(cash_flow['peak_funding'][0]))
+    
+    st.markdown(f"""
+    Monthly cash flows with the loan drawdown replacing the fixed bank interest:
+    - **Loan Interest (derived)**: {format_currency(cash_flow['total_interest'][0])} (fixed input: {format_currency(calc_inputs['bank_interest'])})
+    - **Profit with Derived Interest**: {format_currency(cash_flow['total_profit'][0])}
+    - **Project NPV (before financing)**: {format_currency(cash_flow['project_npv'][0])}
+    """)
+    
+    months = cash_flow['months']
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.bar(months, cash_flow['cash_flows'][0], color=['#2ecc71' if v >= 0 else '#e74c3c' for v in cash_flow['cash_flows'][0]], label='Monthly Cash Flow')
+    ax.plot(months, cash_flow['cash_flows'][0].cumsum(), color='#3498db', label='Cumulative Cash Flow')
+    ax.axhline(0, color='black', linewidth=0.8)
+    ax.set_xlabel('Month')
+    ax.set_ylabel('₹')
+    ax.set_title('Equity Cash Flows')
+    ax.legend()
+    fig.tight_layout()
+    st.pyplot(fig)
+    plt.close(fig)
+
 # Visualization components
 def display_visualization(results, region, is_profitable, REGION_CONFIG):
     st.subheader("Project Financial Visualization")
     
+    # Interactive charts are drawn by the browser and skip matplotlib entirely
+    native = st.toggle("Interactive charts", key="interactive_charts",
+                       help="Draw the charts in the browser instead of as images")
+    
+    cost_data = cost_breakdown_data(results)
+    profit_data = profit_analysis_data(results, is_profitable)
+    fsi_data = fsi_composition_data(results, region, REGION_CONFIG)
+    
     # Create tabs for different visualizations
     viz_tab1, viz_tab2, viz_tab3 = st.tabs(["Cost Breakdown", "Profit Analysis", "FSI Composition"])
     
+    if native:
+        with viz_tab1:
+            st.vega_lite_chart(cost_breakdown_spec(cost_data), width="stretch")
+        with viz_tab2:
+            area_col, profit_col = st.columns(2)
+            area_spec, profit_spec = profit_analysis_specs(profit_data)
+            area_col.vega_lite_chart(area_spec, width="stretch")
+            profit_col.vega_lite_chart(profit_spec, width="stretch")
+        with viz_tab3:
+            st.vega_lite_chart(fsi_composition_spec(fsi_data), width="stretch")
+        return
+    
+    # Images are rendered once per distinct chart data and reused from the chart cache
     with viz_tab1:
-        # Cost breakdown pie chart
-        cost_labels = ['Premium Cost', 'TDR Cost', 'Construction Cost', 'GST', 
-                      'Stamp Duty', 'Rent Cost', 'Relocation Cost', 'Bank Interest']
-        cost_values = [
-            results['premium_cost'],
-            results['tdr_cost'],
-            results['construction_cost'],
-            results['gst_cost'],
-            results['stamp_duty_cost'],
-            results['rent_cost'],
-            results['relocation_cost'],
-            results['bank_interest']
-        ]
-        
-        # Filter out zero values for better visualization
-        filtered_labels = [label for label, value in zip(cost_labels, cost_values) if value > 0]
-        filtered_values = [value for value in cost_values if value > 0]
-        
-        fig1, ax1 = plt.subplots(figsize=(10, 6))
-        ax1.pie(filtered_values, labels=filtered_labels, autopct='%1.1f%%', startangle=90)
-        ax1.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-        plt.title('Project Cost Breakdown')
-        st.pyplot(fig1)
-        
+        st.image(chart_cache.get_or_render("cost_breakdown", cost_data), width="stretch")
     with viz_tab2:
-        # Profit and area allocation
-        fig2, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-        
-        # Area allocation
-        area_labels = ['Society Area', 'Sellable Area']
-        area_values = [
-            results['total_offered_carpet_area'],
-            results['builder_sellable_area']
-        ]
-        ax1.bar(area_labels, area_values, color=['#3498db', '#2ecc71'])
-        ax1.set_ylabel('Square Feet')
-        ax1.set_title('Area Allocation')
-        
-        # For profit/loss distribution visualization
-        if is_profitable:
-            if not results['is_self_redevelopment']:
-                profit_labels = ['Developer Profit', 'Society Profit']
-                profit_values = [
-                    max(0, results['developer_profit']),
-                    max(0, results['society_profit'])
-                ]
-                if all(v > 0 for v in profit_values):
-                    ax2.pie(profit_values, labels=profit_labels, autopct='%1.1f%%', startangle=90, colors=['#e74c3c', '#3498db'])
-                    ax2.axis('equal')
-                    ax2.set_title('Profit Distribution')
-                else:
-                    ax2.bar(profit_labels, profit_values, color=['#e74c3c', '#3498db'])
-                    ax2.set_ylabel('Profit Amount (₹)')
-                    ax2.set_title('Profit Distribution')
-            else:
-                ax2.bar(['Total Cost', 'Project Value'], 
-                       [results['total_cost'], results['project_value']], 
-                       color=['#e74c3c', '#3498db'])
-                ax2.set_ylabel('Amount (₹)')
-                ax2.set_title('Cost vs. Project Value')
-        else:
-            if not results['is_self_redevelopment']:
-                loss_labels = ['Developer Loss', 'Society Loss']
-                loss_values = [
-                    abs(results['developer_profit']),
-                    abs(results['society_profit'])
-                ]
-                ax2.bar(loss_labels, loss_values, color=['#e74c3c', '#3498db'])
-                ax2.set_ylabel('Loss Amount (₹)')
-                ax2.set_title('Loss Distribution')
-            else:
-                ax2.bar(['Total Cost', 'Project Value'], 
-                       [results['total_cost'], results['project_value']], 
-                       color=['#e74c3c', '#3498db'])
-                ax2.set_ylabel('Amount (₹)')
-                ax2.set_title('Cost vs. Project Value (Loss Scenario)')
-        
-        plt.tight_layout()
-        st.pyplot(fig2)
-        
+        st.image(chart_cache.get_or_render("profit_analysis", profit_data), width="stretch")
     with viz_tab3:
-        # FSI composition visualization
-        fig3, ax3 = plt.subplots(figsize=(10, 6))
-        
-        # Create FSI breakdown
-        fsi_labels = ['Base FSI']
-        fsi_values = [results['base_fsi']]
-        fsi_colors = ['#3498db']  # Blue
-        
-        # Add TDR if present
-        tdr_value = results['effective_fsi'] - results['base_fsi']
-        if tdr_value > 0:
-            fsi_labels.append('TDR Bonus')
-            fsi_values.append(tdr_value)
-            fsi_colors.append('#2ecc71')  # Green
-        
-        # Add Fungible/Ancillary if present
-        if REGION_CONFIG[region]["has_fungible"] and results['fungible_area_factor'] > 0:
-            fsi_labels.append('Fungible FSI')
-            fsi_values.append(results['fungible_area_factor'])
-            fsi_colors.append('#e74c3c')  # Red
-        elif not REGION_CONFIG[region]["has_fungible"] and results['ancillary_area_factor'] > 0:
-            fsi_labels.append('Ancillary FSI')
-            fsi_values.append(results['ancillary_area_factor'])
-            fsi_colors.append('#f39c12')  # Orange
-        
-        ax3.bar(fsi_labels, fsi_values, color=fsi_colors)
-        ax3.set_ylabel('FSI Value')
-        ax3.set_title('FSI Composition')
-        
-        # Add a line for total effective FSI
-        ax3.axhline(y=results['total_effective_fsi'], color='r', linestyle='-', label=f'Total Effective FSI: {results["total_effective_fsi"]:.2f}')
-        ax3.legend()
+        st.image(chart_cache.get_or_render("fsi_composition", fsi_data), width="stretch")
+
+# Monte Carlo risk analysis
+def display_risk_analysis(calc_inputs):
+    st.header("Risk Analysis")
+    st.markdown("""
+    Simulate uncertainty in market and cost inputs around the current project.
+    Each input is drawn from the chosen distribution and all samples are evaluated together.
+    """)
+    
+    # Default spread around the current value for each sampled input
+    default_spread = {
+        "market_rate_per_sqft": 0.15,
+        "construction_cost_per_sqft": 0.20,
+        "rent_duration_months": 0.25,
+        "tdr_market_rate": 0.20,
+    }
+    
+    distributions = {}
+    for name, label in RISK_INPUTS.items():
+        current = calc_inputs.get(name)
+        if current is None:
+            st.caption(f"{label}: not used by the current inputs")
+            continue
         
-        plt.tight_layout()
-        st.pyplot(fig3)
+        current = float(current)
+        spread = current * default_spread[name]
+        dist_col, *param_cols = st.columns(4)
+        distribution = dist_col.selectbox(
+            label,
+            list(DISTRIBUTIONS),
+            index=list(DISTRIBUTIONS).index("Triangular"),
+            key=f"risk_distribution_{name}"
+        )
+        defaults = {
+            "low": current - spread,
+            "mode": current,
+            "high": current + spread,
+            "mean": current,
+            "std": spread / 2,
+        }
+        spec = {"distribution": distribution, "value": current}
+        for column, param in zip(param_cols, DISTRIBUTIONS[distribution]):
+            spec[param] = column.number_input(
+                param.capitalize(),
+                value=max(defaults[param], 0.0),
+                min_value=0.0,
+                key=f"risk_{name}_{distribution}_{param}"
+            )
+        distributions[name] = spec
+    
+    seed_col, samples_col = st.columns(2)
+    seed = seed_col.number_input("Random Seed", value=42, min_value=0, step=1, key="risk_seed",
+                                 help="The same seed and inputs always reproduce the same result")
+    n_samples = samples_col.number_input("Number of Samples", value=DEFAULT_SAMPLES, min_value=1000,
+                                         max_value=1_000_000, step=10_000, key="risk_samples")
+    
+    # Results are kept with the settings that produced them and hidden once any of those change
+    run_settings = (dict(calc_inputs), distributions, int(n_samples), int(seed))
+    if st.button("Run Risk Analysis", type="primary", key="run_risk_analysis"):
+        try:
+            risk = run_monte_carlo(calc_inputs, distributions, int(n_samples), int(seed))
+            st.session_state.risk_results = (run_settings, risk)
+        except ValueError as e:
+            st.session_state.pop("risk_results", None)
+            st.error(f"Cannot run the risk analysis: {e}")
+            return
+    
+    settings, risk = st.session_state.get("risk_results") or (None, None)
+    if risk is None:
+        return
+    if settings != run_settings:
+        st.info("The inputs changed since the last run. Run the risk analysis again to update the results.")
+        return
+    
+    st.subheader("Simulation Results")
+    loss_col, p10_col, p50_col, p90_col = st.columns(4)
+    loss_col.metric("Probability of Loss", f"{risk['probability_of_loss'] * 100:.1f}%")
+    percentiles = risk['per_member_profit_percentiles']
+    p10_col.metric("P10 Profit per Member", format_currency(percentiles[10]))
+    p50_col.metric("P50 Profit per Member", format_currency(percentiles[50]))
+    p90_col.metric("P90 Profit per Member", format_currency(percentiles[90]))
+    
+    total_percentiles = risk['total_profit_percentiles']
+    st.markdown(f"""
+    - **Samples**: {risk['n_samples']:,} (seed {risk['seed']})
+    - **Expected Total Profit**: {format_currency(risk['expected_total_profit'])}
+    - **Total Profit P10 / P50 / P90**: {format_currency(total_percentiles[10])} / {format_currency(total_percentiles[50])} / {format_currency(total_percentiles[90])}
+    """)
+    
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.hist(risk['total_profit'], bins=60, color='#3498db')
+    ax.axvline(0, color='r', linestyle='-', label='Break-even')
+    ax.set_xlabel('Total Profit (₹)')
+    ax.set_ylabel('Samples')
+    ax.set_title('Distribution of Total Profit')
+    ax.legend()
+    fig.tight_layout()
+    st.pyplot(fig)
+    plt.close(fig)
+
+# TDR / extra carpet optimizer
+def display_optimizer(calc_inputs):
+    st.header("TDR & Extra Carpet Optimizer")
+    st.markdown("""
+    Search every TDR type, TDR percentage (0-100%) and extra carpet percentage for the current project
+    and keep the options where neither the society nor the developer can do better without the other losing.
+    """)
+    
+    carpet_col, member_col, developer_col = st.columns(3)
+    min_extra_carpet, max_extra_carpet = carpet_col.slider(
+        "Extra Carpet Range (%)", min_value=0, max_value=100, value=(0, 100), key="optimizer_extra_carpet"
+    )
+    min_developer_profit = developer_col.number_input(
+        "Minimum Developer Profit (₹)", value=0.0, step=1000000.0, key="optimizer_min_developer_profit"
+    )
+    min_per_member_profit = None
+    if calc_inputs['is_self_redevelopment']:
+        min_per_member_profit = member_col.number_input(
+            "Minimum Profit per Member (₹)", value=0.0, step=100000.0, key="optimizer_min_per_member_profit"
+        )
+    
+    constraints = {"developer_profit": min_developer_profit} if not calc_inputs['is_self_redevelopment'] else {}
+    if min_per_member_profit is not None:
+        constraints["per_member_profit"] = min_per_member_profit
+    optimum = optimize_tdr_and_carpet(
+        calc_inputs,
+        extra_carpet_percentages=range(min_extra_carpet, max_extra_carpet + 1),
+        constraints=constraints
+    )
+    
+    st.markdown(f"Evaluated **{optimum['candidates']:,}** combinations; **{optimum['feasible']:,}** meet the constraints.")
+    front = optimum['front']
+    if not front:
+        st.warning("No combination meets the constraints.")
+        return
+    
+    st.subheader("Pareto Front")
+    st.table({
+        "TDR Type": [row['tdr_type'] if row['tdr_percentage'] > 0 else "No TDR" for row in front],
+        "TDR %": [f"{row['tdr_percentage']:.0f}%" for row in front],
+        "Extra Carpet %": [f"{row['extra_carpet_percentage']:.0f}%" for row in front],
+        "Society Benefit": [format_currency_short(row['society_benefit']) for row in front],
+        "Developer Profit": [format_currency_short(row['developer_profit']) for row in front],
+        "Profit per Member": [format_currency_short(row['per_member_profit']) for row in front],
+    })
+    
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot([row['developer_profit'] / 10000000 for row in front], [row['society_benefit'] / 10000000 for row in front],
+            marker='o', color='#3498db')
+    ax.set_xlabel('Developer Profit (₹ Crore)')
+    ax.set_ylabel('Society Benefit (₹ Crore)')
+    ax.set_title('Society Benefit vs Developer Profit')
+    fig.tight_layout()
+    st.pyplot(fig)
+    plt.close(fig)
+
+# Scenario comparison
+def _format_metric(value, kind):
+    if kind == "currency":
+        return format_currency_short(value)
+    if kind == "area":
+        return format_area(value)
+    return f"{value:,.2f}"
+
+def _scenario_change_input(param, current, tdr_types, key):
+    label = SCENARIO_PARAMETERS[param]
+    if param == "is_self_redevelopment":
+        return st.radio(label, ["Self-Redevelopment", "Builder Redevelopment"], index=0 if current else 1, key=key) == "Self-Redevelopment"
+    if param == "project_type":
+        return st.selectbox(label, ["residential", "commercial"], key=key)
+    if param == "ready_reckoner_year":
+        return st.selectbox(label, [2022, 2023, 2024], key=key)
+    if param == "tdr_type":
+        return st.selectbox(label, tdr_types, key=key)
+    return st.number_input(label, value=float(current or 0.0), min_value=0.0, key=key)
+
+def display_scenario_comparison(REGION_CONFIG):
+    st.header("Scenario Comparison")
+    st.markdown("""
+    Compare redevelopment options side by side. Each scenario changes some parameters of the
+    current inputs in the Single Project Analysis tab; everything else stays the same.
+    """)
+    
+    params = st.session_state.params
+    if 'scenarios' not in st.session_state:
+        st.session_state.scenarios = {}
+    if not isinstance(st.session_state.get('scenario_cache'), OrderedDict):
+        st.session_state.scenario_cache = OrderedDict()
+    scenarios = st.session_state.scenarios
+    
+    # Quick-add presets
+    presets = scenario_presets(params)
+    preset_col, button_col = st.columns([3, 1])
+    chosen_presets = preset_col.multiselect("Add preset scenarios", list(presets), key="scenario_presets")
+    if button_col.button("Add Presets", key="add_scenario_presets") and chosen_presets:
+        for name in chosen_presets:
+            scenarios[name] = presets[name]
+    
+    # Custom scenario editor
+    with st.expander("Define a custom scenario"):
+        name = st.text_input("Scenario Name", value=f"Scenario {len(scenarios) + 1}", key="scenario_name")
+        changed = st.multiselect(
+            "Parameters to change",
+            list(SCENARIO_PARAMETERS),
+            format_func=lambda p: SCENARIO_PARAMETERS[p],
+            key="scenario_changed_params"
+        )
+        changes = {
+            param: _scenario_change_input(param, params.get(param), REGION_CONFIG[params['region']]["tdr_types_available"],
+                                          key=f"scenario_change_{param}")
+            for param in changed
+        }
+        if st.button("Add Scenario", key="add_custom_scenario") and changes:
+            scenarios[name] = changes
+    
+    if not scenarios:
+        st.info("Add one or more scenarios to compare them with the current inputs.")
+        return
+    
+    # Scenario list with remove buttons
+    for name, changes in list(scenarios.items()):
+        name_col, remove_col = st.columns([5, 1])
+        description = ", ".join(f"{SCENARIO_PARAMETERS.get(p, p)}: {v}" for p, v in changes.items())
+        name_col.markdown(f"**{name}** — {description}")
+        if remove_col.button("Remove", key=f"remove_scenario_{name}"):
+            del scenarios[name]
+            st.rerun()
+    
+    # Only new or edited scenarios are computed; the rest come from the session cache
+    results = evaluate_scenarios(params, scenarios, cache=st.session_state.scenario_cache)
+    names = list(results)
+    current = results["Current Inputs"]
+    
+    st.subheader("Side-by-Side Results")
+    table = {"Metric": [label for label, _ in COMPARISON_METRICS.values()]}
+    for name in names:
+        table[name] = [_format_metric(results[name][metric], kind) for metric, (_, kind) in COMPARISON_METRICS.items()]
+    st.table(table)
+    
+    st.subheader("Difference from Current Inputs")
+    diff_table = {"Metric": table["Metric"]}
+    for name in names[1:]:
+        diff_table[name] = [
+            ("+" if results[name][metric] - current[metric] > 0 else "") + _format_metric(results[name][metric] - current[metric], kind)
+            for metric, (_, kind) in COMPARISON_METRICS.items()
+        ]
+    st.table(diff_table)
+    
+    # Overlay charts
+    plt = pyplot()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, max(4, 0.4 * len(names) + 2)))
+    positions = range(len(names))
+    bar_height = 0.27
+    for offset, metric, color in ((-bar_height, 'total_cost', '#e74c3c'), (0, 'project_value', '#3498db'), (bar_height, 'total_profit', '#2ecc71')):
+        ax1.barh([p + offset for p in positions], [results[name][metric] / 10000000 for name in names],
+                 height=bar_height, color=color, label=COMPARISON_METRICS[metric][0])
+    ax1.set_yticks(list(positions))
+    ax1.set_yticklabels(names)
+    ax1.invert_yaxis()
+    ax1.set_xlabel('₹ Crore')
+    ax1.set_title('Cost, Value and Profit')
+    ax1.legend()
+    
+    per_member = [results[name]['per_member_profit'] / 100000 for name in names]
+    ax2.barh(names, per_member, color=['#2ecc71' if v >= 0 else '#e74c3c' for v in per_member])
+    ax2.invert_yaxis()
+    ax2.axvline(0, color='black', linewidth=0.8)
+    ax2.set_xlabel('₹ Lakh')
+    ax2.set_title('Profit per Member')
+    fig.tight_layout()
+    st.pyplot(fig)
+    plt.close(fig)
 
 # Create the downloadable report text
 def create_download_report(results, region, is_profitable, REGION_CONFIG):
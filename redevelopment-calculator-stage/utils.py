@@ -2,23 +2,19 @@
 # Contains utility functions for the application
 
 import streamlit as st
-from config import TDR_CONFIG, ROAD_WIDTH_FSI_RULES, REGION_CONFIG, READY_RECKONER_RATES
+import lookups
+from config import TDR_CONFIG, REGION_CONFIG, REGION_RULES
 
+# The calculator uses the in-process memoized lookups directly; these
+# Streamlit-cached wrappers are for the UI layer only.
 @st.cache_data(ttl=3600 * 24)  # Cache for 24 hours
-def get_ready_reckoner_rate(region, year):
-    """Get ready reckoner rate for region and year."""
-    return READY_RECKONER_RATES.get(region, {}).get(year, 0)
+def get_ready_reckoner_rate(region, year, zone=None):
+    """Get ready reckoner rate for region and year (and zone, when the rate store has it)."""
+    return lookups.get_ready_reckoner_rate(region, year, zone)
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def get_fsi_based_on_road_width(region, project_type, road_width):
-    """
-    Returns FSI based on road width for the given region and project type.
-    """
-    if region == "Mumbai" and road_width is not None:
-        for (min_width, max_width), fsi in ROAD_WIDTH_FSI_RULES[region][project_type].items():
-            if min_width <= road_width < max_width:
-                return fsi
-    return REGION_CONFIG[region]["fsi_rules"][project_type]
+# The road width lookup is a bisect over precompiled bands, cheaper than
+# st.cache_data's argument hashing, so it is used without a cache.
+get_fsi_based_on_road_width = lookups.get_fsi_based_on_road_width
 
 def format_currency(amount):
     """Format amount in Indian Rupees with commas."""
@@ -32,6 +28,20 @@ def format_currency(amount):
     except (TypeError, ValueError):
         return f"₹{0:,.2f}"
 
+def format_currency_short(amount):
+    """Format amount in Indian Rupees as Cr/Lakh only, for compact tables."""
+    try:
+        sign = "-" if amount < 0 else ""
+        amount = abs(amount)
+        if amount >= 10000000:
+            return f"{sign}₹{amount/10000000:.2f} Cr"
+        elif amount >= 100000:
+            return f"{sign}₹{amount/100000:.2f} Lakh"
+        else:
+            return f"{sign}₹{amount:,.0f}"
+    except (TypeError, ValueError):
+        return f"₹{0:,.0f}"
+
 def format_area(area, unit="sqft"):
     """Format area with commas and unit."""
     try:
@@ -55,7 +65,7 @@ def get_land_area_input(region):
 def get_fungible_input(region):
     """Show fungible FSI input only for Mumbai"""
     if REGION_CONFIG[region]["has_fungible"]:
-        default = REGION_CONFIG[region]["premium_rates"]["fungible_fsi"] * 100
+        default = REGION_RULES[region].default_fungible_fsi * 100
         saved_value = st.session_state.params.get('fungible_fsi', default/100) * 100
         return st.number_input("Fungible FSI (%)", 
                              min_value=0.0, 
@@ -104,9 +114,9 @@ def get_default_parameters(region):
         'tdr_percentage': 0.0,
         'tdr_type': 'Road TDR' if region == 'Mumbai' else 'Standard TDR',
         'tdr_market_rate': TDR_CONFIG['Mumbai']['market_rate'] if region == 'Mumbai' else None,
-        'fungible_fsi': REGION_CONFIG[region]["premium_rates"]["fungible_fsi"] if REGION_CONFIG[region]["has_fungible"] else 0.0,
+        'fungible_fsi': REGION_RULES[region].default_fungible_fsi if REGION_CONFIG[region]["has_fungible"] else 0.0,
         'ancillary_fsi': 0.0,
-        'construction_cost': REGION_CONFIG[region]["premium_rates"]["construction"],
+        'construction_cost': REGION_RULES[region].default_construction_cost,
         'market_rate': 17500.0,
         'avg_flat_size': 750.0,
         'rent': 15000.0,
@@ -0,0 +1,345 @@
+# File: visit_writer.py
+# Contains the background writer of visit records: sessions hand their visit to a bounded
+# queue and return at once, a worker thread writes the visits to the visitor database in
+# batches (one PATCH plus one counter increment per batch), keeping failed writes to retry
+# without ever applying one twice
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from visitor_store import push_key
+
+logger = logging.getLogger(__name__)
+
+# Visits waiting to be written; beyond this, new visits are dropped (and counted)
+DEFAULT_MAX_PENDING = 10000
+# A batch is written once it has this many visits, or when the oldest has waited this long
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL_SECONDS = 2.0
+# Longest wait for the last batch at shutdown
+DEFAULT_SHUTDOWN_TIMEOUT_SECONDS = 10.0
+
+_FLUSH = object()
+_STOP = object()
+
+
+class VisitWriter:
+    """
+    Writes visits to `store` under `path` from a background thread.
+
+    record() never waits on the network: it queues the visit, or drops it
+    when `max_pending` visits are already waiting (or, with `block_seconds`,
+    after waiting that long for room). The worker collects up to `batch_size`
+    visits, or whatever arrived within `flush_interval` of the first one,
+    passes each through `enrich` (e.g. to add location fields), stores them
+    with push keys chosen up front in one PATCH (together with the batch's
+    `rollups` updates, see visitor_rollups) and adds the batch size to
+    `counter` (a ShardedCounter or AtomicCounter) with a second PATCH that
+    also marks the last visit it counts as `counted`.
+
+    The two steps are retried separately. Visits whose PATCH failed are kept
+    (with their push keys) as long as they fit beside the queue's
+    `max_pending` visits, and are written ahead of the next batch or flush;
+    visits stored but not yet counted are added to the next increment. A
+    failed PATCH may have been applied with only its reply lost, and both
+    carry server-side increments, so before sending either again the worker
+    reads back its first visit (or the `counted` mark) and skips it if it
+    is there. Only what does not fit, or is left at close(), counts as failed.
+
+    count() is the last counter value the worker saw plus the visits not yet
+    written, so a page can show the total without a request. close() (run at
+    interpreter exit) writes what is still queued; like flush(), it gives up
+    after its timeout even when the queue is full.
+    """
+
+    def __init__(self, store, counter, path="visitors", enrich=None, rollups=None, max_pending=DEFAULT_MAX_PENDING,
+                 batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL_SECONDS, block_seconds=0):
+        self.store = store
+        self.counter = counter
+        self.path = path
+        self.enrich = enrich
+        self.rollups = rollups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_seconds = block_seconds
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._stopping = threading.Event()
+        self._flushed = threading.Condition(self._lock)
+        self._flushes = 0
+        self._retry = []
+        # Visits at the front of _retry whose PATCH failed, possibly after it was applied
+        self._unconfirmed = 0
+        self._uncounted = 0
+        self._last_key = None
+        # (visit key, visits) of a count PATCH that failed, possibly after it was applied
+        self._count_sent = None
+        self.last_count = None
+        self.pending = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="visit-writer", daemon=True)
+                self._thread.start()
+
+    def record(self, visit):
+        """Queue `visit` for writing; returns False if it was dropped."""
+        if self._closed:
+            return False
+        self._start()
+        with self._lock:
+            self.pending += 1
+        try:
+            if self.block_seconds:
+                self._queue.put(visit, timeout=self.block_seconds)
+            else:
+                self._queue.put_nowait(visit)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.pending -= 1
+                self.dropped += 1
+            return False
+
+    def count(self):
+        """Visitor total as far as this process knows (None before the first batch is written)."""
+        with self._lock:
+            if self.last_count is None:
+                return None
+            return self.last_count + self.pending
+
+    def refresh(self):
+        """Read the counter's current value now (a request; meant for the worker or tools)."""
+        value = self.counter.value()
+        with self._lock:
+            self.last_count = value
+        return value
+
+    def _next_batch(self):
+        """Wait for the first item, then collect items until the batch is full or the interval ends."""
+        batch = []
+        while True:
+            # Once stopping, an empty queue ends the worker (the _STOP sentinel may not have fit)
+            try:
+                item = self._queue.get(timeout=0 if self._stopping.is_set() else self.flush_interval)
+                break
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return batch, _STOP
+                if self._retry or self._uncounted:
+                    return batch, None
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is _FLUSH or item is _STOP:
+                return batch, item
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, None
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return batch, None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return batch, None
+
+    def _store(self, entries, stored=False):
+        """
+        Store (push key, visit) entries and their rollup updates in one PATCH.
+        With `stored` (the PATCH was applied, only its reply was lost) just
+        keep the rollups' session stats as the PATCH left them.
+        """
+        visits = [visit for _, visit in entries]
+        if self.rollups is not None:
+            rollup_updates, sessions = self.rollups.prepare(visits)
+        if not stored:
+            updates = {f"{self.path}/{key}": visit for key, visit in entries}
+            if self.rollups is not None:
+                updates.update(rollup_updates)
+            self.store.patch("", updates)
+        if self.rollups is not None:
+            self.rollups.commit(sessions)
+
+    def _write(self, batch):
+        if self.enrich is not None:
+            batch = [self.enrich(visit) for visit in batch]
+        # Push keys are made here, so the whole batch is one multi-path update; earlier
+        # failed visits go first, to keep the visits of a session in order
+        entries, self._retry = self._retry + [(push_key(), visit) for visit in batch], []
+        unconfirmed, self._unconfirmed = self._unconfirmed, 0
+        start = 0
+        while start < len(entries):
+            # The failed PATCH is checked and resent exactly as it was sent
+            chunk = entries[start:start + (unconfirmed or self.batch_size)]
+            try:
+                stored = bool(unconfirmed) and self.store.get(f"{self.path}/{chunk[0][0]}") is not None
+                self._store(chunk, stored)
+            except Exception as e:
+                self._keep_for_retry(entries[start:], len(chunk), e)
+                break
+            with self._lock:
+                self.written += len(chunk)
+                self.batches += 1
+            self._uncounted += len(chunk)
+            self._last_key = chunk[-1][0]
+            start += len(chunk)
+            unconfirmed = 0
+
+        if self._uncounted:
+            try:
+                self._count()
+            except Exception as e:
+                logger.warning("Could not count %d visits, retrying later: %s", self._uncounted, e)
+
+    def _count(self):
+        """Add the stored but uncounted visits to the counter."""
+        if self._count_sent is not None:
+            key, visits = self._count_sent
+            if self.store.get(f"{self.path}/{key}/counted"):
+                self._counted(visits)
+            self._count_sent = None
+        if self._uncounted:
+            self._count_sent = (self._last_key, self._uncounted)
+            updates = self.counter.increment_updates(self._uncounted)
+            updates[f"{self.path}/{self._last_key}/counted"] = True
+            self.store.patch("", updates)
+            self._count_sent = None
+            self._counted(self._uncounted)
+        value = self.counter.value()
+        with self._lock:
+            self.last_count = value
+
+    def _counted(self, visits):
+        self._uncounted -= visits
+        with self._lock:
+            self.pending -= visits
+
+    def _keep_for_retry(self, entries, unconfirmed, error):
+        room = max(0, self._queue.maxsize - self._queue.qsize()) if self._queue.maxsize else len(entries)
+        self._retry = entries[:room]
+        self._unconfirmed = min(unconfirmed, room)
+        logger.warning("Could not write %d visits, retrying later: %s", len(entries), error)
+        if len(entries) > room:
+            self._fail(len(entries) - room)
+
+    def _fail(self, count):
+        logger.warning("Giving up on %d visits", count)
+        with self._lock:
+            self.pending -= count
+            self.failed += count
+
+    def _run(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning("Could not read the visitor count: %s", e)
+
+        while True:
+            batch, control = self._next_batch()
+            if batch or self._retry or self._uncounted:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    # Only enrich() gets here; the batch never got push keys
+                    logger.warning("Could not prepare %d visits: %s", len(batch), e)
+                    self._fail(len(batch))
+            if control is _STOP:
+                if self._retry:
+                    self._fail(len(self._retry))
+                    self._retry, self._unconfirmed = [], 0
+                if self._uncounted:
+                    logger.warning("%d stored visits were never added to the visitor count", self._uncounted)
+                    with self._lock:
+                        self.pending -= self._uncounted
+                    self._uncounted = 0
+            if control is not None:
+                with self._lock:
+                    self._flushes += 1
+                    self._flushed.notify_all()
+                if control is _STOP:
+                    return
+
+    def flush(self, timeout=None):
+        """Write everything queued so far; returns False if that took longer than `timeout`."""
+        with self._lock:
+            if self._thread is None:
+                return True
+            target = self._flushes + 1
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self._queue.put(_FLUSH, timeout=timeout)
+        except queue.Full:
+            return False
+        with self._lock:
+            return self._flushed.wait_for(lambda: self._flushes >= target, _remaining(deadline))
+
+    def close(self, timeout=DEFAULT_SHUTDOWN_TIMEOUT_SECONDS):
+        """Stop taking visits, write the queued ones and stop the worker."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        self._stopping.set()
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(_remaining(deadline))
+        if thread.is_alive():
+            logger.warning("Visit writer still busy after %.1fs at shutdown; %d visits not written",
+                           timeout, self.pending)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": self.pending,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "retrying": len(self._retry),
+                "batches": self.batches,
+                "last_count": self.last_count,
+            }
+
+
+def _remaining(deadline):
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_visit_writer(store, counter, enrich=None, rollups=None):
+    """The shared writer of this process, created (and registered to flush at exit) on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = VisitWriter(store, counter, enrich=enrich, rollups=rollups)
+                atexit.register(_writer.close)
+    return _writer
+
+
+def reset_visit_writer():
+    """Close the shared writer (writing what it holds), so the next call makes a new one."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+        atexit.unregister(writer.close)
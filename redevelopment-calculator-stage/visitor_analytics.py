@@ -1,21 +1,21 @@
 import streamlit as st
-import requests
-import json
-import time
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
-from collections import Counter
+from http_client import get_http_client
+from visitor_store import StoreError, get_visitor_store, get_visitor_counter
+from visit_writer import get_visit_writer
+from visitor_rollups import VisitRollups, read_dashboard, rebuild_rollups, session_timing
+from bot_detector import is_suspicious_intervals
+
+# Location of the app server, looked up once by the visit writer
+_server_location = None
 
 def get_visitor_data():
     """Get visitor data from Firebase."""
     try:
-        # Firebase REST API endpoint for visitor data
-        url = "https://redevelopment-calculator-default-rtdb.firebaseio.com/visitors.json"
-        
-        # Get current data
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json() or {}
+        # The whole visits tree; only the admin analytics read it
+        return get_visitor_store().get("visitors") or {}
+    except StoreError:
         return {}
     except Exception as e:
         st.sidebar.error(f"Error getting visitor data: {e}")
@@ -23,15 +23,13 @@ def get_visitor_data():
 
 def get_visitor_count():
     """Get current visitor count from Firebase."""
+    counter = get_visitor_counter()
     try:
-        # Firebase REST API endpoint for the visitor count
-        url = "https://redevelopment-calculator-default-rtdb.firebaseio.com/visitor_count.json"
-        
-        # Get current count
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json() or 0
-        return 0
+        return counter.value()
+    except StoreError:
+        # Backend down (or its circuit open): the last count this process saw
+        cached = counter.last_value if counter.last_value is not None else get_writer().count()
+        return cached or 0
     except Exception as e:
         st.sidebar.error(f"Error getting visitor count: {e}")
         return 0
@@ -40,7 +38,7 @@ def get_visitor_location():
     """Get visitor's location based on IP address."""
     try:
         # Use a free IP geolocation API
-        response = requests.get("https://ipapi.co/json/", timeout=2)
+        response = get_http_client().get("https://ipapi.co/json/", endpoint="GET ipapi.co", timeout=2)
         if response.status_code == 200:
             data = response.json()
             return {
@@ -63,37 +61,23 @@ def get_visitor_location():
         'longitude': None
     }
 
-def store_visit_with_metadata(metadata):
-    """Store visit with metadata using Firebase REST API."""
-    try:
-        # Firebase REST API endpoint for visitor data
-        visitors_url = "https://redevelopment-calculator-default-rtdb.firebaseio.com/visitors.json"
-        count_url = "https://redevelopment-calculator-default-rtdb.firebaseio.com/visitor_count.json"
-        
-        # Get current visitor data
-        visitor_data = get_visitor_data()
-        
-        # Create a timestamp-based key
-        timestamp = int(time.time())
-        key = f"{timestamp}"
-        
-        # Update the visitor data
-        visitor_data[key] = metadata
-        
-        # Get and increment the count
-        current_count = get_visitor_count()
-        new_count = current_count + 1
-        
-        # Store the updated count
-        requests.put(count_url, data=json.dumps(new_count))
-        
-        # Store the detailed visitor data
-        requests.put(visitors_url, data=json.dumps(visitor_data))
-        
-        return new_count
-    except Exception as e:
-        st.sidebar.error(f"Error updating visitor data: {e}")
-        return get_visitor_count()  # Return the current count as fallback
+def add_location(metadata):
+    """
+    Add the location fields to a visit's metadata. Runs on the visit writer's
+    thread; ipapi.co locates the address the lookup comes from, which is the
+    app server's for every session, so one successful lookup is reused.
+    """
+    global _server_location
+    location = _server_location
+    if location is None:
+        location = get_visitor_location()
+        if location['country'] != 'Unknown':
+            _server_location = location
+    return {**metadata, **location}
+
+def get_writer():
+    """The shared background writer of visits (see visit_writer)."""
+    return get_visit_writer(get_visitor_store(), get_visitor_counter(), enrich=add_location, rollups=VisitRollups())
 
 def get_visitor_metadata():
     """Collect metadata about the current visitor."""
@@ -105,23 +89,12 @@ def get_visitor_metadata():
         session_hash = str(hash(str(now_utc)))[:8]
         st.session_state['session_id'] = session_hash
     
-    # Get location data if not already cached in this session
-    if 'location_data' not in st.session_state:
-        location = get_visitor_location()
-        st.session_state['location_data'] = location
-    else:
-        location = st.session_state['location_data']
-    
-    # Create a metadata object - directly include location fields rather than nesting
+    # Create a metadata object; the visit writer adds the location fields
+    # (country, region, city, latitude, longitude) off the page render path
     metadata = {
         'timestamp': now_utc.isoformat(),
         'session_id': st.session_state['session_id'],
-        'visit_count': st.session_state.get('visit_count', 1),
-        'country': location['country'],
-        'region': location['region'],
-        'city': location['city'],
-        'latitude': location['latitude'],
-        'longitude': location['longitude']
+        'visit_count': st.session_state.get('visit_count', 1)
     }
     
     # Increment visit count for this session
@@ -134,119 +107,41 @@ def is_suspicious_timing(time_diffs, threshold=0.1):
     Detect if a series of time differences has suspiciously consistent intervals.
     Returns True if the coefficient of variation is below the threshold.
     """
-    if not time_diffs or len(time_diffs) < 3:
-        return False
-    
-    mean = sum(time_diffs) / len(time_diffs)
-    if mean <= 0:
-        return False
-    
-    variance = sum((x - mean) ** 2 for x in time_diffs) / len(time_diffs)
-    std_dev = variance ** 0.5
-    
-    # Coefficient of variation (lower means more consistent)
-    cv = std_dev / mean
-    
-    return cv < threshold
+    # Single pass with running mean/variance (see bot_detector)
+    return is_suspicious_intervals(time_diffs, threshold)
 
 def analyze_visit_patterns():
     """Analyze visitor patterns to detect bot-like behavior."""
-    # Force fresh data fetch
-    visitor_data = get_visitor_data()
-    
-    if not visitor_data:
-        st.warning("No visitor data available for analysis.")
+    # Precomputed rollups: a few small reads however many visits are stored
+    now = datetime.now(pytz.UTC)
+    try:
+        dashboard = read_dashboard(get_visitor_store(), now)
+    except StoreError as e:
+        st.warning(f"Visitor analytics unavailable: {e}")
         return
     
-    # Convert to a list of visit records
-    visits = []
-    for key, metadata in visitor_data.items():
-        try:
-            # Skip entries that don't have proper metadata
-            if not isinstance(metadata, dict) or 'timestamp' not in metadata:
-                continue
-                
-            # Parse the timestamp
-            visit_time = datetime.fromisoformat(metadata['timestamp'].replace('Z', '+00:00'))
-            
-            # Extract session ID and location - handle both direct fields and nested location
-            session_id = metadata.get('session_id', 'unknown')
-            
-            # Check for location information in the metadata
-            # First try direct fields (new format)
-            country = metadata.get('country', 'Unknown')
-            region = metadata.get('region', 'Unknown')
-            city = metadata.get('city', 'Unknown')
-            
-            # If not found, check for nested 'location' object (old format)
-            if country == 'Unknown' and 'location' in metadata and isinstance(metadata['location'], dict):
-                country = metadata['location'].get('country', 'Unknown')
-                region = metadata['location'].get('region', 'Unknown')
-                city = metadata['location'].get('city', 'Unknown')
-            
-            visits.append({
-                'key': key,
-                'timestamp': visit_time,
-                'session_id': session_id,
-                'country': country,
-                'region': region,
-                'city': city
-            })
-        except Exception as e:
-            st.error(f"Error parsing visit data for key {key}: {str(e)}")
-    
-    if not visits:
-        st.warning("No valid visit data found for analysis.")
+    if dashboard is None:
+        st.warning("No visitor analytics yet. Rebuild the rollups to include visits stored before they existed.")
         return
     
-    # Sort visits by timestamp
-    visits.sort(key=lambda x: x['timestamp'])
+    countries = dashboard['countries']
+    unknown_country_visits = countries.pop('Unknown', 0)
+    total_visits = dashboard['total']
     
-    # Group visits by session ID
-    sessions = {}
-    for visit in visits:
-        session_id = visit['session_id']
-        if session_id not in sessions:
-            sessions[session_id] = []
-        sessions[session_id].append(visit)
-    
-    # Analyze time patterns per session
+    # Per-session running stats of the sessions with repeat visits
+    flagged = dashboard['flagged']
     session_analysis = {}
-    for session_id, session_visits in sessions.items():
-        if len(session_visits) < 2:
-            continue
-            
-        # Calculate time differences between consecutive visits
-        time_diffs = []
-        for i in range(1, len(session_visits)):
-            diff_seconds = (session_visits[i]['timestamp'] - session_visits[i-1]['timestamp']).total_seconds()
-            time_diffs.append(diff_seconds)
-        
-        # Check for suspicious timing
-        suspicious_timing = is_suspicious_timing(time_diffs)
-        
-        # Store analysis results
+    for session_id, session in dashboard['repeat_sessions'].items():
+        timing = session_timing(session)
         session_analysis[session_id] = {
-            'visits': session_visits,
-            'time_diffs': time_diffs,
-            'suspicious_timing': suspicious_timing,
-            'avg_diff': sum(time_diffs) / len(time_diffs) if time_diffs else 0,
-            'visit_count': len(session_visits),
-            'first_visit': session_visits[0]['timestamp'],
-            'last_visit': session_visits[-1]['timestamp'],
-            'country': session_visits[0]['country'],
-            'region': session_visits[0]['region'],
-            'city': session_visits[0]['city']
+            **session,
+            'timing': timing,
+            'suspicious_timing': timing.is_suspicious(),
+            'flagged_at': flagged.get(session_id),
+            'first_visit': datetime.fromtimestamp(session['first'], pytz.UTC),
+            'last_visit': datetime.fromtimestamp(session['last'], pytz.UTC)
         }
     
-    # Get timestamps for recent visits
-    now = datetime.now(pytz.UTC)
-    recent_visits = []
-    for visit in visits:
-        # Check if the visit is within the last hour
-        if (now - visit['timestamp']).total_seconds() < 3600:
-            recent_visits.append(visit)
-    
     # Display the analysis results
     st.subheader("Visit Pattern Analysis")
     st.write(f"Last updated: {now.strftime('%Y-%m-%d %H:%M:%S UTC')}")
@@ -254,38 +149,23 @@ def analyze_visit_patterns():
     # Debug information - this can help identify issues
     st.write("**Debug Information:**")
     st.write(f"""
-    - Total visits in database: {len(visitor_data)}
-    - Valid visits processed: {len(visits)}
-    - Visits with known country: {sum(1 for v in visits if v['country'] != 'Unknown')}
-    - Visits with unknown country: {sum(1 for v in visits if v['country'] == 'Unknown')}
+    - Total visits in database: {total_visits}
+    - Sessions with repeat visits: {len(session_analysis)}
+    - Visits with known country: {total_visits - unknown_country_visits}
+    - Visits with unknown country: {unknown_country_visits}
     """)
     
     # Recent activity
     st.subheader("Recent Activity (Last Hour)")
-    if recent_visits:
-        st.write(f"Found {len(recent_visits)} visits in the last hour")
-        
-        # Group by session
-        recent_sessions = {}
-        for visit in recent_visits:
-            if visit['session_id'] not in recent_sessions:
-                recent_sessions[visit['session_id']] = []
-            recent_sessions[visit['session_id']].append(visit)
-        
+    recent_sessions = dashboard['recent_sessions']
+    if dashboard['recent_visits']:
+        st.write(f"Found {dashboard['recent_visits']} visits in the last hour")
         st.write(f"From {len(recent_sessions)} unique sessions")
         
-        # Check for suspicious patterns in recent visits
-        suspicious_recent = False
-        for session_id, session_visits in recent_sessions.items():
-            if len(session_visits) >= 3:
-                time_diffs = []
-                for i in range(1, len(session_visits)):
-                    diff = (session_visits[i]['timestamp'] - session_visits[i-1]['timestamp']).total_seconds()
-                    time_diffs.append(diff)
-                
-                if is_suspicious_timing(time_diffs):
-                    suspicious_recent = True
-                    break
+        # Sessions flagged in the last hour, or active in it with suspicious timing
+        hour_ago = now.timestamp() - 3600
+        suspicious_recent = (any(flagged_at >= hour_ago for flagged_at in flagged.values())
+                             or any(session_timing(session).is_suspicious() for session in recent_sessions.values()))
         
         if suspicious_recent:
             st.warning("⚠️ **Suspicious activity detected in the last hour!**")
@@ -297,26 +177,16 @@ def analyze_visit_patterns():
     # Geographic analysis
     st.subheader("Geographic Distribution")
     
-    # Count visits by country and region
-    country_counts = Counter()
-    region_counts = Counter()
-    
-    for visit in visits:
-        if visit['country'] != 'Unknown':
-            country_counts[visit['country']] += 1
-            
-            if visit['region'] != 'Unknown':
-                region_counts[f"{visit['region']}, {visit['country']}"] += 1
-    
     # Display countries
-    if country_counts:
+    if countries:
         st.write("**Top Countries:**")
-        for country, count in country_counts.most_common(10):
-            st.write(f"🌎 {country}: {count} visits ({round(count/len(visits)*100, 1)}%)")
+        for country, count in countries.most_common(10):
+            st.write(f"🌎 {country}: {count} visits ({round(count/total_visits*100, 1)}%)")
     else:
         st.write("**No country data available**")
     
     # Display regions
+    region_counts = dashboard['regions']
     if region_counts:
         st.write("**Top Regions:**")
         for region, count in region_counts.most_common(10):
@@ -326,8 +196,7 @@ def analyze_visit_patterns():
     
     # Summary statistics
     st.subheader("Overall Statistics")
-    total_visits = len(visits)
-    unique_sessions = len(sessions)
+    unique_sessions = dashboard['session_count']
     bot_sessions = sum(1 for s in session_analysis.values() if s['suspicious_timing'])
     human_sessions = unique_sessions - bot_sessions
     
@@ -343,7 +212,7 @@ def analyze_visit_patterns():
     # Sort sessions by suspiciousness
     sorted_sessions = sorted(
         session_analysis.items(), 
-        key=lambda x: (x[1]['suspicious_timing'], -x[1]['visit_count']),
+        key=lambda x: (x[1]['suspicious_timing'], -x[1]['visits']),
         reverse=True
     )
     
@@ -365,7 +234,7 @@ def analyze_visit_patterns():
             location_str = f" from {analysis['country']}"
         
         # Create an expander for this session
-        with st.expander(f"{icon} Session {session_id} - {status}{location_str} ({analysis['visit_count']} visits)"):
+        with st.expander(f"{icon} Session {session_id} - {status}{location_str} ({analysis['visits']} visits)"):
             # Session details
             st.write(f"**First visit:** {analysis['first_visit'].strftime('%Y-%m-%d %H:%M:%S UTC')}")
             st.write(f"**Last visit:** {analysis['last_visit'].strftime('%Y-%m-%d %H:%M:%S UTC')}")
@@ -375,44 +244,30 @@ def analyze_visit_patterns():
                 st.write(f"**Location:** {analysis['city']}, {analysis['region']}, {analysis['country']}")
             
             # Timing analysis
-            if analysis['time_diffs']:
-                st.write(f"**Average time between visits:** {round(analysis['avg_diff'], 2)} seconds")
+            timing = analysis['timing']
+            if timing.intervals:
+                st.write(f"**Average time between visits:** {round(timing.mean, 2)} seconds")
+                st.write(f"**Spread of the intervals (std. dev.):** {round(timing.std_dev(), 2)} seconds")
                 
                 if analysis['suspicious_timing']:
                     st.warning("⚠️ **Suspiciously consistent timing detected!** This is a strong indicator of automated traffic.")
-                    
-                    # Display the consistent intervals
-                    intervals = [round(td, 2) for td in analysis['time_diffs']]
-                    st.write(f"Time intervals (seconds): {intervals}")
-            
-            # Visit details
-            st.subheader("Individual Visits")
-            for i, visit in enumerate(analysis['visits']):
-                time_str = visit['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-                
-                if i > 0:
-                    time_diff = (visit['timestamp'] - analysis['visits'][i-1]['timestamp']).total_seconds()
-                    st.write(f"{i+1}. {time_str} - Time since last: {round(time_diff, 2)}s")
-                else:
-                    st.write(f"{i+1}. {time_str}")
+                if analysis['flagged_at']:
+                    flagged_time = datetime.fromtimestamp(analysis['flagged_at'], pytz.UTC)
+                    st.write(f"**Flagged at:** {flagged_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
     
     # Time of day analysis
     st.subheader("Visit Time Analysis")
     
-    # Create histogram of visit times by hour
-    visit_hours = [v['timestamp'].hour for v in visits]
-    hour_counts = Counter(visit_hours)
-    
-    # Prepare data for chart
+    # Visits by hour of the day, counted as they arrive
     hours = list(range(24))
-    counts = [hour_counts.get(hour, 0) for hour in hours]
+    counts = dashboard['hour_counts']
     
     # Create a simple bar chart
     st.bar_chart({"Visits by Hour (UTC)": counts})
     
     # Check for suspicious hours with many visits
     suspicious_hours = []
-    for hour, count in hour_counts.items():
+    for hour, count in zip(hours, counts):
         if count > total_visits * 0.2 and count > 10:  # If more than 20% of visits are in one hour and at least 10 visits
             suspicious_hours.append((hour, count))
     
@@ -423,45 +278,68 @@ def analyze_visit_patterns():
 
 def display_visitor_counter():
     """Display the visitor counter in the app with analytics capabilities."""
-    # Only count the visit once per session
+    writer = get_writer()
+    
+    # Only count the visit once per session; it is queued and written in the
+    # background, so the page never waits on Firebase
     if 'visitor_counted' not in st.session_state:
-        metadata = get_visitor_metadata()
-        visitor_count = store_visit_with_metadata(metadata)
+        writer.record(get_visitor_metadata())
         st.session_state.visitor_counted = True
-        st.session_state.visitor_count = visitor_count
-    else:
-        visitor_count = st.session_state.visitor_count
+    
+    # Last count the writer saw plus the visits it has not written yet
+    visitor_count = writer.count()
     
     # Display the visitor count with some styling
     st.sidebar.markdown("---")
     if visitor_count is not None:
         st.sidebar.markdown(f"👥 **Total Visitors**: {visitor_count}")
+    else:
+        st.sidebar.markdown("👥 **Total Visitors**: counting…")
+    
+    # Add an admin toggle
+    with st.sidebar.expander("Admin Analytics", expanded=False):
+        admin_password = st.text_input("Password", type="password", key="admin_password")
         
-        # Add an admin toggle
-        with st.sidebar.expander("Admin Analytics", expanded=False):
-            admin_password = st.text_input("Password", type="password", key="admin_password")
+        if admin_password == "analyzeme":  # Simple password protection
+            # Manual refresh button - prominently displayed
+            if st.button("🔄 Refresh Analytics Data", use_container_width=True):
+                # Force a refresh by clearing any cached data
+                st.rerun()
             
-            if admin_password == "analyzeme":  # Simple password protection
-                # Manual refresh button - prominently displayed
-                if st.button("🔄 Refresh Analytics Data", use_container_width=True):
-                    # Force a refresh by clearing any cached data
-                    st.rerun()
-                
-                # Reset session button - secondary action
-                if st.button("Reset Session", use_container_width=True):
-                    for key in list(st.session_state.keys()):
-                        if key.startswith('visitor_') or key == 'session_id' or key == 'location_data':
-                            del st.session_state[key]
-                    st.rerun()
-                
-                # Show the current time
-                current_time = datetime.now()
-                st.write(f"Current time: {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                # Info about manual refresh
-                st.info("📊 Analytics are not automatically refreshed. Use the 'Refresh Analytics Data' button to see the latest data.")
-                
-                # Always show the analysis when admin is logged in
-                analyze_visit_patterns()
-    else:
-        st.sidebar.markdown("👥 **Visitor Counter Unavailable**")
+            # Reset session button - secondary action
+            if st.button("Reset Session", use_container_width=True):
+                for key in list(st.session_state.keys()):
+                    if key.startswith('visitor_') or key == 'session_id' or key == 'location_data':
+                        del st.session_state[key]
+                st.rerun()
+            
+            # Show the current time
+            current_time = datetime.now()
+            st.write(f"Current time: {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            stats = writer.stats()
+            st.caption(f"Visit writer: {stats['written']} written in {stats['batches']} batches, "
+                       f"{stats['pending']} pending, {stats['dropped']} dropped, {stats['failed']} failed")
+            
+            # Outbound call latencies and circuit breaker states
+            client = get_http_client()
+            endpoint_metrics = client.metrics()
+            if endpoint_metrics:
+                st.dataframe([{'endpoint': endpoint, **metrics} for endpoint, metrics in endpoint_metrics.items()],
+                             hide_index=True)
+                st.caption("Circuits: " + ", ".join(f"{host} {state}" for host, state in client.circuit_states().items()))
+            
+            # Full rescan of the stored visits, only needed to rebuild the rollups
+            if st.button("Rebuild Analytics Rollups", use_container_width=True):
+                writer.flush(timeout=10)
+                with st.spinner("Rescanning every stored visit..."):
+                    try:
+                        rollups = rebuild_rollups(get_visitor_store())
+                        st.success(f"Rollups rebuilt from {rollups['total']} visits")
+                    except StoreError as e:
+                        st.error(f"Could not rebuild the rollups: {e}")
+            
+            # Info about manual refresh
+            st.info("📊 Analytics are not automatically refreshed. Use the 'Refresh Analytics Data' button to see the latest data.")
+            
+            # Always show the analysis when admin is logged in
+            analyze_visit_patterns()
@@ -1,27 +1,16 @@
 import streamlit as st
-import requests
-import json
+from visitor_store import get_visitor_counter
 
 def get_and_increment_visitor_count():
     """Get and increment visitor count using Firebase REST API."""
+    counter = get_visitor_counter()
     try:
-        # Firebase REST API endpoint for the visitor count
-        url = "https://redevelopment-calculator-default-rtdb.firebaseio.com/visitor_count.json"
-        
-        # Get current count
-        response = requests.get(url)
-        current_count = 0
-        if response.status_code == 200:
-            current_count = response.json() or 0
-        
-        # Increment count
-        new_count = current_count + 1
-        requests.put(url, data=json.dumps(new_count))
-        
-        return new_count
+        # Atomic compare-and-set increment, so concurrent sessions never lose a count
+        return counter.increment()
     except Exception as e:
         print(f"Error updating visitor count: {e}")
-        return None
+        # Last count this process saw (None if it never reached the backend)
+        return counter.last_value
 
 def display_visitor_counter():
     """Display the visitor counter in the app."""
@@ -0,0 +1,275 @@
+# File: visitor_rollups.py
+# Contains the visitor analytics rollups: aggregates kept next to the raw visits and updated
+# with every batch the visit writer stores, so the admin dashboard reads a few small nodes
+# instead of every visit ever recorded
+#
+# Layout under visitor_rollups/ (counts are updated with atomic server-side increments):
+#   total                    visits counted
+#   session_count            distinct sessions
+#   hour_of_day/hNN          visits per UTC hour of the day (00-23)
+#   minutes/YYYYMMDDHHMM     visits per UTC minute (read by key range for recent activity)
+#   countries/<country>      visits per country ("Unknown" included)
+#   regions/<region, country>
+#   sessions/<session_id>    visits, first and last (epoch seconds), location and `timing`, the
+#                            bot detector's state row (see bot_detector)
+#   flagged/<session_id>     when the session's visits became suspiciously regular
+#
+# Country and region names are escaped to be valid database keys (see rollup_key).
+# The dashboard's queries need this Firebase rule (without it they fall back to reading the
+# whole sessions node):
+#   "visitor_rollups": {"sessions": {".indexOn": ["visits", "last"]}}
+
+import logging
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from urllib.parse import unquote
+
+import pytz
+
+from bot_detector import SessionTiming, StreamingBotDetector
+from visitor_store import increment
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_PATH = "visitor_rollups"
+
+# Sessions whose running stats this process keeps to extend with their next visits
+SESSION_CACHE_SIZE = 10000
+
+# Characters Firebase does not allow in keys (and % itself, to keep the escaping reversible)
+_KEY_ESCAPES = {"%": "%25", ".": "%2E", "$": "%24", "#": "%23", "[": "%5B", "]": "%5D", "/": "%2F"}
+
+
+def rollup_key(name):
+    """`name` escaped for use as a database key; unquote() reverses it."""
+    key = "".join(_KEY_ESCAPES.get(char, char) for char in str(name))
+    return "".join(char if ord(char) >= 32 else f"%{ord(char):02X}" for char in key) or "Unknown"
+
+
+def parse_visit(metadata):
+    """
+    (timestamp, session_id, country, region, city) of a stored visit, or None
+    if it has no timestamp. Handles both direct location fields and the
+    older nested 'location' object.
+    """
+    if not isinstance(metadata, dict) or 'timestamp' not in metadata:
+        return None
+    timestamp = datetime.fromisoformat(metadata['timestamp'].replace('Z', '+00:00'))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=pytz.UTC)
+
+    country = metadata.get('country', 'Unknown')
+    region = metadata.get('region', 'Unknown')
+    city = metadata.get('city', 'Unknown')
+    if country == 'Unknown' and isinstance(metadata.get('location'), dict):
+        country = metadata['location'].get('country', 'Unknown')
+        region = metadata['location'].get('region', 'Unknown')
+        city = metadata['location'].get('city', 'Unknown')
+    return timestamp, metadata.get('session_id', 'unknown'), country or 'Unknown', region or 'Unknown', city or 'Unknown'
+
+
+def new_session(timestamp, country, region, city):
+    seconds = timestamp.timestamp()
+    return {'visits': 0, 'first': seconds, 'last': seconds, 'country': country, 'region': region, 'city': city}
+
+
+def add_visit(session, timing, timestamp):
+    """Count one more visit of `session` (visits are expected in time order); True if it got the session flagged."""
+    seconds = timestamp.timestamp()
+    flagged = timing.add_visit(seconds)
+    session['visits'] += 1
+    session['last'] = max(session['last'], seconds)
+    session['first'] = min(session['first'], seconds)
+    session['timing'] = timing.row()
+    return flagged
+
+
+def session_timing(session):
+    """The bot detector state of a stored session record."""
+    row = session.get('timing')
+    return SessionTiming.from_row(row) if row else SessionTiming(last=session.get('last'))
+
+
+def _minute_key(timestamp):
+    return timestamp.astimezone(pytz.UTC).strftime("%Y%m%d%H%M")
+
+
+class VisitRollups:
+    """
+    Turns batches of visits into rollup updates. prepare() returns the
+    multi-path updates for a batch (to store together with the visits) and
+    the sessions it changed; commit() keeps those once the write succeeded.
+
+    Sessions are extended from the stats this process cached (their timing
+    in `detector`); a session it has not seen (or evicted) starts afresh.
+    Every session lives in one app process, so in practice its visits all
+    pass through the same cache. A session is written to flagged/ in the
+    batch whose visit made it suspicious, and `on_flag(session_id, timing)`
+    is called once that batch is stored.
+    """
+
+    def __init__(self, path=ROLLUPS_PATH, cache_size=SESSION_CACHE_SIZE, on_flag=None):
+        self.path = path
+        self.cache_size = cache_size
+        self.detector = StreamingBotDetector(max_sessions=cache_size, on_flag=on_flag)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prepare(self, batch):
+        counts = Counter()
+        sessions, timings, flagged = {}, {}, []
+        new_sessions = 0
+        for metadata in batch:
+            try:
+                visit = parse_visit(metadata)
+            except (TypeError, ValueError):
+                visit = None
+            if visit is None:
+                continue
+            timestamp, session_id, country, region, city = visit
+            counts['total'] += 1
+            counts[f"hour_of_day/h{timestamp.astimezone(pytz.UTC).hour:02d}"] += 1
+            counts[f"minutes/{_minute_key(timestamp)}"] += 1
+            counts[f"countries/{rollup_key(country)}"] += 1
+            if region != 'Unknown':
+                counts[f"regions/{rollup_key(f'{region}, {country}')}"] += 1
+
+            session = sessions.get(session_id)
+            if session is None:
+                with self._lock:
+                    cached = self._sessions.get(session_id)
+                session = dict(cached) if cached else new_session(timestamp, country, region, city)
+                new_sessions += cached is None
+                sessions[session_id] = session
+                timings[session_id] = (cached and self.detector.timing(session_id)) or SessionTiming()
+            if add_visit(session, timings[session_id], timestamp):
+                flagged.append(session_id)
+
+        updates = {f"{self.path}/{name}": increment(count) for name, count in counts.items()}
+        if new_sessions:
+            updates[f"{self.path}/session_count"] = increment(new_sessions)
+        for session_id, session in sessions.items():
+            updates[f"{self.path}/sessions/{rollup_key(session_id)}"] = session
+        for session_id in flagged:
+            updates[f"{self.path}/flagged/{rollup_key(session_id)}"] = timings[session_id].flagged_at
+        return updates, (sessions, timings, flagged)
+
+    def commit(self, prepared):
+        sessions, timings, flagged = prepared
+        with self._lock:
+            for session_id, session in sessions.items():
+                self._sessions[session_id] = session
+                self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.cache_size:
+                self._sessions.popitem(last=False)
+        for session_id, timing in timings.items():
+            self.detector.put(session_id, timing)
+        for session_id in flagged:
+            timing = timings[session_id]
+            logger.warning("Session %s flagged as automated at %s (intervals averaging %.2fs)",
+                           session_id, datetime.fromtimestamp(timing.flagged_at, pytz.UTC).isoformat(), timing.mean)
+            if self.detector.on_flag is not None:
+                self.detector.on_flag(session_id, timing)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+        self.detector.clear()
+
+
+def build_rollups(visitor_data):
+    """Rollups computed from scratch from every visit: the layout above, as one value."""
+    visits = []
+    for metadata in (visitor_data or {}).values():
+        try:
+            visit = parse_visit(metadata)
+        except (TypeError, ValueError):
+            continue
+        if visit is not None:
+            visits.append(visit)
+    visits.sort(key=lambda visit: visit[0])
+
+    total = len(visits)
+    hour_of_day, minutes, countries, regions = Counter(), Counter(), Counter(), Counter()
+    sessions, flagged = {}, {}
+    detector = StreamingBotDetector(max_sessions=None)
+    for timestamp, session_id, country, region, city in visits:
+        hour_of_day[f"h{timestamp.astimezone(pytz.UTC).hour:02d}"] += 1
+        minutes[_minute_key(timestamp)] += 1
+        countries[rollup_key(country)] += 1
+        if region != 'Unknown':
+            regions[rollup_key(f"{region}, {country}")] += 1
+        key = rollup_key(session_id)
+        if key not in sessions:
+            sessions[key] = new_session(timestamp, country, region, city)
+        timing = detector.timing(key) or SessionTiming()
+        if add_visit(sessions[key], timing, timestamp):
+            flagged[key] = timing.flagged_at
+        detector.put(key, timing)
+
+    return {
+        'total': total,
+        'session_count': len(sessions),
+        'hour_of_day': dict(hour_of_day),
+        'minutes': dict(minutes),
+        'countries': dict(countries),
+        'regions': dict(regions),
+        'sessions': sessions,
+        'flagged': flagged,
+    }
+
+
+def rebuild_rollups(store, path=ROLLUPS_PATH, visits_path="visitors"):
+    """
+    Recompute the rollups from every stored visit and replace them. Visits
+    written while this runs may be missed; run it when traffic is quiet.
+    """
+    rollups = build_rollups(store.get(visits_path))
+    store.put(path, rollups)
+    return rollups
+
+
+def _query(store, path, order_by, start_at):
+    try:
+        return store.query(path, order_by, start_at=start_at)
+    except Exception:
+        # No index rule on Firebase: filter the whole node here instead
+        node = store.get(path) or {}
+        if order_by == "$key":
+            return {key: value for key, value in node.items() if key >= start_at}
+        return {key: value for key, value in node.items()
+                if isinstance(value, dict) and (value.get(order_by) or 0) >= start_at}
+
+
+def read_dashboard(store, now=None, path=ROLLUPS_PATH):
+    """
+    What the analytics dashboard shows, from the rollups: a handful of small
+    reads, however many visits are stored. None if there are no rollups yet.
+    """
+    now = now or datetime.now(pytz.UTC)
+    summary = {
+        name: store.get(f"{path}/{name}")
+        for name in ('total', 'session_count', 'hour_of_day', 'countries', 'regions', 'flagged')
+    }
+    if summary['total'] is None:
+        return None
+
+    hour_ago = now - timedelta(hours=1)
+    recent_minutes = _query(store, f"{path}/minutes", "$key", _minute_key(hour_ago))
+    # Sessions that can be judged (or shown with intervals) have at least two visits
+    repeat_sessions = _query(store, f"{path}/sessions", "visits", 2)
+    recent_sessions = _query(store, f"{path}/sessions", "last", hour_ago.timestamp())
+
+    hour_of_day = summary['hour_of_day'] or {}
+    return {
+        'total': summary['total'] or 0,
+        'session_count': summary['session_count'] or 0,
+        'hour_counts': [hour_of_day.get(f"h{hour:02d}", 0) for hour in range(24)],
+        'countries': Counter({unquote(key): count for key, count in (summary['countries'] or {}).items()}),
+        'regions': Counter({unquote(key): count for key, count in (summary['regions'] or {}).items()}),
+        'recent_visits': sum(recent_minutes.values()),
+        'recent_sessions': {unquote(key): session for key, session in recent_sessions.items()},
+        'repeat_sessions': {unquote(key): session for key, session in repeat_sessions.items()},
+        'flagged': {unquote(key): flagged_at for key, flagged_at in (summary['flagged'] or {}).items()},
+    }
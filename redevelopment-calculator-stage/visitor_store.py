@@ -0,0 +1,529 @@
+# File: visitor_store.py
+# Contains the visitor analytics database clients: the Firebase Realtime Database REST API
+# and an in-process stand-in with the same semantics for offline use and testing
+#
+# Paths are database paths without the .json suffix, e.g. "visitors" or "visitor_count".
+# Values may contain Firebase server values such as increment(n), resolved by the database.
+# Set VISITOR_STORE=local to use the in-process store instead of Firebase.
+#
+# Serve an in-process store over the same REST API (for offline runs, set
+# VISITOR_DB_URL=http://127.0.0.1:9000):
+#   python visitor_store.py serve --port 9000
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from http_client import HttpError, get_http_client
+
+FIREBASE_URL = os.environ.get("VISITOR_DB_URL", "https://redevelopment-calculator-default-rtdb.firebaseio.com")
+
+# Firebase push IDs: 8 characters of millisecond timestamp then 12 random ones, all from
+# this alphabet (in ASCII order), so keys sort by creation time
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+# Compare-and-set attempts of an atomic increment before giving up, and the
+# backoff between them: random in [0, base * 2**attempt), capped
+CAS_MAX_ATTEMPTS = 30
+CAS_BACKOFF_SECONDS = 0.005
+CAS_MAX_BACKOFF_SECONDS = 0.5
+
+# Shards of the visitor counter; concurrent sessions contend only when they pick the same one
+COUNTER_SHARDS = 16
+
+
+_push_lock = threading.Lock()
+_last_push_time = 0
+_last_push_random = [0] * 12
+
+
+def push_key():
+    """
+    New Firebase-style push key. Keys made by this process are unique and
+    ordered by creation time, so batches can be written with their keys
+    chosen up front.
+    """
+    global _last_push_time, _last_push_random
+    with _push_lock:
+        now = int(time.time() * 1000)
+        if now <= _last_push_time:
+            # Same millisecond: increment the random part so keys stay ordered
+            now = _last_push_time
+            for i in range(11, -1, -1):
+                if _last_push_random[i] < 63:
+                    _last_push_random[i] += 1
+                    break
+                _last_push_random[i] = 0
+        else:
+            _last_push_time = now
+            _last_push_random = [random.randrange(64) for _ in range(12)]
+        random_chars = "".join(PUSH_CHARS[i] for i in _last_push_random)
+    time_chars = []
+    for _ in range(8):
+        time_chars.append(PUSH_CHARS[now % 64])
+        now //= 64
+    return "".join(reversed(time_chars)) + random_chars
+
+
+def increment(delta=1):
+    """Server value adding `delta` to the number stored where it is written (0 if none), atomically."""
+    return {".sv": {"increment": delta}}
+
+
+def _has_server_increment(value):
+    """Does `value` contain an increment() server value anywhere?"""
+    if not isinstance(value, dict):
+        return False
+    server_value = value.get(".sv")
+    if isinstance(server_value, dict) and "increment" in server_value:
+        return True
+    return any(_has_server_increment(child) for child in value.values())
+
+
+def _matches(value, start_at, end_at):
+    if value is None or isinstance(value, (dict, list)):
+        return False
+    try:
+        return (start_at is None or value >= start_at) and (end_at is None or value <= end_at)
+    except TypeError:
+        return False
+
+
+class StoreError(Exception):
+    """A request to the visitor database failed."""
+
+
+class FirebaseStore:
+    """Firebase Realtime Database over its REST API."""
+
+    def __init__(self, base_url=FIREBASE_URL, client=None):
+        self.base_url = base_url.rstrip("/")
+        self.client = client or get_http_client()
+
+    def _url(self, path):
+        return f"{self.base_url}/{path.strip('/')}.json"
+
+    def _request(self, method, path, value=None, headers=None, allowed=(200,), idempotent=None, params=None):
+        data = None if value is None else json.dumps(value)
+        # Metrics per top-level node: "PUT visitor_counter" covers every shard
+        endpoint = f"{method} {path.strip('/').split('/')[0] or '/'}"
+        try:
+            return self.client.request(method, self._url(path), endpoint=endpoint, data=data, headers=headers,
+                                       allowed=allowed, idempotent=idempotent, params=params)
+        except HttpError as e:
+            raise StoreError(str(e)) from e
+
+    def get(self, path):
+        """Value at `path` (None if there is none)."""
+        return self._request("GET", path).json()
+
+    def query(self, path, order_by, start_at=None, end_at=None):
+        """
+        Children of `path` whose `order_by` ("$key" or a child field) lies in
+        [start_at, end_at]. Firebase needs an ".indexOn" rule for a child field.
+        """
+        params = {"orderBy": json.dumps(order_by)}
+        if start_at is not None:
+            params["startAt"] = json.dumps(start_at)
+        if end_at is not None:
+            params["endAt"] = json.dumps(end_at)
+        return self._request("GET", path, params=params).json() or {}
+
+    def put(self, path, value):
+        """Replace the value at `path`."""
+        return self._request("PUT", path, value).json()
+
+    def post(self, path, value):
+        """Append `value` under `path` with a new push key and return the key."""
+        return self._request("POST", path, value).json()["name"]
+
+    def patch(self, path, values):
+        """Write several children of `path` in one request; keys may be deeper paths like "visitors/<key>"."""
+        # Resending a PATCH whose response was lost would apply its increments twice
+        return self._request("PATCH", path, values, idempotent=not _has_server_increment(values)).json()
+
+    def get_with_etag(self, path):
+        """(value, etag) at `path`."""
+        response = self._request("GET", path, headers={"X-Firebase-ETag": "true"})
+        return response.json(), response.headers["ETag"]
+
+    def put_if_match(self, path, value, etag):
+        """
+        Replace the value at `path` only if its ETag is still `etag`.
+        Returns (written, value, etag): the new value and ETag when written,
+        otherwise the current ones (Firebase sends them with the 412).
+        """
+        # Never resent: if a lost response hid a successful write, the resend would
+        # fail the ETag check and the caller would apply its change a second time
+        response = self._request("PUT", path, value, headers={"if-match": etag}, allowed=(200, 412),
+                                 idempotent=False)
+        return response.status_code == 200, response.json(), response.headers["ETag"]
+
+
+class LocalStore:
+    """
+    In-process stand-in for FirebaseStore: a JSON tree in memory with the same
+    get/put/patch/post/query semantics (values are copied in and out, POST
+    creates a time-ordered push key, server values are resolved). Thread-safe,
+    so concurrent sessions can share it.
+    """
+
+    def __init__(self, data=None):
+        self._data = copy.deepcopy(data) if data is not None else None
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    @staticmethod
+    def _parts(path):
+        return [part for part in path.strip("/").split("/") if part]
+
+    def _node(self, parts):
+        node = self._data
+        for part in parts:
+            if not isinstance(node, dict):
+                return None
+            node = node.get(part)
+        return node
+
+    def _resolve(self, parts, value):
+        """`value` with its server values worked out against the current data at `parts`."""
+        if not isinstance(value, dict):
+            return value
+        if set(value) == {".sv"}:
+            server_value = value[".sv"]
+            if server_value == "timestamp":
+                return int(time.time() * 1000)
+            current = self._node(parts)
+            if not isinstance(current, (int, float)) or isinstance(current, bool):
+                current = 0
+            return current + server_value["increment"]
+        return {key: self._resolve(parts + [key], child) for key, child in value.items()}
+
+    def _set(self, parts, value):
+        value = self._resolve(parts, value)
+        if not parts:
+            self._data = value
+            return
+        if not isinstance(self._data, dict):
+            self._data = {}
+        node = self._data
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+
+    def get(self, path):
+        with self._lock:
+            self.requests += 1
+            return copy.deepcopy(self._node(self._parts(path)))
+
+    def query(self, path, order_by, start_at=None, end_at=None):
+        with self._lock:
+            self.requests += 1
+            node = self._node(self._parts(path))
+            if not isinstance(node, dict):
+                return {}
+            if order_by == "$key":
+                return {key: copy.deepcopy(child) for key, child in node.items() if _matches(key, start_at, end_at)}
+            return {key: copy.deepcopy(child) for key, child in node.items()
+                    if isinstance(child, dict) and _matches(child.get(order_by), start_at, end_at)}
+
+    def put(self, path, value):
+        value = json.loads(json.dumps(value))
+        with self._lock:
+            self.requests += 1
+            self._set(self._parts(path), value)
+            return copy.deepcopy(self._node(self._parts(path)))
+
+    def post(self, path, value):
+        value = json.loads(json.dumps(value))
+        with self._lock:
+            self.requests += 1
+            key = push_key()
+            self._set(self._parts(path) + [key], value)
+        return key
+
+    def patch(self, path, values):
+        values = json.loads(json.dumps(values))
+        parts = self._parts(path)
+        with self._lock:
+            self.requests += 1
+            for child, value in values.items():
+                self._set(parts + self._parts(child), value)
+            return {child: copy.deepcopy(self._node(parts + self._parts(child))) for child in values}
+
+    @staticmethod
+    def etag(value):
+        """Content hash of a value, as Firebase's ETags are."""
+        return hashlib.sha1(json.dumps(value, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def get_with_etag(self, path):
+        with self._lock:
+            self.requests += 1
+            value = copy.deepcopy(self._node(self._parts(path)))
+        return value, self.etag(value)
+
+    def put_if_match(self, path, value, etag):
+        value = json.loads(json.dumps(value))
+        parts = self._parts(path)
+        with self._lock:
+            self.requests += 1
+            current = self._node(parts)
+            current_etag = self.etag(current)
+            if current_etag != etag:
+                return False, copy.deepcopy(current), current_etag
+            self._set(parts, value)
+        return True, value, self.etag(value)
+
+
+class AtomicCounter:
+    """
+    Integer at `path` incremented by compare-and-set: write value + delta only
+    if the ETag is unchanged, otherwise retry from the current value after a
+    jittered backoff, so concurrent increments are never lost.
+
+    The last value and ETag this process saw are reused for the next
+    increment, so without contention an increment is a single conditional
+    PUT; a stale guess just costs one retry.
+    """
+
+    def __init__(self, store, path, max_attempts=CAS_MAX_ATTEMPTS):
+        self.store = store
+        self.path = path
+        self.max_attempts = max_attempts
+        self._known = None
+        self._lock = threading.Lock()
+        self.conflicts = 0
+
+    def increment(self, delta=1):
+        """Add `delta` and return the new value."""
+        with self._lock:
+            known = self._known
+        if known is None:
+            known = self.store.get_with_etag(self.path)
+        for attempt in range(self.max_attempts):
+            value, etag = known
+            new_value = (value or 0) + delta
+            written, current, current_etag = self.store.put_if_match(self.path, new_value, etag)
+            if written:
+                with self._lock:
+                    self._known = (current, current_etag)
+                return new_value
+            known = (current, current_etag)
+            with self._lock:
+                self.conflicts += 1
+                self._known = known
+            # The first retry is immediate (the guess may just have been stale), later ones back off
+            if attempt:
+                time.sleep(random.uniform(0, min(CAS_BACKOFF_SECONDS * 2 ** attempt, CAS_MAX_BACKOFF_SECONDS)))
+        raise StoreError(f"Could not increment {self.path} after {self.max_attempts} conflicting writes")
+
+    def increment_updates(self, delta=1):
+        """Multi-path updates adding `delta` with a server-side increment, to PATCH together with other writes."""
+        return {self.path: increment(delta)}
+
+    def value(self):
+        """Current value from the store."""
+        value, etag = self.store.get_with_etag(self.path)
+        with self._lock:
+            self._known = (value, etag)
+        return value or 0
+
+
+class ShardedCounter:
+    """
+    Counter stored as `path`/base plus `shards` AtomicCounters under
+    `path`/shards; an increment goes to a random shard, so hundreds of
+    concurrent sessions rarely conflict, and the value is their sum
+    (a single GET of `path`).
+
+    `legacy_path` holds the count of an older plain counter; the first
+    increment copies it into the base (once, by compare-and-set).
+    """
+
+    def __init__(self, store, path, shards=COUNTER_SHARDS, legacy_path=None):
+        self.store = store
+        self.path = path
+        self.legacy_path = legacy_path
+        # Non-numeric keys, so Firebase never returns the shards as an array
+        self.shards = [AtomicCounter(store, f"{path}/shards/s{i:02d}") for i in range(shards)]
+        self._has_base = False
+        # Last value read, for callers to fall back on while the store is unavailable
+        self.last_value = None
+
+    def _ensure_base(self):
+        if self._has_base:
+            return
+        base_path = f"{self.path}/base"
+        base, etag = self.store.get_with_etag(base_path)
+        if base is None:
+            legacy = self.store.get(self.legacy_path) if self.legacy_path else None
+            # Only the first writer succeeds; anyone else's identical base is already there
+            self.store.put_if_match(base_path, legacy or 0, etag)
+        self._has_base = True
+
+    def increment(self, delta=1):
+        """Add `delta` and return the counter's value after it."""
+        self._ensure_base()
+        random.choice(self.shards).increment(delta)
+        return self.value()
+
+    def increment_updates(self, delta=1):
+        """Multi-path updates adding `delta` to a random shard, to PATCH together with other writes."""
+        self._ensure_base()
+        return random.choice(self.shards).increment_updates(delta)
+
+    def value(self):
+        node = self.store.get(self.path) or {}
+        shards = node.get("shards") or {}
+        base = node.get("base")
+        if base is None and self.legacy_path:
+            # Not taken over yet: the old counter still holds the count
+            base = self.store.get(self.legacy_path)
+        self.last_value = (base or 0) + sum(count or 0 for count in shards.values())
+        return self.last_value
+
+    @property
+    def conflicts(self):
+        return sum(shard.conflicts for shard in self.shards)
+
+
+_store = None
+_counter = None
+_store_lock = threading.Lock()
+
+
+def get_visitor_store():
+    """The shared visitor database client (LocalStore when VISITOR_STORE=local)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = LocalStore() if os.environ.get("VISITOR_STORE") == "local" else FirebaseStore()
+    return _store
+
+
+def get_visitor_counter():
+    """The shared visitor counter, at visitor_counter (taking over the old visitor_count)."""
+    global _counter
+    if _counter is None:
+        store = get_visitor_store()
+        with _store_lock:
+            if _counter is None:
+                _counter = ShardedCounter(store, "visitor_counter", legacy_path="visitor_count")
+    return _counter
+
+
+def set_visitor_store(store):
+    """Replace the shared client, e.g. with a LocalStore holding test data."""
+    global _store, _counter
+    with _store_lock:
+        _store = store
+        _counter = None
+
+
+class _LocalStoreServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Hundreds of sessions may connect at once
+    request_queue_size = 1024
+
+
+class _LocalStoreHandler(BaseHTTPRequestHandler):
+    """
+    Firebase REST API subset (GET with orderBy/startAt/endAt, PUT, PATCH,
+    POST, ETags and if-match) over the server's LocalStore.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Keep-alive clients would otherwise wait out delayed ACKs on every small reply
+    disable_nagle_algorithm = True
+
+    def _path(self):
+        path = urlsplit(self.path).path
+        return path[:-len(".json")] if path.endswith(".json") else path
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _reply(self, status, value, etag=None):
+        body = json.dumps(value).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        store = self.server.store
+        query = {name: json.loads(values[0]) for name, values in parse_qs(urlsplit(self.path).query).items()}
+        if "orderBy" in query:
+            self._reply(200, store.query(self._path(), query["orderBy"], query.get("startAt"), query.get("endAt")))
+        elif self.headers.get("X-Firebase-ETag") == "true":
+            value, etag = store.get_with_etag(self._path())
+            self._reply(200, value, etag)
+        else:
+            self._reply(200, store.get(self._path()))
+
+    def do_PUT(self):
+        store = self.server.store
+        etag = self.headers.get("if-match")
+        if etag is None:
+            self._reply(200, store.put(self._path(), self._body()))
+            return
+        written, value, current_etag = store.put_if_match(self._path(), self._body(), etag)
+        self._reply(200 if written else 412, value, current_etag)
+
+    def do_PATCH(self):
+        self._reply(200, self.server.store.patch(self._path(), self._body()))
+
+    def do_POST(self):
+        self._reply(200, {"name": self.server.store.post(self._path(), self._body())})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_local_store(store=None, host="127.0.0.1", port=0):
+    """
+    Start a thread serving `store` (a new LocalStore by default) over the
+    Firebase REST API. Returns the server; its URL is
+    f"http://{host}:{server.server_port}", stop it with server.shutdown().
+    """
+    server = _LocalStoreServer((host, port), _LocalStoreHandler)
+    server.store = store if store is not None else LocalStore()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Visitor database tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve = subparsers.add_parser("serve", help="Serve an in-memory store over the Firebase REST API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args(argv)
+
+    server = serve_local_store(host=args.host, port=args.port)
+    print(f"Serving an in-memory visitor store at http://{args.host}:{server.server_port} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()